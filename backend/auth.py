@@ -1,4 +1,5 @@
 import os
+import time
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional
@@ -8,6 +9,8 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+import auth_cache
+from hashing import HashingBusy, hashing_pool
 from models import User, UserInDB, Token, TokenData, UserCreate, UserResponse
 from sqlite import create_user, get_user_by_username
 
@@ -23,15 +26,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Helper functions for authentication
+# Helper functions for authentication. bcrypt takes hundreds of
+# milliseconds by design, so async handlers run these on hashing_pool.
 def verify_password(plain_password, hashed_password):
-    logger.debug(f"Verifying password: Plain=\"{plain_password}\" Hashed=\"{hashed_password}\"")
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    hashed_password = pwd_context.hash(password)
-    logger.debug(f"Generated hash for password: {hashed_password}")
-    return hashed_password
+    return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -46,7 +47,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 async def get_user(username: str):
     user_data = await get_user_by_username(username)
     if user_data:
-        logger.debug(f"User retrieved from DB: {user_data.get("username")} Hashed_password: {user_data.get("hashed_password")}")
+        logger.debug(f"User retrieved from DB: {username}")
         return UserInDB(**user_data)
     logger.debug(f"User {username} not found in DB.")
     return None
@@ -57,7 +58,7 @@ async def authenticate_user(username: str, password: str):
     if not user:
         logger.debug(f"Authentication failed: User {username} not found.")
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await hashing_pool.run(verify_password, password, user.hashed_password):
         logger.debug(f"Authentication failed: Password mismatch for user {username}.")
         return False
     logger.debug(f"Authentication successful for user: {username}")
@@ -69,22 +70,39 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    # Verified tokens and their users are cached so that frequent callers
+    # skip the signature check and the database lookup
+    username = auth_cache.token_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = await get_user(token_data.username)
+        expires = payload.get("exp")
+        auth_cache.token_cache.put(token, token_data.username, ttl=expires - time.time() if expires else None)
+    user = auth_cache.user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        generation = auth_cache.user_generation(username)
+        user = await get_user(username)
+        if user is None:
+            raise credentials_exception
+        auth_cache.cache_user(username, user, generation)
     return user
 
 async def get_current_org(current_user: User = Depends(get_current_user)):
     return current_user.org
 
+def login_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent logins, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 # User registration endpoint
 @auth_router.post("/register", response_model=UserResponse)
 async def register_user(user: UserCreate):
@@ -95,9 +113,13 @@ async def register_user(user: UserCreate):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered"
             )
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await hashing_pool.run(get_password_hash, user.password)
         await create_user(user.username, hashed_password, user.org)
         return UserResponse(username=user.username, org=user.org)
+    except HTTPException as http_exc:
+        raise http_exc
+    except HashingBusy:
+        raise login_busy_exception()
     except Exception as e:
         logger.exception(f"Error during user registration: {e}")
         raise HTTPException(
@@ -125,6 +147,8 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     except HTTPException as http_exc:
         # Re-raise HTTPException directly so it\"s handled by http_exception_handler
         raise http_exc
+    except HashingBusy:
+        raise login_busy_exception()
     except Exception as e:
         logger.exception(f"Error during token generation: {e}")
         raise HTTPException(
@@ -0,0 +1,113 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import metrics
+
+# Seconds a verified token or a user record is reused by get_current_user
+# (0 disables caching). Changes made through update_user/delete_user take
+# effect at once in this process; other worker processes see them after at
+# most this long.
+AUTH_CACHE_TTL = float(os.getenv("SENTINELMESH_AUTH_CACHE_TTL", "60"))
+
+# Entries kept per cache; the least recently used entry is evicted first
+AUTH_CACHE_SIZE = int(os.getenv("SENTINELMESH_AUTH_CACHE_SIZE", "10000"))
+
+AUTH_CACHE_REQUESTS = metrics.counter(
+    "sentinelmesh_auth_cache_requests_total",
+    "Authentication cache lookups by cache and result",
+    ("cache", "result"),
+)
+
+
+class TTLCache:
+    """A bounded LRU mapping whose entries expire after ``ttl`` seconds.
+
+    Only used from the event loop thread, so it takes no locks.
+    """
+
+    def __init__(self, name: str, ttl: float = AUTH_CACHE_TTL, maxsize: int = AUTH_CACHE_SIZE):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._hit_metric = AUTH_CACHE_REQUESTS.labels(name, "hit")
+        self._miss_metric = AUTH_CACHE_REQUESTS.labels(name, "miss")
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._hit_metric.inc()
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        self._miss_metric.inc()
+        return None
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value``; ``ttl`` may shorten, but never extend, the cache TTL."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Verified JWTs mapped to their username, each kept no longer than the
+# token's own expiry
+token_cache = TTLCache("token")
+
+# Users loaded by get_current_user, keyed by username
+user_cache = TTLCache("user")
+
+# Bumped by invalidate_user, so a record read from the database before a
+# change is not cached after it
+_user_generations: Dict[str, int] = {}
+
+
+def user_generation(username: str) -> int:
+    """Take before reading ``username`` from the database; see cache_user."""
+    return _user_generations.get(username, 0)
+
+
+def cache_user(username: str, user: Any, generation: int):
+    """Cache ``user`` unless it was invalidated since ``generation`` was taken."""
+    if _user_generations.get(username, 0) == generation:
+        user_cache.put(username, user)
+
+
+def invalidate_user(*usernames: Optional[str]):
+    """Forget cached records for ``usernames`` after they change."""
+    for username in usernames:
+        if username:
+            _user_generations[username] = _user_generations.get(username, 0) + 1
+            user_cache.pop(username)
+
+
+def clear():
+    token_cache.clear()
+    user_cache.clear()
+
+
+def stats() -> dict:
+    return {"token": token_cache.stats(), "user": user_cache.stats()}
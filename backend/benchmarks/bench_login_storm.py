@@ -0,0 +1,102 @@
+"""
+Benchmark: POST /log latency during a burst of bcrypt logins.
+
+Posts log events at a steady rate through the ASGI app while a storm of
+concurrent logins verifies bcrypt passwords, first inline on the event loop
+(as /token used to) and then through HashingPool. The latency of the /log
+requests shows what every agent sees while other agents authenticate.
+
+Run from the backend directory:
+
+    python benchmarks/bench_login_storm.py
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bcrypt  # noqa: E402
+import httpx  # noqa: E402
+
+import sqlite  # noqa: E402
+from hashing import HashingBusy, HashingPool  # noqa: E402
+from main import app  # noqa: E402
+
+LOGINS = 40
+LOG_INTERVAL = 0.005
+WORKERS = 2
+
+# bcrypt is called directly, at passlib's default cost of 12 rounds
+PASSWORD = b"correct horse battery staple"
+HASHED = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(12))
+
+
+def verify():
+    return bcrypt.checkpw(PASSWORD, HASHED)
+
+
+async def login_storm(mode, pool):
+    async def login():
+        if mode == "inline":
+            verify()
+            await asyncio.sleep(0)
+        elif mode == "pool":
+            try:
+                await pool.run(verify)
+            except HashingBusy:
+                pass
+
+    if mode != "none":
+        await asyncio.gather(*(login() for _ in range(LOGINS)))
+    else:
+        await asyncio.sleep(LOGINS * 0.25 / WORKERS)
+
+
+async def run(mode):
+    pool = HashingPool(workers=WORKERS, queue_size=LOGINS, timeout=60)
+    latencies = []
+    done = asyncio.Event()
+    event = {"sender": "agent-a", "receiver": "agent-b", "context": "general", "payload": "hello"}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def sender():
+            while not done.is_set():
+                started = time.perf_counter()
+                response = await client.post("/log", json=event)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(LOG_INTERVAL)
+
+        sender_task = asyncio.create_task(sender())
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await login_storm(mode, pool)
+        elapsed = time.perf_counter() - started
+        done.set()
+        await sender_task
+    await pool.stop()
+
+    latencies_ms = sorted(latency * 1e3 for latency in latencies)
+    p99 = latencies_ms[int(len(latencies_ms) * 0.99) - 1]
+    return elapsed, len(latencies_ms), statistics.median(latencies_ms), p99, latencies_ms[-1]
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite.DB_PATH = str(Path(directory) / "bench.db")
+        await sqlite.init_db()
+        print(f"{LOGINS} concurrent bcrypt logins, /log every {LOG_INTERVAL * 1e3:.0f} ms, {WORKERS} hashing workers")
+        print(f"{'logins':>8} {'storm s':>8} {'/log reqs':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for mode in ("none", "inline", "pool"):
+            elapsed, count, p50, p99, worst = await run(mode)
+            print(f"{mode:>8} {elapsed:>8.2f} {count:>10} {p50:>8.2f} {p99:>8.2f} {worst:>8.2f}")
+        await sqlite.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
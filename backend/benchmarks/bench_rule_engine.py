@@ -0,0 +1,112 @@
+"""
+Benchmark: compiled rule plan vs. the original per-rule linear scan.
+
+Generates synthetic rule sets of increasing size (a mix of context_block,
+payload_contains and payload_regex rules), checks that both evaluators
+produce identical alerts and risk, and reports the time per message.
+
+Run from the backend directory:
+
+    python benchmarks/bench_rule_engine.py
+"""
+
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rules.rule_engine import CompiledRules  # noqa: E402
+
+RULE_COUNTS = [10, 100, 1000, 10000]
+MESSAGES = 200
+PAYLOAD_WORDS = 150
+
+
+def linear_check(rule_list, message):
+    """The rule loop as it was before rules were compiled (stateless types)."""
+    alerts = []
+    total_risk = 0
+    context = message.get("context", "")
+    payload = message.get("payload", "")
+    for rule in rule_list:
+        rule_id = rule.get("id", "unknown")
+        risk = rule.get("risk", 0)
+        rule_type = rule.get("type")
+        if rule_type == "context_block":
+            if context in rule["match"]:
+                alerts.append({"rule_id": rule_id, "message": f"Context '{context}' is blocked by policy.", "risk": risk})
+                total_risk += risk
+        elif rule_type == "payload_contains":
+            for phrase in rule["match"]:
+                if phrase.lower() in payload.lower():
+                    alerts.append({"rule_id": rule_id, "message": f"Payload matched forbidden phrase: '{phrase}'", "risk": risk})
+                    total_risk += risk
+        elif rule_type == "payload_regex":
+            pattern = rule["pattern"]
+            if re.search(pattern, payload):
+                alerts.append({"rule_id": rule_id, "message": f"Payload matched regex pattern: '{pattern}'", "risk": risk})
+                total_risk += risk
+    return alerts, total_risk
+
+
+def word(rng, length=7):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_rules(count, rng):
+    rule_list = []
+    for i in range(count):
+        kind = i % 10
+        if kind < 2:
+            rule_list.append({"id": f"ctx_{i}", "type": "context_block", "match": [word(rng), word(rng)], "risk": 10})
+        elif kind < 8:
+            phrases = [f"{word(rng)} {word(rng)}" for _ in range(3)]
+            rule_list.append({"id": f"phrase_{i}", "type": "payload_contains", "match": phrases, "risk": 20})
+        else:
+            rule_list.append({"id": f"re_{i}", "type": "payload_regex", "pattern": rf"\b{word(rng, 5)}[0-9]{{2,4}}\b", "risk": 30})
+    return rule_list
+
+
+def make_messages(rule_list, rng):
+    phrases = [p for r in rule_list if r["type"] == "payload_contains" for p in r["match"]]
+    contexts = [c for r in rule_list if r["type"] == "context_block" for c in r["match"]]
+    messages = []
+    for _ in range(MESSAGES):
+        words = [word(rng, rng.randint(3, 9)) for _ in range(PAYLOAD_WORDS)]
+        if rng.random() < 0.3 and phrases:
+            words.insert(rng.randrange(len(words)), rng.choice(phrases).upper())
+        context = rng.choice(contexts) if rng.random() < 0.2 and contexts else "general"
+        messages.append({"context": context, "payload": " ".join(words)})
+    return messages
+
+
+def timed(fn, messages):
+    start = time.perf_counter()
+    results = [fn(m) for m in messages]
+    return (time.perf_counter() - start) / len(messages) * 1e6, results
+
+
+def main():
+    rng = random.Random(1234)
+    print(f"{'rules':>7} {'linear us/msg':>15} {'compiled us/msg':>17} {'compile ms':>12} {'speedup':>9}")
+    for count in RULE_COUNTS:
+        rule_list = make_rules(count, rng)
+        messages = make_messages(rule_list, rng)
+
+        start = time.perf_counter()
+        plan = CompiledRules(rule_list)
+        compile_ms = (time.perf_counter() - start) * 1e3
+
+        linear_us, expected = timed(lambda m: linear_check(rule_list, m), messages)
+        compiled_us, actual = timed(lambda m: plan.evaluate(m, m["context"], m["payload"]), messages)
+        assert actual == expected, "compiled plan diverged from the linear scan"
+
+        print(f"{count:>7} {linear_us:>15.1f} {compiled_us:>17.1f} {compile_ms:>12.1f} {linear_us / compiled_us:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: event-loop lag while scoring events inline vs. in a worker pool.
+
+Activates a few hundred case-insensitive regex rules (which cannot be
+prefiltered by literal) and scores multi-kilobyte payloads from concurrent
+clients through RuleExecutor in each mode. A probe task sleeps 1 ms in a
+loop and records how late it wakes up; that lateness is the delay every
+other request and WebSocket on the loop would see.
+
+Run from the backend directory:
+
+    python benchmarks/bench_rule_executor.py
+"""
+
+import asyncio
+import random
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rules import rule_engine  # noqa: E402
+from rules.executor import RuleExecutor  # noqa: E402
+from rules.rule_engine import CompiledRules  # noqa: E402
+
+REGEX_RULES = 300
+PAYLOAD_BYTES = 4096
+EVENTS = 400
+CLIENTS = 16
+WORKERS = 4
+PROBE_INTERVAL = 0.001
+
+
+def word(rng, length=7):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_rules(rng):
+    return [
+        {"id": f"re_{i}", "type": "payload_regex", "pattern": rf"(?i)\b{word(rng, 5)}\s*[-:]?\s*\d{{3,6}}\b", "risk": 5}
+        for i in range(REGEX_RULES)
+    ]
+
+
+def make_messages(rng):
+    messages = []
+    for i in range(EVENTS):
+        words = []
+        while sum(len(w) + 1 for w in words) < PAYLOAD_BYTES:
+            words.append(word(rng, rng.randint(3, 9)))
+        messages.append({"sender": f"agent-{i % 20}", "context": "general", "payload": " ".join(words)})
+    return messages
+
+
+async def probe(lags, stop):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run(mode, messages):
+    executor = RuleExecutor(mode=mode, workers=WORKERS)
+    await executor.start()
+    # Warm up the pool (process workers compile the rules on first use)
+    await executor.evaluate_many(messages[:CLIENTS])
+
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    queue = list(messages)
+
+    async def client():
+        while queue:
+            await executor.evaluate(dict(queue.pop()))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    await executor.stop()
+
+    lags_ms = sorted(lag * 1e3 for lag in lags)
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0
+    return len(messages) / elapsed, statistics.median(lags_ms or [0.0]), p99, max(lags_ms or [0.0])
+
+
+def main():
+    rng = random.Random(1234)
+    rule_engine.activate_rules(CompiledRules(make_rules(rng)))
+    messages = make_messages(rng)
+
+    print(f"{REGEX_RULES} regex rules, {PAYLOAD_BYTES} B payloads, {EVENTS} events, {CLIENTS} clients, {WORKERS} workers")
+    print(f"{'mode':>8} {'events/s':>10} {'lag p50 ms':>12} {'lag p99 ms':>12} {'lag max ms':>12}")
+    for mode in ("inline", "thread", "process"):
+        throughput, p50, p99, worst = asyncio.run(run(mode, messages))
+        print(f"{mode:>8} {throughput:>10.0f} {p50:>12.2f} {p99:>12.2f} {worst:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
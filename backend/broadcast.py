@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Messages buffered per WebSocket client before the slow-consumer policy applies
+WS_QUEUE_SIZE = int(os.getenv("SENTINELMESH_WS_QUEUE_SIZE", "256"))
+
+# "drop_oldest" discards the oldest buffered message; "disconnect" closes
+# the client's socket
+WS_SLOW_CONSUMER_POLICY = os.getenv("SENTINELMESH_WS_SLOW_CONSUMER_POLICY", "drop_oldest").lower()
+
+
+class _Subscriber:
+    __slots__ = ("websocket", "queue", "task", "dropped")
+
+    def __init__(self, websocket: WebSocket, maxsize: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
+class Broadcaster:
+    """Fans log events out to WebSocket subscribers without blocking ingestion.
+
+    Each subscriber gets a bounded queue drained by its own sender task, so
+    clients are written to concurrently and a slow or dead socket only
+    affects itself. ``publish`` serializes an event once and never awaits.
+    """
+
+    def __init__(self, queue_size: int = WS_QUEUE_SIZE, policy: str = WS_SLOW_CONSUMER_POLICY):
+        if policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self._subscribers: Dict[WebSocket, _Subscriber] = {}
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    @property
+    def queued(self) -> int:
+        """Messages waiting across all client queues."""
+        return sum(s.queue.qsize() for s in self._subscribers.values())
+
+    def subscribe(self, websocket: WebSocket):
+        subscriber = _Subscriber(websocket, self.queue_size)
+        subscriber.task = asyncio.create_task(self._sender(subscriber))
+        self._subscribers[websocket] = subscriber
+
+    def unsubscribe(self, websocket: WebSocket):
+        subscriber = self._subscribers.pop(websocket, None)
+        if subscriber is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    def publish(self, message: Dict[str, Any]):
+        """Serialize ``message`` once and enqueue it for every subscriber."""
+        if not self._subscribers:
+            return
+        text = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        self.published += 1
+        for subscriber in list(self._subscribers.values()):
+            try:
+                subscriber.queue.put_nowait(text)
+                continue
+            except asyncio.QueueFull:
+                pass
+            subscriber.dropped += 1
+            self.dropped += 1
+            if self.policy == "drop_oldest":
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(text)
+            else:
+                self._disconnect(subscriber)
+
+    def _disconnect(self, subscriber: _Subscriber):
+        self.disconnected += 1
+        self.unsubscribe(subscriber.websocket)
+        logger.warning("Disconnecting slow WebSocket consumer")
+        asyncio.create_task(self._close(subscriber.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception:
+            pass
+
+    async def _sender(self, subscriber: _Subscriber):
+        try:
+            while True:
+                text = await subscriber.queue.get()
+                await subscriber.websocket.send_text(text)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Dropping WebSocket subscriber after send failure: {e}")
+            self.unsubscribe(subscriber.websocket)
+
+    async def close(self):
+        """Stop every sender task."""
+        subscribers = list(self._subscribers.values())
+        self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.task.cancel()
+        await asyncio.gather(*(s.task for s in subscribers), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "queued": self.queued,
+            "published": self.published,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
@@ -0,0 +1,220 @@
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for the cold tier
+    pa = None
+
+# Directory holding the Parquet segments of compacted partitions; defaults
+# to a "cold" directory next to the database
+COLD_STORAGE_DIR = os.getenv("SENTINELMESH_COLD_STORAGE_DIR")
+
+# Partitions whose logs are all older than this many days are moved to cold
+# storage. 0 keeps every partition in SQLite.
+COLD_STORAGE_AFTER_DAYS = int(os.getenv("SENTINELMESH_COLD_STORAGE_AFTER_DAYS", "0"))
+
+# Rows per Parquet row group. Segments are sorted by timestamp, so row-group
+# statistics let time-range scans skip most of a segment.
+SEGMENT_ROW_GROUP_SIZE = 64 * 1024
+SEGMENT_COMPRESSION = "zstd"
+
+# Column order matches sqlite.LOG_COLUMNS
+SEGMENT_FIELDS = [
+    ("id", "string"),
+    ("sender", "string"),
+    ("receiver", "string"),
+    ("context", "string"),
+    ("payload", "string"),
+    ("timestamp", "string"),
+    ("received_at", "string"),
+    ("org", "string"),
+    ("risk", "int64"),
+]
+SEGMENT_COLUMNS = [name for name, _ in SEGMENT_FIELDS]
+
+
+def available() -> bool:
+    """Whether pyarrow is installed."""
+    return pa is not None
+
+
+def _schema():
+    return pa.schema([(name, pa.type_for_alias(kind)) for name, kind in SEGMENT_FIELDS])
+
+
+def _table(rows: List[Tuple]):
+    schema = _schema()
+    columns = list(zip(*rows)) if rows else [[] for _ in SEGMENT_FIELDS]
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class SegmentWriter:
+    """Write a Parquet segment incrementally.
+
+    Chunks must arrive sorted by (timestamp, id), so only one chunk is held
+    in memory at a time. The file is written under a temporary name and
+    renamed into place by ``close``; ``abort`` removes it instead.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._writer = pq.ParquetWriter(self._tmp_path, _schema(), compression=SEGMENT_COMPRESSION)
+        self._stats: Dict[str, Any] = {
+            "row_count": 0,
+            "min_timestamp": None,
+            "max_timestamp": None,
+            "min_risk": None,
+            "max_risk": None,
+        }
+
+    def write(self, rows: List[Tuple]):
+        """Append rows (tuples in SEGMENT_COLUMNS order)."""
+        self.write_table(_table(rows))
+
+    def write_table(self, table):
+        self._writer.write_table(table, row_group_size=SEGMENT_ROW_GROUP_SIZE)
+        stats = self._stats
+        stats["row_count"] += table.num_rows
+        for key in ("timestamp", "risk"):
+            bounds = pc.min_max(table.column(key)).as_py()
+            if bounds["min"] is not None:
+                low, high = stats[f"min_{key}"], stats[f"max_{key}"]
+                stats[f"min_{key}"] = bounds["min"] if low is None else min(low, bounds["min"])
+                stats[f"max_{key}"] = bounds["max"] if high is None else max(high, bounds["max"])
+
+    def close(self) -> Dict[str, Any]:
+        """Finish the file and return its row count and min/max timestamp and risk."""
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+        return dict(self._stats)
+
+    def abort(self):
+        self._writer.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def write_segment(path: str, rows: List[Tuple]) -> Dict[str, Any]:
+    """Write log rows (tuples in SEGMENT_COLUMNS order) to a Parquet segment.
+
+    Rows are sorted by (timestamp, id) first. Returns the segment's row
+    count and min/max timestamp and risk.
+    """
+    table = _table(rows).sort_by([("timestamp", "ascending"), ("id", "ascending")])
+    writer = SegmentWriter(path)
+    try:
+        writer.write_table(table)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def _filter(min_risk=0, org=None, since=None, until=None, after=None, sender=None, receiver=None, context=None):
+    """Build the scan predicate; it is pushed down to row-group statistics."""
+    expr = ds.field("risk") >= min_risk
+    for name, value in (("org", org), ("sender", sender), ("receiver", receiver), ("context", context)):
+        if value is not None:
+            expr &= ds.field(name) == value
+    if since is not None:
+        expr &= ds.field("timestamp") >= since
+    if until is not None:
+        expr &= ds.field("timestamp") < until
+    if after is not None:
+        timestamp, log_id = after
+        expr &= (ds.field("timestamp") < timestamp) | (
+            (ds.field("timestamp") == timestamp) & (ds.field("id") < log_id)
+        )
+    return expr
+
+
+def _rows(table) -> List[Tuple]:
+    return list(zip(*(table.column(name).to_pylist() for name in SEGMENT_COLUMNS)))
+
+
+def read_segment(
+    path: str,
+    min_risk=0,
+    org=None,
+    since=None,
+    until=None,
+    after: Optional[Tuple[str, str]] = None,
+    descending: bool = True,
+    limit: Optional[int] = None,
+    sender=None,
+    receiver=None,
+    context=None,
+) -> List[Tuple]:
+    """Return matching rows of a segment sorted by (timestamp, id), at most
+    ``limit``. ``after`` is a keyset cursor for newest-first pages.
+
+    Segments are stored in (timestamp, id) order, so with a ``limit`` the
+    row groups are read from the requested end and reading stops as soon
+    as enough rows were found.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    expr = _filter(min_risk, org, since, until, after, sender, receiver, context)
+    if limit is None:
+        table = dataset.to_table(columns=SEGMENT_COLUMNS, filter=expr)
+    else:
+        # Row groups whose statistics rule out the filter are skipped here
+        row_groups = [
+            row_group
+            for fragment in dataset.get_fragments(filter=expr)
+            for row_group in fragment.split_by_row_group(filter=expr)
+        ]
+        if descending:
+            row_groups.reverse()
+        tables, found = [], 0
+        for row_group in row_groups:
+            if found >= limit:
+                break
+            part = row_group.to_table(columns=SEGMENT_COLUMNS, filter=expr)
+            tables.append(part)
+            found += part.num_rows
+        table = pa.concat_tables(tables) if tables else _schema().empty_table()
+    order = "descending" if descending else "ascending"
+    table = table.sort_by([("timestamp", order), ("id", order)])
+    if limit is not None:
+        table = table.slice(0, limit)
+    return _rows(table)
+
+
+def iter_segment(
+    path: str,
+    chunk_size: int,
+    min_risk=0,
+    org=None,
+    since=None,
+    until=None,
+    sender=None,
+    receiver=None,
+    context=None,
+) -> Iterator[List[Tuple]]:
+    """Yield matching rows of a segment oldest first, in chunks."""
+    scanner = ds.dataset(path, format="parquet").scanner(
+        columns=SEGMENT_COLUMNS,
+        filter=_filter(min_risk, org, since, until, sender=sender, receiver=receiver, context=context),
+        batch_size=chunk_size,
+        use_threads=False,  # Keep batches in file (timestamp) order
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _rows(pa.Table.from_batches([batch]))
+
+
+def read_stats_columns(path: str) -> List[Dict[str, Any]]:
+    """Return org, sender, risk and timestamp of every row of a segment."""
+    table = pq.read_table(path, columns=["org", "sender", "risk", "timestamp"])
+    return table.to_pylist()
@@ -0,0 +1,101 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Threads running bcrypt. bcrypt releases the GIL, so each worker uses one
+# core while the event loop keeps serving other requests.
+HASH_WORKERS = int(os.getenv("SENTINELMESH_HASH_WORKERS", "2"))
+
+# Logins allowed to wait for a worker; any more are rejected at once
+HASH_QUEUE_SIZE = int(os.getenv("SENTINELMESH_HASH_QUEUE_SIZE", "64"))
+
+# Seconds a queued login waits for a worker before it is rejected
+HASH_QUEUE_TIMEOUT = float(os.getenv("SENTINELMESH_HASH_QUEUE_TIMEOUT", "5"))
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool cannot take a job; callers answer 503."""
+
+
+class HashingPool:
+    """Run password hashing and verification on a small thread pool.
+
+    At most ``workers`` jobs run at once and at most ``queue_size`` wait
+    for a slot, each for no longer than ``timeout`` seconds, so a burst of
+    logins costs a bounded amount of CPU and memory instead of stalling the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        workers: int = HASH_WORKERS,
+        queue_size: int = HASH_QUEUE_SIZE,
+        timeout: float = HASH_QUEUE_TIMEOUT,
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.waiting = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sentinelmesh-hash")
+        if self._loop is not loop:
+            # Semaphores belong to one loop; test clients start a new one
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run ``func(*args)`` on a hashing worker and return its result."""
+        self._ensure_started()
+        if self._slots.locked():
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                raise HashingBusy("Too many logins in progress")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise HashingBusy("Timed out waiting for a hashing worker")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        try:
+            return await self._loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._slots.release()
+            self.completed += 1
+
+    async def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            logger.info(f"Hashing pool stopped ({self.completed} jobs, {self.rejected + self.timed_out} rejected)")
+        self._slots = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+# Shared by /token and /register
+hashing_pool = HashingPool()
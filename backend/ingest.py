@@ -0,0 +1,183 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlite import insert_logs
+
+logger = logging.getLogger(__name__)
+
+# "sync" writes each event before POST /log replies; "async" hands it to the
+# write-behind queue below and replies as soon as it is enqueued.
+INGEST_MODE = os.getenv("SENTINELMESH_INGEST_MODE", "sync").lower()
+
+# "queued" acknowledges once the event is in memory; "committed" waits for
+# the group commit that contains the event (still amortized across requests).
+INGEST_DURABILITY = os.getenv("SENTINELMESH_INGEST_DURABILITY", "queued").lower()
+
+INGEST_QUEUE_SIZE = int(os.getenv("SENTINELMESH_INGEST_QUEUE_SIZE", "10000"))
+INGEST_BATCH_SIZE = int(os.getenv("SENTINELMESH_INGEST_BATCH_SIZE", "500"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("SENTINELMESH_INGEST_FLUSH_INTERVAL_MS", "50")) / 1000
+
+_STOP = object()
+
+
+class IngestQueueFull(Exception):
+    """Raised when the write-behind queue is at capacity."""
+
+
+class IngestQueue:
+    """Bounded in-process queue that group-commits scored log events.
+
+    A single background task drains the queue and writes a batch whenever
+    ``batch_size`` events are waiting or ``flush_interval`` seconds have passed
+    since the first event of the batch, whichever comes first. After each
+    commit, ``on_commit`` is awaited with the committed events.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = INGEST_QUEUE_SIZE,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        durability: str = INGEST_DURABILITY,
+        on_commit: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ):
+        if durability not in ("queued", "committed"):
+            raise ValueError(f"Unknown ingest durability: {durability}")
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.on_commit = on_commit
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.enqueued = 0
+        self.committed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.last_commit_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the background drain task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize + 1)  # room for _STOP
+        self._reset_counters()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Ingest queue started (size={self.maxsize}, batch={self.batch_size}, "
+            f"interval={self.flush_interval:.3f}s, durability={self.durability})"
+        )
+
+    async def stop(self):
+        """Flush every queued event and stop the drain task."""
+        if not self.running:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        await task
+        logger.info(f"Ingest queue flushed and stopped ({self.committed} events committed)")
+
+    def submit(self, data: Dict[str, Any]) -> Optional[asyncio.Future]:
+        """Enqueue a scored event.
+
+        Returns a future resolved after commit when durability is
+        ``committed``, otherwise ``None``. Raises ``IngestQueueFull`` when the
+        queue is at capacity.
+        """
+        if not self.running or self._queue.qsize() >= self.maxsize:
+            self.rejected += 1
+            raise IngestQueueFull("Ingest queue is full")
+        waiter = None
+        if self.durability == "committed":
+            waiter = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((data, waiter))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return waiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": INGEST_MODE,
+            "running": self.running,
+            "durability": self.durability,
+            "depth": self.depth,
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "committed": self.committed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_commit_seconds": self.last_commit_seconds,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._commit(batch)
+
+    async def _commit(self, batch):
+        entries = [data for data, _ in batch]
+        started = time.perf_counter()
+        try:
+            await insert_logs(entries)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.exception(f"Failed to commit batch of {len(batch)} queued logs: {e}")
+            for _, waiter in batch:
+                if waiter is not None and not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        self.last_commit_seconds = time.perf_counter() - started
+        self.last_batch_size = len(batch)
+        self.committed += len(batch)
+        self.batches += 1
+        for _, waiter in batch:
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+
+        if self.on_commit is not None:
+            try:
+                await self.on_commit(entries)
+            except Exception as e:
+                logger.exception(f"on_commit callback failed: {e}")
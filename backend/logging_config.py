@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import atexit
+import queue
+import random
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Optional
+
+import metrics
+
+# Root log level; DEBUG is verbose enough to show up in ingest profiles
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# json: one JSON object per line; text: human-readable lines for local runs
+LOG_FORMAT = os.getenv("SENTINELMESH_LOG_FORMAT", "json").lower()
+
+# Records buffered between the application and the writer thread. When the
+# writer falls behind, new records are dropped rather than blocking a request.
+LOG_QUEUE_SIZE = int(os.getenv("SENTINELMESH_LOG_QUEUE_SIZE", "10000"))
+
+# Fraction of successful requests written to the access log. Server errors
+# are always logged.
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("SENTINELMESH_ACCESS_LOG_SAMPLE_RATE", "0.01"))
+
+# Dump every ingested event to the "sentinelmesh.payloads" logger. Payloads
+# may hold sensitive data and cost a serialization per event, so this stays
+# off outside of debugging sessions.
+LOG_PAYLOADS = os.getenv("SENTINELMESH_LOG_PAYLOADS", "false").lower() in ("1", "true", "yes")
+
+access_logger = logging.getLogger("sentinelmesh.access")
+payload_logger = logging.getLogger("sentinelmesh.payloads")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON line, including fields passed via ``extra``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+LOG_RECORDS_DROPPED = metrics.counter(
+    "sentinelmesh_log_records_dropped_total",
+    "Log records discarded because the log queue was full",
+)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records that do not fit are counted
+    and discarded.
+
+    Only the message is rendered on the calling thread, and dict and list
+    values passed via ``extra`` are copied, so callers may change them after
+    the log call. The rest of the formatting, including the traceback of
+    ``exc_info``, happens on the writer thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        # Records are logged from worker threads as well as the event loop
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the base class, keep exc_info: this queue never leaves the
+        # process, so the record need not be picklable
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in list(vars(record).items()):
+            if key not in _RECORD_ATTRS and isinstance(value, (dict, list)):
+                setattr(record, key, value.copy())
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                LOG_RECORDS_DROPPED.inc()
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(stream=None):
+    """Route all logging through a bounded queue drained by a writer thread.
+
+    Formatting and the write to ``stream`` (stdout by default) happen on the
+    writer thread, so a log call on the event loop only builds a record and
+    enqueues it. Calling this again replaces the previous configuration.
+    """
+    global _handler, _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if LOG_FORMAT == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+
+    # Send uvicorn's own loggers through the same queue. Its per-request
+    # access log is replaced by the sampled one written by log_access().
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+    access_logger.setLevel(logging.INFO)
+    payload_logger.setLevel(logging.DEBUG if LOG_PAYLOADS else logging.WARNING)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the writer thread."""
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().removeHandler(_handler)
+        _listener = None
+
+
+def log_access(method: str, route: str, path: str, status: int, seconds: float):
+    """Write one access log entry for a sample of requests and every 5xx."""
+    if status < 500 and (ACCESS_LOG_SAMPLE_RATE <= 0 or random.random() >= ACCESS_LOG_SAMPLE_RATE):
+        return
+    access_logger.info(
+        "request",
+        extra={
+            "method": method,
+            "route": route,
+            "path": path,
+            "status": status,
+            "duration_ms": round(seconds * 1e3, 3),
+            "sample_rate": 1.0 if status >= 500 else ACCESS_LOG_SAMPLE_RATE,
+        },
+    )
+
+
+atexit.register(shutdown_logging)
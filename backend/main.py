@@ -1,28 +1,45 @@
 import os
+import time
 import logging
 from datetime import datetime, timezone
 from typing import List
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from sqlite import init_db
+# Load .env values before importing modules that read their settings at import
+load_dotenv()
+
+import metrics
+from logging_config import configure_logging, log_access
+from hashing import hashing_pool
+from sqlite import init_db, close_db
 from models import HealthResponse, ErrorResponse
 
-from routers.logs import logs_router
+from ingest import INGEST_MODE
+from routers.logs import logs_router, ingest_queue, broadcaster, rule_executor
 from routers.stats import stats_router
+from routers.rules import rules_router
+from rules.watcher import RuleFileWatcher
+from retention import RetentionJob, CompactionJob
 
 # from routers.auth import auth_router # Removed authentication router
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+# Structured logs, written to stdout by a background thread
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Load .env values
-load_dotenv()
+# Hot-reloads rules.yaml when it changes on disk
+rule_watcher = RuleFileWatcher()
+
+# Drops log partitions that fall outside SENTINELMESH_RETENTION_DAYS
+retention_job = RetentionJob()
+
+# Moves partitions older than SENTINELMESH_COLD_STORAGE_AFTER_DAYS to Parquet
+compaction_job = CompactionJob()
 
 app = FastAPI(
     title="SentinelMesh API",
@@ -34,14 +51,14 @@ app = FastAPI(
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = datetime.now()
-    logger.info(f"Incoming request: {request.method} {request.url}")
-    
+    start_time = time.perf_counter()
     response = await call_next(request)
-    
-    process_time = (datetime.now() - start_time).total_seconds()
-    logger.info(f"Request completed: {request.method} {request.url} - Status: {response.status_code} - Time: {process_time:.3f}s")
-    
+    process_time = time.perf_counter() - start_time
+
+    # Label by route template, not raw path, to keep the series count bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.HTTP_REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(process_time)
+    log_access(request.method, route, request.url.path, response.status_code, process_time)
     return response
 
 # Configure CORS to allow all origins for testing
@@ -63,6 +80,26 @@ async def startup_event():
     """Initialize the database on startup."""
     await init_db()
     logger.info("✅ SQLite initialized")
+    if INGEST_MODE == "async":
+        await ingest_queue.start()
+    await rule_executor.start()
+    await rule_watcher.start()
+    await retention_job.start()
+    await compaction_job.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued logs, stop WebSocket senders and close the database pool on shutdown."""
+    await rule_watcher.stop()
+    await retention_job.stop()
+    await compaction_job.stop()
+    await rule_executor.stop()
+    await hashing_pool.stop()
+    await ingest_queue.stop()
+    await broadcaster.close()
+    await close_db()
+    logger.info("SQLite connections closed")
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -77,9 +114,16 @@ async def health_check():
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Expose ingest pipeline metrics in Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Include routers
 app.include_router(logs_router)
 app.include_router(stats_router)
+app.include_router(rules_router)
 
 
 @app.exception_handler(HTTPException)
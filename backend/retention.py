@@ -0,0 +1,106 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import sqlite
+import cold_storage
+
+logger = logging.getLogger(__name__)
+
+# Days of logs to keep; older partitions are dropped. 0 keeps logs forever.
+RETENTION_DAYS = int(os.getenv("SENTINELMESH_RETENTION_DAYS", "0"))
+
+# Seconds between retention and compaction passes
+RETENTION_CHECK_INTERVAL = float(os.getenv("SENTINELMESH_RETENTION_CHECK_INTERVAL", "3600"))
+
+
+def retention_cutoff(days: int, now: Optional[datetime] = None) -> str:
+    """ISO date before which whole partitions are expired."""
+    now = now or datetime.now(timezone.utc)
+    return (now.date() - timedelta(days=days)).isoformat()
+
+
+class PartitionJob:
+    """Periodically applies an action to partitions older than ``days``.
+
+    Disabled when ``days`` or ``interval`` is 0. A failed pass is logged and
+    retried on the next interval.
+    """
+
+    name = "partition job"
+
+    def __init__(self, days: int, interval: float = RETENTION_CHECK_INTERVAL):
+        self.days = days
+        self.interval = interval
+        self.partitions_processed = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0 and self.interval > 0
+
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Started {self.name} for logs older than {self.days} days, every {self.interval}s")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def process(self, cutoff: str):
+        raise NotImplementedError
+
+    async def run_once(self):
+        processed = await self.process(retention_cutoff(self.days))
+        self.partitions_processed += len(processed)
+        return processed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"❌ {self.name} pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+class RetentionJob(PartitionJob):
+    """Drops log partitions and cold segments older than the retention window."""
+
+    name = "Log retention"
+
+    def __init__(self, days: int = RETENTION_DAYS, interval: float = RETENTION_CHECK_INTERVAL):
+        super().__init__(days, interval)
+
+    async def process(self, cutoff: str):
+        return await sqlite.drop_partitions_before(cutoff)
+
+
+class CompactionJob(PartitionJob):
+    """Moves aged log partitions into Parquet segments in cold storage."""
+
+    name = "Cold storage compaction"
+
+    def __init__(self, days: int = cold_storage.COLD_STORAGE_AFTER_DAYS, interval: float = RETENTION_CHECK_INTERVAL):
+        super().__init__(days, interval)
+
+    async def start(self):
+        if self.enabled and not cold_storage.available():
+            logger.error("❌ SENTINELMESH_COLD_STORAGE_AFTER_DAYS is set but pyarrow is not installed")
+            return
+        await super().start()
+
+    async def process(self, cutoff: str):
+        return await sqlite.compact_partitions_before(cutoff)
@@ -1,35 +1,127 @@
+import io
+import os
+import csv
+import json
 import uuid
+import zlib
 import logging
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Request, Query, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
-from models import LogEntry, LogResponse, LogsResponse, AlertsResponse
-from sqlite import insert_log, get_logs
-from rules.rule_engine import check_all_rules
+from models import (
+    LogEntry,
+    LogResponse,
+    LogBatchItemResult,
+    LogBatchResponse,
+    LogsResponse,
+    AlertsResponse,
+    IngestQueueStats,
+    BroadcastStats,
+    LogSearchResponse,
+)
+from sqlite import insert_log, insert_logs, get_logs_page, iter_logs, search_logs, decode_cursor, LOG_COLUMNS
+import metrics
+from ingest import IngestQueue, IngestQueueFull
+from broadcast import Broadcaster
+from rules.executor import RuleExecutor
 
 
 logger = logging.getLogger(__name__)
 
 logs_router = APIRouter()
 
-# WebSocket management
-active_connections: List[WebSocket] = []
+# Upper bound on the number of events accepted by POST /logs/batch
+MAX_BATCH_SIZE = int(os.getenv("SENTINELMESH_MAX_BATCH_SIZE", "1000"))
+
+# Upper bound on the decoded size of a POST /logs/batch body, which senders
+# may gzip (Content-Encoding: gzip)
+MAX_BATCH_BYTES = int(os.getenv("SENTINELMESH_MAX_BATCH_BYTES", str(16 * 1024 * 1024)))
+
+# WebSocket management: every subscriber has its own bounded send queue
+broadcaster = Broadcaster()
+
+# Scores events inline or, with SENTINELMESH_RULE_EXECUTOR, in a worker pool.
+# Started and stopped by the application lifecycle hooks in main.py.
+rule_executor = RuleExecutor()
 
 @logs_router.websocket("/ws/logs")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    active_connections.append(websocket)
+    broadcaster.subscribe(websocket)
     try:
         while True:
             # Keep the connection alive, wait for messages (or just pass)
             await websocket.receive_text() 
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
         logger.info("WebSocket disconnected")
     except Exception as e:
         logger.exception(f"WebSocket error: {e}")
+    finally:
+        broadcaster.unsubscribe(websocket)
+
+def tag_log(data: dict, org: str):
+    """Tag an incoming event with id/timestamps/org, in place."""
+    data["id"] = str(uuid.uuid4())
+    data["timestamp"] = data.get("timestamp") or datetime.now(
+        timezone.utc
+    ).isoformat()
+    data["received_at"] = datetime.now(timezone.utc).isoformat()
+    data["org"] = org  # Tag with org
+
+
+async def prepare_log(data: dict, org: str):
+    """Tag an incoming event and score it.
+
+    Mutates ``data`` in place and returns the ``(alerts, risk)`` pair
+    produced by the rule engine.
+    """
+    tag_log(data, org)
+    alerts, risk = await rule_executor.evaluate(data)
+    data["risk"] = risk
+    return alerts, risk
+
+
+async def broadcast_log(data: dict):
+    """Queue a stored log entry for all active WebSocket connections.
+
+    Returns without waiting for any client; slow subscribers are handled
+    by the broadcaster's slow-consumer policy.
+    """
+    if not len(broadcaster):
+        return
+    log_entry_for_ws = LogEntry(**data).dict() # Convert dict to LogEntry model for consistent output
+    broadcaster.publish(log_entry_for_ws)
+
+
+async def broadcast_logs(entries: List[dict]):
+    """Broadcast a group of committed log entries in order."""
+    for data in entries:
+        await broadcast_log(data)
+
+
+# Write-behind queue used by POST /log when SENTINELMESH_INGEST_MODE=async.
+# Started and flushed by the application lifecycle hooks in main.py.
+ingest_queue = IngestQueue(on_commit=broadcast_logs)
+
+metrics.gauge(
+    "sentinelmesh_websocket_subscribers",
+    "Connected /ws/logs clients",
+    lambda: len(broadcaster),
+)
+metrics.gauge(
+    "sentinelmesh_broadcast_queue_depth",
+    "Messages waiting across all WebSocket client queues",
+    lambda: broadcaster.queued,
+)
+metrics.gauge(
+    "sentinelmesh_ingest_queue_depth",
+    "Events waiting in the write-behind ingest queue",
+    lambda: ingest_queue.depth,
+)
+
 
 @logs_router.post("/log", response_model=LogResponse)
 async def receive_log(
@@ -44,22 +136,19 @@ async def receive_log(
     """
     try:
         data = await request.json()
-        log_id = str(uuid.uuid4())
-        data["id"] = log_id
-        data["timestamp"] = data.get("timestamp") or datetime.now(
-            timezone.utc
-        ).isoformat()
-        data["received_at"] = datetime.now(timezone.utc).isoformat()
-        data["org"] = org  # Tag with org
-        alerts, risk = check_all_rules(data)
-        data["risk"] = risk
-
-        await insert_log(log_id, data)
-        
-        # Broadcast new log to all active WebSocket connections
-        log_entry_for_ws = LogEntry(**data).dict() # Convert dict to LogEntry model for consistent output
-        for connection in active_connections:
-            await connection.send_json(log_entry_for_ws)
+        alerts, risk = await prepare_log(data, org)
+        log_id = data["id"]
+
+        if ingest_queue.running:
+            # Write-behind mode: the drain task commits and broadcasts
+            waiter = ingest_queue.submit(data)
+            if waiter is not None:
+                await waiter
+        else:
+            await insert_log(log_id, data)
+
+            # Broadcast new log to all active WebSocket connections
+            await broadcast_log(data)
 
         # Corrected response to match LogResponse model
         return LogResponse(
@@ -68,6 +157,12 @@ async def receive_log(
             risk=risk,
             alerts=alerts
         )
+    except IngestQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Ingest queue is full, retry later",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.exception(f"Error processing log in receive_log: {e}")
         raise HTTPException(
@@ -75,20 +170,161 @@ async def receive_log(
             detail=f"Failed to process log: {str(e)}"
         )
 
+async def read_batch_body(request: Request):
+    """Parse a JSON batch body, gunzipping it when the sender compressed it."""
+    body = await request.body()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, MAX_BATCH_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip request body")
+        if not decompressor.eof:
+            raise HTTPException(status_code=413, detail=f"Batch body exceeds {MAX_BATCH_BYTES} bytes")
+    if len(body) > MAX_BATCH_BYTES:
+        raise HTTPException(status_code=413, detail=f"Batch body exceeds {MAX_BATCH_BYTES} bytes")
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+
+
+@logs_router.post("/logs/batch", response_model=LogBatchResponse)
+async def receive_log_batch(
+    request: Request,
+    org: str = "example-org" # Removed authentication
+) -> LogBatchResponse:
+    """
+    Receive and process a batch of log entries in one request.
+
+    Every event is scored through the rule engine in order, then the whole
+    batch is written with a single transaction. Results are returned in the
+    same order as the submitted events.
+    """
+    events = await read_batch_body(request)
+    if not isinstance(events, list):
+        raise HTTPException(
+            status_code=400,
+            detail="Request body must be a JSON array of log events"
+        )
+    if len(events) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(events)} events (max {MAX_BATCH_SIZE})"
+        )
+    if not all(isinstance(event, dict) for event in events):
+        raise HTTPException(
+            status_code=400,
+            detail="Every batch item must be a JSON object"
+        )
+
+    try:
+        for data in events:
+            tag_log(data, org)
+        # Scored together so the events share rule executor batches
+        scores = await rule_executor.evaluate_many(events)
+        results = []
+        for data, (alerts, risk) in zip(events, scores):
+            data["risk"] = risk
+            results.append(
+                LogBatchItemResult(log_id=data["id"], risk=risk, alerts=alerts)
+            )
+
+        await insert_logs(events)
+
+        for data in events:
+            await broadcast_log(data)
+
+        return LogBatchResponse(
+            message="Batch received and processed successfully",
+            count=len(results),
+            results=results
+        )
+    except Exception as e:
+        logger.exception(f"Error processing batch in receive_log_batch: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process batch: {str(e)}"
+        )
+
+@logs_router.get("/ingest/stats", response_model=IngestQueueStats)
+async def get_ingest_stats() -> IngestQueueStats:
+    """Report depth and throughput counters of the write-behind ingest queue."""
+    return IngestQueueStats(**ingest_queue.stats())
+
+@logs_router.get("/ws/stats", response_model=BroadcastStats)
+async def get_broadcast_stats() -> BroadcastStats:
+    """Report subscriber count and fan-out counters of the WebSocket broadcaster."""
+    return BroadcastStats(**broadcaster.stats())
+
+# Page size bounds for /logs and /alerts
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def validate_cursor(after: Optional[str]):
+    """Reject malformed pagination cursors with a 400."""
+    if after is None:
+        return
+    try:
+        decode_cursor(after)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def validate_timestamp(value: Optional[str], name: str) -> Optional[str]:
+    """Reject time filters that are not ISO 8601 timestamps with a 400."""
+    if value is None:
+        return None
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp: {value}")
+    return value
+
+
+def log_filters(
+    sender: Optional[str] = Query(None, description="Only logs from this sender"),
+    receiver: Optional[str] = Query(None, description="Only logs to this receiver"),
+    context: Optional[str] = Query(None, description="Only logs with this context"),
+    since: Optional[str] = Query(None, description="Inclusive ISO 8601 lower bound on timestamp"),
+    until: Optional[str] = Query(None, description="Exclusive ISO 8601 upper bound on timestamp"),
+) -> dict:
+    """Filters shared by the log read endpoints, applied in the database."""
+    return {
+        "sender": sender,
+        "receiver": receiver,
+        "context": context,
+        "since": validate_timestamp(since, "since"),
+        "until": validate_timestamp(until, "until"),
+    }
+
+
 @logs_router.get("/logs", response_model=LogsResponse)
-async def get_all_logs(org: str = "example-org") -> LogsResponse:
-    """Retrieve all logs for the authenticated organization.
+async def get_all_logs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    filters: dict = Depends(log_filters),
+    org: str = "example-org"
+) -> LogsResponse:
+    """Retrieve logs for the authenticated organization, newest first.
 
-    Returns all log entries regardless of risk level, useful for
-    comprehensive monitoring and forensic analysis.
+    Returns log entries regardless of risk level, useful for
+    comprehensive monitoring and forensic analysis. Results are
+    keyset-paginated: pass ``next_cursor`` back as ``after`` to fetch
+    the next page. Sender, receiver, context and time range filters are
+    applied in the database.
     """
+    validate_cursor(after)
     try:
-        logs = await get_logs(min_risk=0)
+        logs, next_cursor = await get_logs_page(
+            min_risk=0, org=org, limit=limit, after=after, **filters
+        )
         return LogsResponse(
             logs=logs,
             total=len(logs),
-            page=1,
-            per_page=50
+            limit=limit,
+            next_cursor=next_cursor
         )
     except Exception as e:
         logger.exception(f"Error retrieving logs in get_all_logs: {e}")
@@ -97,9 +333,97 @@ async def get_all_logs(org: str = "example-org") -> LogsResponse:
             detail=f"Failed to retrieve logs: {str(e)}"
         )
 
+EXPORT_FIELDS = [column.strip() for column in LOG_COLUMNS.split(",")]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def export_ndjson(rows_iter):
+    async for rows in rows_iter:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+async def export_csv(rows_iter):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    async for rows in rows_iter:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+@logs_router.get("/logs/export")
+async def export_logs(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    min_risk: int = Query(0, ge=0, le=100),
+    filters: dict = Depends(log_filters),
+    org: str = "example-org"
+) -> StreamingResponse:
+    """
+    Stream logs for the organization, oldest first, as NDJSON or CSV.
+
+    Rows are read from the database in chunks and written to the response
+    as they arrive, so exports of any size run in constant memory and
+    start sending immediately.
+    """
+    rows_iter = iter_logs(min_risk=min_risk, org=org, **filters)
+    body = export_csv(rows_iter) if format == "csv" else export_ndjson(rows_iter)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sentinelmesh-logs.{format}"'},
+    )
+
+@logs_router.get("/logs/search", response_model=LogSearchResponse)
+async def search_all_logs(
+    q: str = Query(..., min_length=1, description="Terms that must all appear in payload or context"),
+    filters: dict = Depends(log_filters),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    org: str = "example-org"
+) -> LogSearchResponse:
+    """
+    Full-text search over log payloads and contexts.
+
+    Uses the per-partition FTS5 indexes, so results come back without
+    scanning the logs. Matches are ranked by BM25 relevance, most relevant
+    first; pass ``next_cursor`` back as ``after`` for the next page.
+    """
+    try:
+        results, next_cursor = await search_logs(
+            q, org=org, limit=limit, after=after, **filters
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    except Exception as e:
+        logger.exception(f"Error searching logs in search_all_logs: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to search logs: {str(e)}"
+        )
+    return LogSearchResponse(
+        query=q,
+        results=results,
+        total=len(results),
+        limit=limit,
+        next_cursor=next_cursor
+    )
+
 @logs_router.get("/alerts", response_model=AlertsResponse)
 async def get_alerts(
     min_risk: int = Query(80, ge=0, le=100),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    filters: dict = Depends(log_filters),
     org: str = "example-org" # Removed authentication
 ) -> AlertsResponse:
     """
@@ -107,17 +431,26 @@ async def get_alerts(
 
     Args:
         min_risk: Minimum risk threshold for alerts (0-100)
+        limit: Maximum number of alerts to return
+        after: Cursor from a previous page's ``next_cursor``
+        filters: Exact sender, receiver and context matches and a
+            since/until time range, applied in the database
 
     Returns alerts that meet or exceed the specified risk threshold,
     enabling focused attention on the most critical security events.
     """
+    validate_cursor(after)
     try:
-        logs = await get_logs(min_risk=min_risk)
+        logs, next_cursor = await get_logs_page(
+            min_risk=min_risk, org=org, limit=limit, after=after, **filters
+        )
         # Corrected response to match AlertsResponse model
         return AlertsResponse(
             alerts=logs,
             total=len(logs),
-            min_risk=min_risk
+            min_risk=min_risk,
+            limit=limit,
+            next_cursor=next_cursor
         )
     except Exception as e:
         logger.exception(f"Error retrieving alerts in get_alerts: {e}")
@@ -125,6 +458,3 @@ async def get_alerts(
             status_code=500,
             detail=f"Failed to retrieve alerts: {str(e)}"
         )
-
-
-
@@ -0,0 +1,52 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+
+from models import RulesReloadResponse, RulesStatsResponse
+from rules import rule_engine
+from rules.rule_engine import RuleValidationError
+from rules.watcher import reload_rules_in_background
+
+
+logger = logging.getLogger(__name__)
+
+rules_router = APIRouter()
+
+@rules_router.post("/rules/reload", response_model=RulesReloadResponse)
+async def reload_rules_endpoint() -> RulesReloadResponse:
+    """
+    Re-read rules.yaml and atomically swap in the new rule set.
+
+    Parsing, validation and compilation run in a worker thread. If the file
+    is invalid, the current rule set stays active and a 400 is returned.
+    """
+    try:
+        result = await reload_rules_in_background()
+    except (RuleValidationError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule file: {str(e)}")
+    except Exception as e:
+        logger.exception(f"Error reloading rules in reload_rules_endpoint: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to reload rules: {str(e)}"
+        )
+    return RulesReloadResponse(
+        message="Rules reloaded successfully",
+        rule_count=result["rule_count"],
+        duration_ms=round(result["duration_seconds"] * 1000, 3)
+    )
+
+
+@rules_router.get("/rules/stats", response_model=RulesStatsResponse)
+async def get_rule_stats(
+    sort: str = Query("cost", pattern="^(cost|matches|position)$", description="Order of the rules: slowest first, most matched first, or evaluation order")
+) -> RulesStatsResponse:
+    """
+    Report per-rule match counts and sampled evaluation costs.
+
+    Statistics cover the active rule set and start over when it is
+    reloaded. Match counts include every message; evaluation times and
+    bytes scanned come from the fraction of messages set by
+    SENTINELMESH_RULE_PROFILE_SAMPLE_RATE, each rule timed on its own.
+    """
+    return RulesStatsResponse(**rule_engine.compiled_rules.profile.stats(sort))
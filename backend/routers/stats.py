@@ -21,7 +21,7 @@ async def get_statistics(
     and system health indicators for operational dashboards.
     """
     try:
-        stats = await get_agent_stats()
+        stats = await get_agent_stats(org=org)
         return StatsResponse(stats=stats, org=org)
     except Exception as e:
         logger.exception(f"Error retrieving statistics in get_statistics: {e}")
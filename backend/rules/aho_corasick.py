@@ -0,0 +1,73 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher.
+
+    Builds an Aho-Corasick automaton over a set of literal patterns so that
+    every pattern occurring in a text is found in a single pass over the
+    text, independent of the number of patterns.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[Tuple[int, ...]]] = [None]
+        self._empty: Tuple[int, ...] = ()
+
+        index: Dict[str, int] = {}
+        empty = []
+        for pattern in patterns:
+            if pattern in index:
+                continue
+            index[pattern] = len(self.patterns)
+            self.patterns.append(pattern)
+            if pattern == "":
+                empty.append(index[pattern])
+            else:
+                self._add(pattern, index[pattern])
+        self._empty = tuple(empty)
+        self._build()
+
+    def _add(self, pattern: str, pattern_id: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            state = nxt
+        self._out[state] = (self._out[state] or ()) + (pattern_id,)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._out[self._fail[nxt]]
+                if inherited:
+                    self._out[nxt] = (self._out[nxt] or ()) + inherited
+
+    def search(self, text: str) -> Set[int]:
+        """Return the ids (indexes into ``patterns``) of all patterns in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set(self._empty)
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,230 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from . import rule_engine
+from .rule_engine import CompiledRules, merge_hits, message_fields, total_risk
+
+logger = logging.getLogger(__name__)
+
+# "inline" scores events on the event loop; "thread" and "process" run the
+# regex, phrase and context rules in a worker pool so large payloads do not
+# stall other requests and WebSockets.
+RULE_EXECUTOR = os.getenv("SENTINELMESH_RULE_EXECUTOR", "inline").lower()
+
+# Worker threads or processes in the pool
+RULE_WORKERS = int(os.getenv("SENTINELMESH_RULE_WORKERS", "2"))
+
+# Events scored per worker task, and the longest an event waits for a batch
+# to fill before it is sent anyway
+RULE_BATCH_SIZE = int(os.getenv("SENTINELMESH_RULE_BATCH_SIZE", "64"))
+RULE_BATCH_WAIT = float(os.getenv("SENTINELMESH_RULE_BATCH_WAIT_MS", "2")) / 1000
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Plan compiled from the last rule set shipped to this worker process; one
+# per worker, rebuilt only when the rule set changes
+_worker_plan: Optional[Tuple[int, CompiledRules]] = None
+
+
+def _match_batch(plan: CompiledRules, items: List[Tuple[Any, Any]], sample_rate: float):
+    """Score a batch; profiling samples are returned for the caller to record."""
+    return [
+        plan.match_and_sample(context, payload, sample_rate > 0 and random.random() < sample_rate)
+        for context, payload in items
+    ]
+
+
+def _match_batch_in_process(
+    version: int, rule_list: Optional[List[dict]], items: List[Tuple[Any, Any]], sample_rate: float
+):
+    """Worker process entry point: score a batch against rule set ``version``.
+
+    Batches normally carry only the version. Returns None when this worker
+    has not compiled that version yet and ``rule_list`` was not sent, so the
+    caller resends the batch with the rules.
+    """
+    global _worker_plan
+    if _worker_plan is None or _worker_plan[0] != version:
+        if rule_list is None:
+            return None
+        _worker_plan = (version, CompiledRules(rule_list))
+    return _match_batch(_worker_plan[1], items, sample_rate)
+
+
+class RuleExecutor:
+    """Scores log events with the active rules, off the event loop if asked.
+
+    Events are collected into batches of up to ``batch_size`` (or whatever
+    arrived within ``batch_wait`` seconds) and each batch is one task on the
+    worker pool, so the hand-off cost is paid per batch rather than per
+    event. Only the stateless rules run in the pool. ``sequential_events``
+    rules update shared windows, so they are evaluated on the event loop as
+    each event is submitted, keeping the windows in arrival order whatever
+    the mode or number of workers.
+
+    Until ``start`` is called, or in ``inline`` mode, events are scored
+    synchronously with ``check_all_rules``.
+    """
+
+    def __init__(
+        self,
+        mode: str = RULE_EXECUTOR,
+        workers: int = RULE_WORKERS,
+        batch_size: int = RULE_BATCH_SIZE,
+        batch_wait: float = RULE_BATCH_WAIT,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown rule executor mode: {mode}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self._pool: Optional[Executor] = None
+        self._pending: List[Tuple[Any, Any]] = []
+        self._waiters: List[asyncio.Future] = []
+        self._pending_plan: Optional[CompiledRules] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+        self.evaluated = 0
+        self.batches = 0
+        self.failures = 0
+        self.rule_transfers = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    async def start(self):
+        """Start the worker pool (no-op in inline mode)."""
+        if self.mode == "inline" or self.running:
+            return
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="rules")
+        else:
+            # spawn: forking a process that runs aiosqlite threads is unsafe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(
+            f"Rule executor started (mode={self.mode}, workers={self.workers}, "
+            f"batch={self.batch_size}, wait={self.batch_wait * 1000:.1f}ms)"
+        )
+
+    async def stop(self):
+        """Score every pending event, then shut the pool down."""
+        if not self.running:
+            return
+        self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        pool, self._pool = self._pool, None
+        pool.shutdown(wait=True)
+        logger.info(f"Rule executor stopped ({self.evaluated} events in {self.batches} batches)")
+
+    async def evaluate(self, message: dict):
+        """Return ``(alerts, risk)`` for one event, like ``check_all_rules``."""
+        started = time.perf_counter()
+        if not self.running:
+            self.evaluated += 1
+            result = rule_engine.check_all_rules(message)
+            metrics.RULE_EVALUATION_SECONDS.labels("inline").observe(time.perf_counter() - started)
+            return result
+        plan = rule_engine.compiled_rules
+        sequence_hits = plan.match_sequences(message, plan.profile.should_sample())
+        hits, sample = await self._submit(plan, message_fields(message))
+        hits += sequence_hits
+        plan.record(hits, sample)
+        alerts, rule_risk = merge_hits(hits)
+        metrics.RULE_EVALUATION_SECONDS.labels(self.mode).observe(time.perf_counter() - started)
+        return alerts, total_risk(message, rule_risk)
+
+    async def evaluate_many(self, messages: List[dict]):
+        """Score several events in order; they share batches with each other."""
+        return await asyncio.gather(*(self.evaluate(message) for message in messages))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "running": self.running,
+            "workers": self.workers if self.running else 0,
+            "batch_size": self.batch_size,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "evaluated": self.evaluated,
+            "batches": self.batches,
+            "failures": self.failures,
+            "rule_transfers": self.rule_transfers,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_seconds": self.last_batch_seconds,
+        }
+
+    def _submit(self, plan: CompiledRules, item: Tuple[Any, Any]) -> asyncio.Future:
+        if self._pending_plan is not None and self._pending_plan is not plan:
+            # A batch is always scored against a single rule set
+            self._flush()
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending.append(item)
+        self._waiters.append(waiter)
+        self._pending_plan = plan
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_wait, self._flush)
+        return waiter
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch = (self._pending_plan, self._pending, self._waiters)
+        self._pending, self._waiters, self._pending_plan = [], [], None
+        task = asyncio.create_task(self._run_batch(*batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, plan: CompiledRules, items, waiters):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if self.mode == "thread":
+                results = await loop.run_in_executor(
+                    self._pool, _match_batch, plan, items, plan.profile.sample_rate
+                )
+            else:
+                # Pickling the rule list for every batch would cost more
+                # than scoring small batches, so it is only sent to workers
+                # that report they do not have this version yet
+                results = await loop.run_in_executor(
+                    self._pool, _match_batch_in_process, plan.version, None, items,
+                    plan.profile.sample_rate,
+                )
+                if results is None:
+                    self.rule_transfers += 1
+                    results = await loop.run_in_executor(
+                        self._pool, _match_batch_in_process, plan.version, plan.rules, items,
+                        plan.profile.sample_rate,
+                    )
+        except Exception as e:
+            self.failures += len(items)
+            logger.exception(f"Rule evaluation failed for a batch of {len(items)} events: {e}")
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        self.evaluated += len(items)
+        self.batches += 1
+        self.last_batch_size = len(items)
+        self.last_batch_seconds = time.perf_counter() - started
+        for waiter, result in zip(waiters, results):
+            if not waiter.done():
+                waiter.set_result(result)
@@ -0,0 +1,135 @@
+import os
+import random
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Fraction of messages whose per-rule evaluation time is measured. A sampled
+# message costs about as much as checking every rule one by one; match
+# counts are exact regardless. 0 turns timing off.
+PROFILE_SAMPLE_RATE = float(os.getenv("SENTINELMESH_RULE_PROFILE_SAMPLE_RATE", "0.001"))
+
+# Upper bounds, in microseconds, of the evaluation-time histogram buckets;
+# a final bucket catches everything slower
+LATENCY_BUCKETS_US = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000)
+
+# One sampled timing: (rule position, seconds, bytes scanned)
+Sample = Tuple[int, float, int]
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_US, seconds * 1e6)] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the ``fraction`` quantile, in µs,
+        capped at the slowest sample."""
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                bound = LATENCY_BUCKETS_US[index] if index < len(LATENCY_BUCKETS_US) else float("inf")
+                return round(min(bound, self.max * 1e6), 2)
+        return 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        count = self.count
+        return {
+            "sampled": count,
+            "total_ms": round(self.total * 1e3, 3),
+            "mean_us": round(self.total / count * 1e6, 2) if count else 0.0,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            "max_us": round(self.max * 1e6, 2),
+            "histogram": {
+                **{f"le_{bound}us": n for bound, n in zip(LATENCY_BUCKETS_US, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class RuleProfile:
+    """Per-rule match counts and sampled evaluation costs for one rule plan.
+
+    A profile belongs to a single compiled plan, so statistics start over
+    when the rules are reloaded. Counting matches is a few increments per
+    message; only sampled messages pay for timing.
+    """
+
+    def __init__(self, rules: List[dict], sample_rate: Optional[float] = None):
+        self.rules = rules
+        self.sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.since = datetime.now(timezone.utc).isoformat()
+        self.messages = 0
+        self.sampled_messages = 0
+        self.matches = [0] * len(rules)
+        self.bytes_scanned = [0] * len(rules)
+        self.timings = [_Histogram() for _ in rules]
+        self.plan_timing = _Histogram()
+        self._lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record_hits(self, hits):
+        """Count one evaluated message and the rules it matched."""
+        with self._lock:
+            self.messages += 1
+            for position in {hit[0] for hit in hits}:
+                self.matches[position] += 1
+
+    def record_samples(self, samples: List[Sample], plan_seconds: Optional[float] = None):
+        """Record sampled per-rule timings; ``plan_seconds`` is the cost of
+        the compiled evaluation of the same message."""
+        with self._lock:
+            if plan_seconds is not None:
+                self.sampled_messages += 1
+                self.plan_timing.add(plan_seconds)
+            for position, seconds, nbytes in samples:
+                self.timings[position].add(seconds)
+                self.bytes_scanned[position] += nbytes
+
+    def stats(self, sort: str = "cost") -> Dict[str, Any]:
+        with self._lock:
+            entries = []
+            for position, rule in enumerate(self.rules):
+                timing = self.timings[position].summary()
+                entries.append({
+                    "rule_id": rule.get("id", "unknown"),
+                    "type": rule.get("type", "unknown"),
+                    "position": position,
+                    "matches": self.matches[position],
+                    "hit_rate": round(self.matches[position] / self.messages, 6) if self.messages else 0.0,
+                    "bytes_scanned": self.bytes_scanned[position],
+                    **timing,
+                })
+            summary = {
+                "since": self.since,
+                "sample_rate": self.sample_rate,
+                "messages": self.messages,
+                "sampled_messages": self.sampled_messages,
+                "plan": self.plan_timing.summary(),
+            }
+        if sort == "cost":
+            entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        elif sort == "matches":
+            entries.sort(key=lambda entry: entry["matches"], reverse=True)
+        summary["rules"] = entries
+        return summary
+
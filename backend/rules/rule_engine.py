@@ -2,152 +2,435 @@
 # sentinelmesh/rules/rule_engine.py
 
 import re
+import time
+import itertools
+import threading
 from pathlib import Path
 import yaml
 import logging
-from collections import deque
-from datetime import datetime, timedelta, timezone
+
+from .aho_corasick import AhoCorasick
+from .sequence import SequenceWindows
+from .profiler import RuleProfile
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
 
 logger = logging.getLogger(__name__)
 
 RULE_FILE = Path(__file__).resolve().parent / "rules.yaml"
 rules = [] # Initialize rules globally
 
-# In-memory store for recent log entries for stateful rules
-# Using a deque for efficient appending and popping from either end
-# Max size to prevent unbounded memory growth
-RECENT_LOGS = deque(maxlen=1000) # Store up to 1000 recent logs
+# Below this many distinct literals, C-level substring checks beat walking
+# the automaton in Python (see benchmarks/bench_rule_engine.py)
+AHO_CORASICK_MIN_LITERALS = 256
 
-def load_rules():
-    """Loads rules from the YAML file and sorts them by priority."""
-    global rules
+# Patterns that cannot be safely merged into one alternation
+_UNMERGEABLE_REGEX = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+# Shortest literal worth using to prefilter a payload_regex rule
+MIN_REGEX_LITERAL = 3
+
+
+def _required_literal(pattern):
+    """Return the longest literal run that every match of ``pattern`` contains.
+
+    Returns an empty string when no usable literal can be proven, e.g. for
+    case-insensitive patterns or literals only reachable through branches.
+    """
     try:
-        with open(RULE_FILE, "r") as f:
-            config = yaml.safe_load(f)
-        loaded_rules = config.get("rules", [])
-        # Sort rules by priority in descending order (highest priority first)
-        rules = sorted(loaded_rules, key=lambda x: x.get("priority", 0), reverse=True)
-        logger.info(f"✅ Successfully loaded and sorted {len(rules)} rules from {RULE_FILE}")
-    except FileNotFoundError:
-        logger.error(f"❌ Rule file not found: {RULE_FILE}")
-        rules = []
-    except yaml.YAMLError as e:
-        logger.error(f"❌ Error parsing YAML in {RULE_FILE}: {e}")
-        rules = []
-    except Exception as e:
-        logger.error(f"❌ An unexpected error occurred while loading rules: {e}")
-        rules = []
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return ""
+    if parsed.state.flags & re.IGNORECASE:
+        return ""
 
-# Load rules initially when the module is imported
-load_rules()
+    best = ""
 
-def add_log_to_recent(log_entry: dict):
-    """Adds a log entry to the in-memory recent logs store."""
-    # Ensure timestamp is a datetime object for comparison
-    if isinstance(log_entry.get("timestamp"), str):
-        try:
-            log_entry["timestamp"] = datetime.fromisoformat(log_entry["timestamp"]).astimezone(timezone.utc)
-        except ValueError:
-            logger.warning(f"Could not parse timestamp for log: {log_entry.get('id')}")
-            return
-    RECENT_LOGS.append(log_entry)
-
-def check_sequence(current_log: dict, rule: dict) -> bool:
-    """Checks for a sequence of events based on the rule definition.
-    This is a simplified implementation for demonstration.
+    def walk(items):
+        nonlocal best
+        run = []
+        for op, av in list(items) + [(None, None)]:
+            if op == sre_parse.LITERAL:
+                run.append(chr(av))
+                continue
+            if len(run) > len(best):
+                best = "".join(run)
+            run = []
+            if op == sre_parse.SUBPATTERN and not av[1] & re.IGNORECASE:
+                walk(av[-1])
+
+    walk(parsed)
+    # Literals are matched against the lowercased payload, which is only a
+    # safe necessary condition for ASCII text
+    if len(best) < MIN_REGEX_LITERAL or not best.isascii():
+        return ""
+    return best.lower()
+
+
+# Identifies each compiled plan, e.g. to worker processes holding a copy
+_plan_versions = itertools.count(1)
+
+
+class CompiledRules:
+    """Evaluation plan built once from the sorted rule list.
+
+    All ``context_block`` rules become one hash lookup. All
+    ``payload_contains`` phrases, plus a required literal extracted from each
+    ``payload_regex`` pattern where possible, go into one multi-pattern
+    matcher run over the lowercased payload. Regexes without a usable literal
+    share one combined alternation used as a prefilter. Alerts are emitted in
+    the same order as a linear walk of ``rules``.
     """
-    sequence_config = rule.get("sequence")
-    if not sequence_config:
-        return False
 
-    # For simplicity, let\'s assume a single event type for now
-    # A more robust implementation would iterate through multiple events in the sequence
-    event_type = sequence_config[0].get("event_type")
-    status = sequence_config[0].get("status")
-    count = sequence_config[0].get("count", 1)
-    time_window_seconds = sequence_config[0].get("time_window_seconds", 0)
+    def __init__(self, rule_list):
+        self.version = next(_plan_versions)
+        self.rules = list(rule_list)
+        self.context_index = {}
+        self.context_fallback = []
+        self.regex_merged = []
+        self.regex_unmerged = []
+        self.sequence_rules = []
+        literal_ids = {}
+        self.literals = []
+        self.phrase_owners = []  # per literal: [(position, order, phrase)]
+        self.regex_owners = []   # per literal: [(position, pattern, compiled)]
+        self.compiled_regexes = {}  # position -> compiled pattern
+        self.profile = RuleProfile(self.rules)
 
-    if not event_type:
-        return False
+        def literal_id(text):
+            if text not in literal_ids:
+                literal_ids[text] = len(self.literals)
+                self.literals.append(text)
+                self.phrase_owners.append([])
+                self.regex_owners.append([])
+            return literal_ids[text]
 
-    matched_events = []
-    time_window_start = current_log["timestamp"] - timedelta(seconds=time_window_seconds)
+        for position, rule in enumerate(self.rules):
+            rule_id = rule.get("id", "unknown")
+            rule_type = rule.get("type")
+            if rule_type == "context_block":
+                match = rule["match"]
+                if isinstance(match, (list, tuple)) and all(_is_hashable(m) for m in match):
+                    for value in dict.fromkeys(match):
+                        self.context_index.setdefault(value, []).append(position)
+                else:
+                    # e.g. a bare string, where ``in`` means substring
+                    self.context_fallback.append(position)
+            elif rule_type == "payload_contains":
+                for order, phrase in enumerate(rule["match"]):
+                    self.phrase_owners[literal_id(phrase.lower())].append((position, order, phrase))
+            elif rule_type == "payload_regex":
+                pattern = rule["pattern"]
+                entry = (position, pattern, re.compile(pattern))
+                self.compiled_regexes[position] = entry[2]
+                literal = _required_literal(pattern)
+                if literal:
+                    self.regex_owners[literal_id(literal)].append(entry)
+                elif _UNMERGEABLE_REGEX.search(pattern):
+                    self.regex_unmerged.append(entry)
+                else:
+                    self.regex_merged.append(entry)
+            elif rule_type == "sequential_events":
+                self.sequence_rules.append((position, rule))
+            else:
+                logger.warning(f"Unknown rule type encountered: {rule_type} for rule {rule_id}")
 
-    # Iterate through recent logs (newest first for efficiency if many logs)
-    # Note: deque iteration is from left (oldest) to right (newest)
-    for log in reversed(RECENT_LOGS):
-        if log["timestamp"] < time_window_start:
-            break # Logs are too old
+        self.matcher = None
+        if len(self.literals) >= AHO_CORASICK_MIN_LITERALS:
+            self.matcher = AhoCorasick(self.literals)
 
-        # Simplified matching logic: check event_type and status in context/payload
-        # A real implementation would have more sophisticated matching
-        is_match = False
-        if event_type == "login_attempt": # Specific to the example rule
-            if "login" in log.get("context", "").lower() or "login" in log.get("payload", "").lower():
-                if status == "failed" and ("failed" in log.get("payload", "").lower() or "fail" in log.get("payload", "").lower()):
-                    is_match = True
-                elif status == "success" and ("success" in log.get("payload", "").lower()):
-                    is_match = True
+        self.regex_prefilter = None
+        if self.regex_merged:
+            try:
+                self.regex_prefilter = re.compile(
+                    "|".join(f"(?:{pattern})" for _, pattern, _ in self.regex_merged)
+                )
+            except re.error:
+                # e.g. duplicate group names across rules
+                self.regex_unmerged.extend(self.regex_merged)
+                self.regex_merged = []
 
-        if is_match:
-            matched_events.append(log)
+    def _matched_literals(self, payload):
+        lowered = payload.lower()
+        if self.matcher is not None:
+            return self.matcher.search(lowered)
+        return [i for i, literal in enumerate(self.literals) if literal in lowered]
 
-    return len(matched_events) >= count
+    def evaluate(self, message, context, payload):
+        """Return ``(alerts, total_rule_risk)`` for one message."""
+        hits, sample = self.match_and_sample(context, payload, self.profile.should_sample())
+        hits += self.match_sequences(message, sample is not None)
+        self.record(hits, sample)
+        return merge_hits(hits)
 
-def check_all_rules(message):
-    alerts = []
-    # Initialize total_risk with the risk from the incoming message
-    total_risk = message.get("risk", 0)
-    context = message.get("context", "")
-    payload = message.get("payload", "")
-
-    # Add the current message to recent logs for stateful rule evaluation
-    add_log_to_recent(message.copy()) # Add a copy to avoid modifying original message
-
-    for rule in rules:
-        rule_id = rule.get("id", "unknown")
-        risk = rule.get("risk", 0)
-        rule_type = rule.get("type")
+    def match_and_sample(self, context, payload, sample):
+        """Run match_stateless; when ``sample`` is true, also time it and
+        every stateless rule on its own.
+
+        Returns the hits and either None or ``(plan_seconds, samples)`` for
+        ``record``.
+        """
+        if not sample:
+            return self.match_stateless(context, payload), None
+        started = time.perf_counter()
+        hits = self.match_stateless(context, payload)
+        plan_seconds = time.perf_counter() - started
+        return hits, (plan_seconds, self.profile_stateless(context, payload))
+
+    def record(self, hits, sample=None):
+        """Add one message's hits, and its timings if sampled, to the profile."""
+        if sample is not None:
+            self.profile.record_samples(sample[1], sample[0])
+        self.profile.record_hits(hits)
+
+    def profile_stateless(self, context, payload):
+        """Time each stateless rule checked alone against one message.
+
+        Shared steps of the compiled plan (the literal matcher and regex
+        prefilter) are not attributed to any rule, so these timings show the
+        intrinsic cost of each rule, e.g. a regex that backtracks.
+        """
+        samples = []
+        lowered = payload.lower()
+        clock = time.perf_counter
+        for position, rule in enumerate(self.rules):
+            rule_type = rule.get("type")
+            if rule_type == "context_block":
+                started = clock()
+                try:
+                    context in rule["match"]
+                except TypeError:
+                    pass
+                samples.append((position, clock() - started, len(str(context))))
+            elif rule_type == "payload_contains":
+                phrases = rule["match"]
+                started = clock()
+                for phrase in phrases:
+                    phrase.lower() in lowered
+                samples.append((position, clock() - started, len(payload) * len(phrases)))
+            elif rule_type == "payload_regex":
+                compiled = self.compiled_regexes[position]
+                started = clock()
+                compiled.search(payload)
+                samples.append((position, clock() - started, len(payload)))
+        return samples
+
+    def match_stateless(self, context, payload):
+        """Return the ``(rule position, phrase order, alert)`` hits of every
+        rule except ``sequential_events``.
 
-        if rule_type == "context_block":
-            if context in rule["match"]:
-                alerts.append({
-                    "rule_id": rule_id,
-                    "message": f"Context \'{context}\' is blocked by policy.",
-                    "risk": risk
-                })
-                total_risk += risk
-
-        elif rule_type == "payload_contains":
-            for phrase in rule["match"]:
-                if phrase.lower() in payload.lower():
-                    alerts.append({
-                        "rule_id": rule_id,
+        Only reads the plan, so it is safe to run in worker threads or, on
+        a copy of the plan, in worker processes.
+        """
+        hits = []
+
+        positions = [p for p in self.context_fallback if context in self.rules[p]["match"]]
+        if _is_hashable(context):
+            positions.extend(self.context_index.get(context, ()))
+        for position in positions:
+            rule = self.rules[position]
+            hits.append((position, 0, {
+                "rule_id": rule.get("id", "unknown"),
+                "message": f"Context \'{context}\' is blocked by policy.",
+                "risk": rule.get("risk", 0)
+            }))
+
+        regex_candidates = list(self.regex_unmerged)
+        if self.regex_prefilter is not None and self.regex_prefilter.search(payload):
+            regex_candidates.extend(self.regex_merged)
+
+        if self.literals:
+            for literal in self._matched_literals(payload):
+                for position, order, phrase in self.phrase_owners[literal]:
+                    rule = self.rules[position]
+                    hits.append((position, order, {
+                        "rule_id": rule.get("id", "unknown"),
                         "message": f"Payload matched forbidden phrase: \'{phrase}\'",
-                        "risk": risk
-                    })
-                    total_risk += risk
-
-        elif rule_type == "payload_regex":
-            pattern = rule["pattern"]
-            if re.search(pattern, payload):
-                alerts.append({
-                    "rule_id": rule_id,
+                        "risk": rule.get("risk", 0)
+                    }))
+                regex_candidates.extend(self.regex_owners[literal])
+
+        for position, pattern, compiled in regex_candidates:
+            if compiled.search(payload):
+                rule = self.rules[position]
+                hits.append((position, 0, {
+                    "rule_id": rule.get("id", "unknown"),
                     "message": f"Payload matched regex pattern: \'{pattern}\'",
-                    "risk": risk
-                })
-                total_risk += risk
-
-        elif rule_type == "sequential_events":
-            if check_sequence(message, rule):
-                alerts.append({
-                    "rule_id": rule_id,
-                    "message": rule.get("message", f"Sequential event detected for rule {rule_id}."),
-                    "risk": risk
-                })
-                total_risk += risk
+                    "risk": rule.get("risk", 0)
+                }))
+        return hits
+
+    def match_sequences(self, message, sample=False):
+        """Record ``message`` in the shared sequence windows and return the
+        hits of the ``sequential_events`` rules that fire.
 
+        Mutates SEQUENCE_WINDOWS, so it must run in this process, once per
+        message and in arrival order. When ``sample`` is true each rule is
+        observed and timed separately.
+        """
+        hits = []
+        if not self.sequence_rules:
+            return hits
+        if sample:
+            fired = []
+            samples = []
+            nbytes = len(str(message.get("context") or "")) + len(str(message.get("payload") or ""))
+            for index, (position, rule) in enumerate(self.sequence_rules):
+                started = time.perf_counter()
+                if SEQUENCE_WINDOWS.observe(message, [rule]):
+                    fired.append(index)
+                samples.append((position, time.perf_counter() - started, nbytes))
+            self.profile.record_samples(samples)
         else:
-            logger.warning(f"Unknown rule type encountered: {rule_type} for rule {rule_id}")
+            fired = SEQUENCE_WINDOWS.observe(message, [rule for _, rule in self.sequence_rules])
+        for index in fired:
+            position, rule = self.sequence_rules[index]
+            rule_id = rule.get("id", "unknown")
+            hits.append((position, 0, {
+                "rule_id": rule_id,
+                "message": rule.get("message", f"Sequential event detected for rule {rule_id}."),
+                "risk": rule.get("risk", 0)
+            }))
+        return hits
+
+
+def merge_hits(hits):
+    """Order hits as a linear walk of the rules would and total their risk."""
+    hits.sort(key=lambda hit: (hit[0], hit[1]))
+    alerts = [alert for _, _, alert in hits]
+    return alerts, sum(alert["risk"] for alert in alerts)
+
+
+def _is_hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+compiled_rules = CompiledRules([])
+
+# Sliding-window state for sequential_events rules, keyed by rule and
+# sender. It lives outside the compiled plan so it survives rule reloads.
+SEQUENCE_WINDOWS = SequenceWindows()
+
+# Serializes reloads triggered concurrently by the watcher and the admin API
+_reload_lock = threading.Lock()
+
+
+class RuleValidationError(ValueError):
+    """Raised when a rule file cannot be used as the active rule set."""
+
+
+def validate_rules(rule_list):
+    """Check that every rule is well formed before it is compiled."""
+    if not isinstance(rule_list, list):
+        raise RuleValidationError("'rules' must be a list")
+    seen = set()
+    for index, rule in enumerate(rule_list):
+        if not isinstance(rule, dict):
+            raise RuleValidationError(f"Rule #{index} is not a mapping")
+        rule_id = rule.get("id")
+        if not rule_id:
+            raise RuleValidationError(f"Rule #{index} has no id")
+        if rule_id in seen:
+            raise RuleValidationError(f"Duplicate rule id: {rule_id}")
+        seen.add(rule_id)
+        rule_type = rule.get("type")
+        if not isinstance(rule.get("risk", 0), int):
+            raise RuleValidationError(f"Rule {rule_id}: risk must be an integer")
+        if rule_type == "context_block" and not isinstance(rule.get("match"), (list, str)):
+            raise RuleValidationError(f"Rule {rule_id}: match must be a list")
+        if rule_type == "payload_contains":
+            match = rule.get("match")
+            if not isinstance(match, list) or not all(isinstance(p, str) for p in match):
+                raise RuleValidationError(f"Rule {rule_id}: match must be a list of strings")
+        if rule_type == "payload_regex":
+            try:
+                re.compile(rule.get("pattern"))
+            except (re.error, TypeError) as e:
+                raise RuleValidationError(f"Rule {rule_id}: invalid pattern: {e}")
+        if rule_type == "sequential_events" and not isinstance(rule.get("sequence"), list):
+            raise RuleValidationError(f"Rule {rule_id}: sequence must be a list")
+
+
+def parse_rules(path=None):
+    """Read, validate, sort and compile a rule file without activating it."""
+    with open(path or RULE_FILE, "r") as f:
+        try:
+            config = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise RuleValidationError(f"Invalid YAML: {e}") from e
+    if not isinstance(config, dict):
+        raise RuleValidationError("The rule file must be a mapping with a 'rules' list")
+    loaded_rules = config.get("rules", [])
+    validate_rules(loaded_rules)
+    # Sort rules by priority in descending order (highest priority first)
+    return CompiledRules(sorted(loaded_rules, key=lambda x: x.get("priority", 0), reverse=True))
+
+
+def activate_rules(plan):
+    """Atomically make ``plan`` the rule set used by check_all_rules."""
+    global rules, compiled_rules
+    # A single reference assignment: callers see either the old or new plan
+    compiled_rules = plan
+    rules = plan.rules
+
+
+def reload_rules(path=None):
+    """Re-parse and precompile the rule file, then swap it in.
+
+    On any error the active rule set is left untouched and the error is
+    raised. Returns the number of rules and the reload duration in seconds.
+    """
+    with _reload_lock:
+        started = time.perf_counter()
+        plan = parse_rules(path)
+        activate_rules(plan)
+        duration = time.perf_counter() - started
+    logger.info(f"🔄 Reloaded {len(plan.rules)} rules from {path or RULE_FILE} in {duration * 1000:.1f} ms")
+    return {"rule_count": len(plan.rules), "duration_seconds": duration}
+
+
+def load_rules():
+    """Loads rules from the YAML file, sorts them by priority and compiles them."""
+    try:
+        plan = parse_rules()
+        logger.info(f"✅ Successfully loaded and sorted {len(plan.rules)} rules from {RULE_FILE}")
+    except FileNotFoundError:
+        logger.error(f"❌ Rule file not found: {RULE_FILE}")
+        plan = CompiledRules([])
+    except RuleValidationError as e:
+        logger.error(f"❌ Invalid rule file {RULE_FILE}: {e}")
+        plan = CompiledRules([])
+    except Exception as e:
+        logger.error(f"❌ An unexpected error occurred while loading rules: {e}")
+        plan = CompiledRules([])
+    activate_rules(plan)
+
+# Load rules initially when the module is imported
+load_rules()
+
+def message_fields(message):
+    """The ``(context, payload)`` pair the stateless rules look at."""
+    return message.get("context", ""), message.get("payload", "")
+
+
+def total_risk(message, rule_risk):
+    """Add the rule risk to the message's own risk, capped at 100."""
+    return min(message.get("risk", 0) + rule_risk, 100)
+
+
+def check_all_rules(message):
+    context, payload = message_fields(message)
+
+    # Read the active plan once; a concurrent reload swaps the global but
+    # never mutates a plan that is in use
+    plan = compiled_rules
+    alerts, rule_risk = plan.evaluate(message, context, payload)
 
-    return alerts, min(total_risk, 100)
\ No newline at end of file
+    return alerts, total_risk(message, rule_risk)
@@ -0,0 +1,167 @@
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+# Number of buckets each step's time window is divided into. Counts are
+# exact per bucket, so the window edge is accurate to window / BUCKETS.
+BUCKETS_PER_WINDOW = 60
+
+# Upper bound on tracked (rule, step, sender) keys; least recently updated
+# keys are evicted first
+MAX_SEQUENCE_KEYS = 100_000
+
+# Idle keys (empty windows) are swept after this many observed events
+SWEEP_EVERY = 10_000
+
+# Keywords looked for in context/payload for well-known step definitions
+EVENT_KEYWORDS = {"login_attempt": "login"}
+STATUS_KEYWORDS = {"failed": "fail", "success": "success"}
+
+
+def event_time(message):
+    """Return the event timestamp in epoch seconds, or now if it is missing."""
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        try:
+            parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc).timestamp()
+
+
+def step_matches(step, context, payload):
+    """Whether a lowercased event satisfies one step of a sequence."""
+    event_type = step.get("event_type")
+    if not event_type:
+        return False
+    keyword = EVENT_KEYWORDS.get(event_type, event_type)
+    if keyword not in context and keyword not in payload:
+        return False
+    status = step.get("status")
+    if status is None:
+        return True
+    return STATUS_KEYWORDS.get(status, status) in payload
+
+
+class _WindowCounter:
+    """Event count over a sliding window, kept as fixed-width time buckets."""
+
+    __slots__ = ("width", "window", "buckets", "total")
+
+    def __init__(self, window):
+        self.window = window
+        self.width = max(window / BUCKETS_PER_WINDOW, 1e-3)
+        self.buckets = deque()  # [bucket index, count], oldest first
+        self.total = 0
+
+    def _expire(self, now):
+        oldest = int((now - self.window) // self.width)
+        buckets = self.buckets
+        while buckets and buckets[0][0] < oldest:
+            self.total -= buckets.popleft()[1]
+
+    def add(self, now):
+        index = int(now // self.width)
+        buckets = self.buckets
+        if buckets and buckets[-1][0] >= index:
+            # Same bucket, or a late event folded into the newest bucket
+            buckets[-1][1] += 1
+        else:
+            buckets.append([index, 1])
+        self.total += 1
+        self._expire(now)
+
+    def count(self, now):
+        self._expire(now)
+        return self.total
+
+
+class SequenceWindows:
+    """Per-(rule, sender) sliding-window state for ``sequential_events`` rules.
+
+    Steps are matched in order: an event counts towards a step only if every
+    earlier step was already satisfied before it arrived, so failures
+    followed by a success match a failed-then-success rule but the reverse
+    does not. A rule fires for a sender on the event that leaves every step
+    with at least ``count`` matching events within its
+    ``time_window_seconds``; the sender's progress on that rule then starts
+    over, so later events do not fire it again until the whole sequence
+    repeats. Checks cost O(steps), and memory is bounded by the number of
+    active keys.
+    """
+
+    def __init__(self, max_keys=MAX_SEQUENCE_KEYS):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+        self._since_sweep = 0
+
+    def __len__(self):
+        return len(self._counters)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+    def _sweep(self, now):
+        idle = [key for key, counter in self._counters.items() if counter.count(now) == 0]
+        for key in idle:
+            del self._counters[key]
+
+    def _counter(self, key, window):
+        counter = self._counters.get(key)
+        if counter is None or counter.window != window:
+            counter = _WindowCounter(window)
+            self._counters[key] = counter
+            if len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(key)
+        return counter
+
+    def observe(self, message, sequence_rules):
+        """Record ``message`` and return the indexes of the rules that now fire."""
+        if not sequence_rules:
+            return []
+        sender = message.get("sender", "unknown")
+        context = str(message.get("context") or "").lower()
+        payload = str(message.get("payload") or "").lower()
+        now = event_time(message)
+
+        fired = []
+        with self._lock:
+            self._since_sweep += 1
+            if self._since_sweep >= SWEEP_EVERY:
+                self._since_sweep = 0
+                self._sweep(now)
+            for rule_index, rule in enumerate(sequence_rules):
+                steps = rule.get("sequence") or []
+                rule_id = rule.get("id", "unknown")
+                satisfied = bool(steps)
+                # Whether every earlier step was satisfied before this event
+                ready = True
+                for index, step in enumerate(steps):
+                    key = (rule_id, index, sender)
+                    counter = self._counters.get(key)
+                    before = counter.count(now) if counter is not None else 0
+                    total = before
+                    if ready and step_matches(step, context, payload):
+                        counter = self._counter(key, float(step.get("time_window_seconds", 0)))
+                        counter.add(now)
+                        total = counter.total
+                    elif counter is not None and total == 0:
+                        del self._counters[key]
+                    needed = step.get("count", 1)
+                    ready = ready and before >= needed
+                    if total < needed:
+                        satisfied = False
+                if satisfied:
+                    fired.append(rule_index)
+                    for index in range(len(steps)):
+                        self._counters.pop((rule_id, index, sender), None)
+        return fired
@@ -0,0 +1,71 @@
+import os
+import asyncio
+import logging
+from typing import Optional
+
+from . import rule_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of rules.yaml; 0 disables the watcher
+RULES_WATCH_INTERVAL = float(os.getenv("SENTINELMESH_RULES_WATCH_INTERVAL", "5"))
+
+
+def _file_signature(path):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def reload_rules_in_background(path=None):
+    """Parse and compile the rule file in a worker thread, then swap it in."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, rule_engine.reload_rules, path)
+
+
+class RuleFileWatcher:
+    """Polls the rule file's mtime and hot-reloads it when it changes.
+
+    A reload that fails validation is logged and the previous rule set stays
+    active; the watcher retries on the next change.
+    """
+
+    def __init__(self, path=None, interval: float = RULES_WATCH_INTERVAL):
+        self.path = path or rule_engine.RULE_FILE
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Watching {self.path} for rule changes every {self.interval}s")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        signature = _file_signature(self.path)
+        while True:
+            await asyncio.sleep(self.interval)
+            current = _file_signature(self.path)
+            if current is None or current == signature:
+                continue
+            signature = current
+            try:
+                await reload_rules_in_background(self.path)
+                self.reloads += 1
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"❌ Rule reload from {self.path} failed, keeping previous rules: {e}")
@@ -1,34 +1,158 @@
+import os
+import json
+import time
+import base64
+import asyncio
+import bisect
+import heapq
+import functools
+from datetime import date, datetime, timedelta, timezone
+from contextlib import asynccontextmanager
 from pathlib import Path
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 import aiosqlite
 
+import cold_storage
+import metrics
+import auth_cache
+from logging_config import LOG_PAYLOADS, payload_logger
+
 DB_PATH = "logs/sentinelmesh.db"
 Path("logs").mkdir(parents=True, exist_ok=True)
 
+# Number of long-lived read connections opened by init_db
+READ_POOL_SIZE = int(os.getenv("SENTINELMESH_DB_READ_POOL_SIZE", "4"))
+
+# Pragmas applied to every pooled connection. WAL lets readers proceed while
+# the writer commits; synchronous=NORMAL is durable across application
+# crashes under WAL and only fsyncs at checkpoints.
+CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA foreign_keys = ON",
+    # INSERT OR REPLACE must fire delete triggers so search indexes drop
+    # the replaced row
+    "PRAGMA recursive_triggers = ON",
+)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Connection pool state, populated by init_db and torn down by close_db
+_writer: Optional[aiosqlite.Connection] = None
+_write_lock: Optional[asyncio.Lock] = None
+_readers: Optional[asyncio.Queue] = None
+_reader_connections: List[aiosqlite.Connection] = []
+
+
+async def _open_connection(read_only: bool = False) -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH)
+    for pragma in CONNECTION_PRAGMAS:
+        await db.execute(pragma)
+    if read_only:
+        await db.execute("PRAGMA query_only = ON")
+    return db
+
+
+@asynccontextmanager
+async def write_connection():
+    """Yield the single writer connection, serializing transactions on it.
+
+    Callers are responsible for committing. Falls back to a short-lived
+    connection when the pool has not been opened (e.g. in scripts).
+    """
+    if _writer is None:
+        db = await _open_connection()
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+    async with _write_lock:
+        try:
+            yield _writer
+        except BaseException:
+            await _writer.rollback()
+            raise
+
+
+@asynccontextmanager
+async def read_connection():
+    """Borrow a connection from the read pool for the duration of a query."""
+    if _readers is None:
+        db = await _open_connection()
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+    db = await _readers.get()
+    try:
+        yield db
+    finally:
+        _readers.put_nowait(db)
+
+
+async def close_db():
+    """Close the writer and all pooled read connections."""
+    global _writer, _write_lock, _readers
+    for db in _reader_connections:
+        await db.close()
+    _reader_connections.clear()
+    _readers = None
+    if _writer is not None:
+        await _writer.close()
+    _writer = None
+    _write_lock = None
+
 
 async def init_db():
-    async with aiosqlite.connect(DB_PATH) as db:
+    """Create the schema and open the long-lived connection pool."""
+    global _writer, _write_lock, _readers
+    await close_db()
+
+    _writer = await _open_connection()
+    _write_lock = asyncio.Lock()
+    # Only takes effect on a new database: lets retention hand the pages of
+    # dropped partitions back to the filesystem
+    await _writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    # journal_mode is persistent, so setting it once on the writer is enough
+    await _writer.execute("PRAGMA journal_mode = WAL")
+
+    async with write_connection() as db:
+        # Catalog of log partitions, one table per day or week of timestamps.
+        # Bounds are ISO dates: start inclusive, end exclusive.
         await db.execute(
             """
-            CREATE TABLE IF NOT EXISTS logs (
-                id TEXT PRIMARY KEY,
-                sender TEXT,
-                receiver TEXT,
-                context TEXT,
-                payload TEXT,
-                timestamp TEXT,
-                received_at TEXT,  -- Added
-                org TEXT,          -- Added
-                risk INTEGER
+            CREATE TABLE IF NOT EXISTS log_partitions (
+                name TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL
             )
         """
         )
-        
+
+        # Catalog of partitions moved to Parquet segments by compaction, with
+        # the statistics used to skip segments that cannot match a query
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS log_segments (
+                path TEXT PRIMARY KEY,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                min_timestamp TEXT,
+                max_timestamp TEXT,
+                min_risk INTEGER,
+                max_risk INTEGER
+            )
+        """
+        )
+
         # Create users table with role support
         await db.execute(
             """
@@ -41,6 +165,32 @@ async def init_db():
         """
         )
         
+        # Per-org, per-sender aggregates maintained on every insert so that
+        # /stats never has to scan the logs table
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agent_stats (
+                org TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                alert_count INTEGER NOT NULL DEFAULT 0,
+                risk_sum INTEGER NOT NULL DEFAULT 0,
+                low_count INTEGER NOT NULL DEFAULT 0,
+                medium_count INTEGER NOT NULL DEFAULT 0,
+                high_count INTEGER NOT NULL DEFAULT 0,
+                last_seen TEXT,
+                PRIMARY KEY (org, sender)
+            )
+        """
+        )
+        cursor = await db.execute("SELECT EXISTS (SELECT 1 FROM agent_stats)")
+        needs_backfill = not (await cursor.fetchone())[0]
+
+        await _load_catalog(db)
+        await _migrate_unpartitioned_logs(db)
+        if needs_backfill:
+            await _backfill_agent_stats(db)
+
         # Add role column to existing users table if it doesn't exist
         try:
             await db.execute("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'user'")
@@ -50,75 +200,965 @@ async def init_db():
         
         await db.commit()
 
+    _readers = asyncio.Queue()
+    for _ in range(READ_POOL_SIZE):
+        db = await _open_connection(read_only=True)
+        _reader_connections.append(db)
+        _readers.put_nowait(db)
+    logger.info(f"Opened SQLite pool: 1 writer, {READ_POOL_SIZE} readers ({DB_PATH})")
+
+
+LOG_COLUMNS = "id, sender, receiver, context, payload, timestamp, received_at, org, risk"
+LOG_FIELDS = [column.strip() for column in LOG_COLUMNS.split(",")]
+
+# Exact-match filters accepted by the log queries, each backed by an index
+FILTER_FIELDS = ("sender", "receiver", "context")
+
+# Width of a log partition: "day" or "week" (weeks start on Monday)
+PARTITION_INTERVAL = os.getenv("SENTINELMESH_PARTITION_INTERVAL", "day").lower()
+
+# Sorted (start, end, table) bounds of every partition. Only replaced, never
+# mutated, and only after the change is committed, so readers can use it
+# without locking.
+_partitions: List[Tuple[str, str, str]] = []
+
+# Sorted (start, end, path, min_timestamp, max_timestamp, min_risk, max_risk)
+# of every cold segment, published the same way as _partitions
+_segments: List[Tuple] = []
+
+
+def _insert_log_sql(table: str) -> str:
+    return f'INSERT OR REPLACE INTO "{table}" ({LOG_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+
+def _partition_day(data) -> date:
+    """Day a log belongs to: the date prefix of its timestamp.
+
+    Partitioning on the string prefix keeps partition bounds consistent with
+    the lexicographic timestamp comparisons used by queries. Logs without a
+    usable timestamp fall back to their reception date.
+    """
+    for value in (data.get("timestamp"), data.get("received_at")):
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            continue
+    return datetime.now(timezone.utc).date()
+
+
+def _find_partition(partitions, day: str) -> Optional[Tuple[str, str, str]]:
+    index = bisect.bisect_right(partitions, (day, "\uffff")) - 1
+    if index >= 0 and partitions[index][1] > day:
+        return partitions[index]
+    return None
+
+
+def _new_partition(partitions, day: date) -> Tuple[str, str, str]:
+    """Bounds for a new partition holding ``day``, clipped to its neighbours."""
+    start = day
+    if PARTITION_INTERVAL == "week":
+        start = day - timedelta(days=day.weekday())
+    end = start + timedelta(days=7 if PARTITION_INTERVAL == "week" else 1)
+    start, end = start.isoformat(), end.isoformat()
+    index = bisect.bisect_right(partitions, (day.isoformat(), "\uffff"))
+    if index > 0:
+        start = max(start, partitions[index - 1][1])
+    if index < len(partitions):
+        end = min(end, partitions[index][0])
+    return start, end, f"logs_{start.replace('-', '')}"
+
+
+async def _create_partition(db, bounds: Tuple[str, str, str]):
+    start, end, table = bounds
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS "{table}" (
+            id TEXT PRIMARY KEY,
+            sender TEXT,
+            receiver TEXT,
+            context TEXT,
+            payload TEXT,
+            timestamp TEXT,
+            received_at TEXT,
+            org TEXT,
+            risk INTEGER
+        )
+    """
+    )
+    # Indexes backing /logs and /alerts, newest first. The trailing id
+    # column gives keyset pagination a stable tie-breaker.
+    await db.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_risk_timestamp" ON "{table}" (risk, timestamp, id)'
+    )
+    await db.execute(
+        f'CREATE INDEX IF NOT EXISTS "idx_{table}_org_timestamp" ON "{table}" (org, timestamp, id)'
+    )
+    await _create_filter_indexes(db, table)
+    await _create_search_index(db, table)
+    await db.execute(
+        "INSERT OR IGNORE INTO log_partitions (name, start, end) VALUES (?, ?, ?)",
+        (table, start, end),
+    )
+
+
+async def _create_filter_indexes(db, table: str):
+    """Create the indexes backing the sender, receiver and context filters.
+
+    Every view is scoped to one org, so org leads; timestamp and id follow
+    so a filtered page is read newest first straight from the index.
+    """
+    for field in FILTER_FIELDS:
+        await db.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table}_org_{field}_timestamp" '
+            f'ON "{table}" (org, {field}, timestamp, id)'
+        )
+
+
+async def _create_search_index(db, table: str):
+    """Create the FTS5 index over a partition's payload and context.
+
+    The index is an external-content table kept in sync by triggers, so it
+    stores only the tokens, not a second copy of the text.
+    """
+    fts = f"{table}_fts"
+    await db.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}"
+        USING fts5(payload, context, content="{table}", content_rowid="rowid")
+    """
+    )
+    await db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS "{fts}_insert" AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO "{fts}" (rowid, payload, context)
+            VALUES (new.rowid, new.payload, new.context);
+        END
+    """
+    )
+    await db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS "{fts}_delete" AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO "{fts}" ("{fts}", rowid, payload, context)
+            VALUES ('delete', old.rowid, old.payload, old.context);
+        END
+    """
+    )
+
+
+async def _drop_partition(db, table: str):
+    await db.execute(f'DROP TABLE IF EXISTS "{table}_fts"')
+    await db.execute(f'DROP TABLE IF EXISTS "{table}"')
+    await db.execute("DELETE FROM log_partitions WHERE name = ?", (table,))
+
+
+async def _load_catalog(db):
+    global _partitions, _segments
+    cursor = await db.execute("SELECT start, end, name FROM log_partitions ORDER BY start")
+    _partitions = [tuple(row) for row in await cursor.fetchall()]
+
+    # Partitions created before full-text search or the filter indexes get
+    # them built now
+    cursor = await db.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'")
+    indexed = {row[0] for row in await cursor.fetchall()}
+    for _, _, table in _partitions:
+        await _create_filter_indexes(db, table)
+        if f"{table}_fts" not in indexed:
+            await _create_search_index(db, table)
+            await db.execute(f"""INSERT INTO "{table}_fts" ("{table}_fts") VALUES ('rebuild')""")
+
+    cursor = await db.execute(
+        "SELECT start, end, path, min_timestamp, max_timestamp, min_risk, max_risk "
+        "FROM log_segments ORDER BY start, end, path"
+    )
+    _segments = [tuple(row) for row in await cursor.fetchall()]
+
+
+async def _write_partitioned(db, entries) -> List[Tuple[str, str, str]]:
+    """Insert entries into their partitions, creating missing ones.
+
+    Returns the updated partition list; the caller publishes it once the
+    transaction has committed.
+    """
+    partitions = _partitions
+    groups: Dict[str, List[Tuple]] = {}
+    for data in entries:
+        day = _partition_day(data)
+        bounds = _find_partition(partitions, day.isoformat())
+        if bounds is None:
+            bounds = _new_partition(partitions, day)
+            await _create_partition(db, bounds)
+            partitions = sorted(partitions + [bounds])
+        groups.setdefault(bounds[2], []).append(_log_row(data["id"], data))
+    for table, rows in groups.items():
+        await db.executemany(_insert_log_sql(table), rows)
+    return partitions
+
+
+def _overlaps(start, end, since=None, until=None, before=None) -> bool:
+    """Whether [start, end) intersects the requested timestamp range.
+
+    ``since`` is inclusive and ``until`` exclusive; ``before`` is an
+    inclusive upper bound used by keyset pagination.
+    """
+    return (
+        (since is None or end > since)
+        and (until is None or start < until)
+        and (before is None or start <= before)
+    )
+
+
+def partitions_for(since: Optional[str] = None, until: Optional[str] = None, before: Optional[str] = None) -> List[str]:
+    """Tables of the partitions that may hold logs in a timestamp range,
+    oldest first."""
+    return [
+        table for start, end, table in _partitions if _overlaps(start, end, since, until, before)
+    ]
+
+
+def _log_sources(min_risk=0, since=None, until=None, before=None) -> List[List[Tuple[str, str, str, str]]]:
+    """Partitions and cold segments that may hold matching logs.
+
+    Each source is ``(kind, start, end, table_or_path)``. Segments are also
+    pruned with their min/max statistics. Sources are grouped so that ones
+    with overlapping bounds (a late partition next to the segment of the
+    same day) are read together; groups are returned oldest first.
+    """
+    sources = [
+        ("table", start, end, table)
+        for start, end, table in _partitions
+        if _overlaps(start, end, since, until, before)
+    ]
+    for start, end, path, min_ts, max_ts, min_r, max_r in _segments:
+        if not _overlaps(start, end, since, until, before):
+            continue
+        if max_r is not None and max_r < min_risk:
+            continue
+        if max_ts is not None and since is not None and max_ts < since:
+            continue
+        if min_ts is not None and until is not None and min_ts >= until:
+            continue
+        if min_ts is not None and before is not None and min_ts > before:
+            continue
+        sources.append(("segment", start, end, path))
+    sources.sort(key=lambda source: (source[1], source[2]))
+
+    groups: List[List[Tuple[str, str, str, str]]] = []
+    group_end = ""
+    for source in sources:
+        if groups and source[1] < group_end:
+            groups[-1].append(source)
+            group_end = max(group_end, source[2])
+        else:
+            groups.append([source])
+            group_end = source[2]
+    return groups
+
+
+async def _migrate_unpartitioned_logs(db):
+    """Move rows from the pre-partitioning ``logs`` table into partitions."""
+    cursor = await db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs'"
+    )
+    if await cursor.fetchone() is None:
+        return
+    global _partitions
+    cursor = await db.execute(f"SELECT {LOG_COLUMNS} FROM logs")
+    columns = [column[0] for column in cursor.description]
+    moved = 0
+    while True:
+        rows = await cursor.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            break
+        _partitions = await _write_partitioned(db, [dict(zip(columns, row)) for row in rows])
+        moved += len(rows)
+    await db.execute("DROP TABLE logs")
+    logger.info(f"Moved {moved} logs into {len(_partitions)} partitions")
+
+
+def _log_row(log_id, data):
+    """Build the parameter tuple for a single row of the logs table."""
+    return (
+        log_id,
+        data.get("sender"),
+        data.get("receiver"),
+        data.get("context"),
+        data.get("payload"),
+        data.get("timestamp"),
+        data.get("received_at"),  # Added
+        data.get("org"),          # Added
+        int(data.get("risk", 0)),
+    )
+
+
+# Risk thresholds for the /stats risk distribution. High-risk logs are the
+# ones /alerts returns by default.
+ALERT_RISK_THRESHOLD = 80
+MEDIUM_RISK_THRESHOLD = 50
+
+UPSERT_AGENT_STATS_SQL = """
+    INSERT INTO agent_stats (org, sender, message_count, alert_count, risk_sum,
+                             low_count, medium_count, high_count, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (org, sender) DO UPDATE SET
+        message_count = message_count + excluded.message_count,
+        alert_count = alert_count + excluded.alert_count,
+        risk_sum = risk_sum + excluded.risk_sum,
+        low_count = low_count + excluded.low_count,
+        medium_count = medium_count + excluded.medium_count,
+        high_count = high_count + excluded.high_count,
+        last_seen = MAX(COALESCE(last_seen, ''), COALESCE(excluded.last_seen, ''))
+"""
+
+
+def _agent_stats_rows(entries):
+    """Pre-aggregate a group of log entries into agent_stats upsert rows."""
+    totals: Dict[Tuple[str, str], List[Any]] = {}
+    for data in entries:
+        key = (data.get("org") or "", data.get("sender") or "unknown")
+        risk = int(data.get("risk", 0))
+        row = totals.setdefault(key, [0, 0, 0, 0, 0, 0, ""])
+        row[0] += 1
+        row[2] += risk
+        if risk >= ALERT_RISK_THRESHOLD:
+            row[1] += 1
+            row[5] += 1
+        elif risk >= MEDIUM_RISK_THRESHOLD:
+            row[4] += 1
+        else:
+            row[3] += 1
+        row[6] = max(row[6], data.get("timestamp") or "")
+    return [(*key, *row) for key, row in totals.items()]
+
+
+def _partition_stats_sql(table: str) -> str:
+    """Per-(org, sender) aggregates of one partition, in agent_stats order."""
+    return f"""
+        SELECT
+            COALESCE(org, '') AS org,
+            COALESCE(sender, 'unknown') AS sender,
+            COUNT(*) AS message_count,
+            SUM(risk >= {ALERT_RISK_THRESHOLD}) AS alert_count,
+            COALESCE(SUM(risk), 0) AS risk_sum,
+            SUM(risk < {MEDIUM_RISK_THRESHOLD}) AS low_count,
+            SUM(risk >= {MEDIUM_RISK_THRESHOLD} AND risk < {ALERT_RISK_THRESHOLD}) AS medium_count,
+            SUM(risk >= {ALERT_RISK_THRESHOLD}) AS high_count,
+            MAX(timestamp) AS last_seen
+        FROM "{table}"
+        GROUP BY 1, 2
+    """
+
+
+async def _backfill_agent_stats(db):
+    """Populate agent_stats from existing logs the first time it is created."""
+    for _, _, table in _partitions:
+        cursor = await db.execute(_partition_stats_sql(table))
+        await db.executemany(UPSERT_AGENT_STATS_SQL, await cursor.fetchall())
+    for segment in _segments:
+        await db.executemany(UPSERT_AGENT_STATS_SQL, await _segment_stats_rows(segment[2]))
+
 
 async def insert_log(log_id, data):
-    print(f"📝 Inserting log with ID {log_id}")
+    await _commit_logs([{**data, "id": log_id}])
+
+
+async def insert_logs(entries: List[Dict[str, Any]]):
+    """Insert a batch of already-scored log entries in a single transaction.
+
+    Each entry must carry its own ``id``. All rows are written with one
+    ``executemany`` per partition and one commit, so the fsync cost is paid
+    once per batch.
+    """
+    if not entries:
+        return
+    await _commit_logs(entries)
+    logger.debug("Committed batch of %d logs", len(entries))
+
+
+async def _commit_logs(entries: List[Dict[str, Any]]):
+    """Write entries and their agent_stats updates in one transaction."""
+    global _partitions
+    async with write_connection() as db:
+        started = time.perf_counter()
+        partitions = await _write_partitioned(db, entries)
+        await db.executemany(UPSERT_AGENT_STATS_SQL, _agent_stats_rows(entries))
+        inserted = time.perf_counter()
+        await db.commit()
+        committed = time.perf_counter()
+        _partitions = partitions
+    metrics.SQLITE_INSERT_SECONDS.observe(inserted - started)
+    metrics.SQLITE_COMMIT_SECONDS.observe(committed - inserted)
+    orgs: Dict[str, int] = {}
+    for data in entries:
+        org = data.get("org") or "unknown"
+        orgs[org] = orgs.get(org, 0) + 1
+    for org, count in orgs.items():
+        metrics.LOGS_INGESTED.labels(org).inc(count)
+    if LOG_PAYLOADS:
+        for data in entries:
+            payload_logger.debug("Inserted log", extra={"log_id": data["id"], "event": data})
+
+
+def encode_cursor(timestamp: str, log_id: str) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    raw = json.dumps([timestamp, log_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if invalid."""
     try:
-        print(f"📦 Data: {data}")
+        timestamp, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
     except Exception as e:
-        print("❌ INSERT ERROR:", e)
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            """
-            INSERT OR REPLACE INTO logs (id, sender, receiver, context, payload, timestamp, received_at, org, risk)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                log_id,
-                data.get("sender"),
-                data.get("receiver"),
-                data.get("context"),
-                data.get("payload"),
-                data.get("timestamp"),
-                data.get("received_at"),  # Added
-                data.get("org"),          # Added
-                int(data.get("risk", 0)),
-            ),
-        )
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return str(timestamp), str(log_id)
+
+
+SUBTRACT_AGENT_STATS_SQL = """
+    UPDATE agent_stats SET
+        message_count = message_count - ?,
+        alert_count = alert_count - ?,
+        risk_sum = risk_sum - ?,
+        low_count = low_count - ?,
+        medium_count = medium_count - ?,
+        high_count = high_count - ?
+    WHERE org = ? AND sender = ?
+"""
+
+
+async def _subtract_agent_stats(db, stats_rows):
+    """Remove aggregates (rows in agent_stats column order) of dropped logs."""
+    await db.executemany(
+        SUBTRACT_AGENT_STATS_SQL, [(*row[2:8], row[0], row[1]) for row in stats_rows]
+    )
+
+
+async def _segment_stats_rows(path: str):
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, cold_storage.read_stats_columns, path)
+    return _agent_stats_rows(entries)
+
+
+async def _incremental_vacuum(db):
+    # executescript runs the pragma to completion; a plain execute only
+    # steps it once, which frees a single page
+    await db.executescript("PRAGMA incremental_vacuum;")
+
+
+async def drop_partitions_before(cutoff: str) -> List[str]:
+    """Drop every partition and cold segment whose logs are all older than
+    ``cutoff`` (ISO date).
+
+    Each partition goes with a single DROP TABLE instead of a row-by-row
+    DELETE, and each segment by deleting its file; their totals are first
+    subtracted from agent_stats so /stats stays consistent with the stored
+    logs. Returns the dropped table names and segment paths.
+    """
+    global _partitions, _segments
+    expired = [bounds for bounds in _partitions if bounds[1] <= cutoff]
+    expired_segments = [segment for segment in _segments if segment[1] <= cutoff]
+    if not expired and not expired_segments:
+        return []
+    async with write_connection() as db:
+        for _, _, table in expired:
+            cursor = await db.execute(_partition_stats_sql(table))
+            await _subtract_agent_stats(db, await cursor.fetchall())
+            await _drop_partition(db, table)
+        for segment in expired_segments:
+            path = segment[2]
+            if os.path.exists(path):
+                await _subtract_agent_stats(db, await _segment_stats_rows(path))
+            await db.execute("DELETE FROM log_segments WHERE path = ?", (path,))
+        await db.execute("DELETE FROM agent_stats WHERE message_count <= 0")
+        await db.commit()
+        _partitions = [bounds for bounds in _partitions if bounds not in expired]
+        _segments = [segment for segment in _segments if segment not in expired_segments]
+        await _incremental_vacuum(db)
+    for segment in expired_segments:
+        try:
+            os.remove(segment[2])
+        except FileNotFoundError:
+            pass
+    dropped = [table for _, _, table in expired] + [segment[2] for segment in expired_segments]
+    logger.info(f"Dropped {len(dropped)} log partitions older than {cutoff}")
+    return dropped
+
+
+# Times a partition is copied without holding the writer before the last
+# attempt holds it for the whole move
+COMPACT_ATTEMPTS = 3
+
+
+def cold_storage_dir() -> str:
+    """Directory for Parquet segments, next to the database by default."""
+    return cold_storage.COLD_STORAGE_DIR or os.path.join(os.path.dirname(DB_PATH) or ".", "cold")
+
+
+def _segment_path(table: str) -> str:
+    used = {segment[2] for segment in _segments}
+    path = os.path.join(cold_storage_dir(), f"{table}.parquet")
+    suffix = 1
+    while path in used or os.path.exists(path):
+        path = os.path.join(cold_storage_dir(), f"{table}_{suffix}.parquet")
+        suffix += 1
+    return path
+
+
+async def _partition_version(db, table: str) -> Tuple[int, Optional[int]]:
+    """Row count and highest rowid of a partition. Inserts (including
+    replacements) always change one of them."""
+    cursor = await db.execute(f'SELECT count(*), max(rowid) FROM "{table}"')
+    return tuple(await cursor.fetchone())
+
+
+async def _copy_partition(db, table: str, path: str) -> Optional[Dict[str, Any]]:
+    """Stream a partition into a Parquet segment at ``path`` in chunks of
+    one row group. Returns the segment stats, or None if it was empty."""
+    loop = asyncio.get_running_loop()
+    cursor = await db.execute(f'SELECT {LOG_COLUMNS} FROM "{table}" ORDER BY timestamp, id')
+    rows = await cursor.fetchmany(cold_storage.SEGMENT_ROW_GROUP_SIZE)
+    if not rows:
+        await cursor.close()
+        return None
+    writer = await loop.run_in_executor(None, cold_storage.SegmentWriter, path)
+    try:
+        while rows:
+            await loop.run_in_executor(None, writer.write, rows)
+            rows = await cursor.fetchmany(cold_storage.SEGMENT_ROW_GROUP_SIZE)
+        await cursor.close()
+        return await loop.run_in_executor(None, writer.close)
+    except BaseException:
+        writer.abort()
+        raise
+
+
+async def _swap_in_segment(db, bounds: Tuple[str, str, str], path: str, stats: Optional[Dict[str, Any]]):
+    """Replace a partition by its segment in the catalog, in one transaction."""
+    global _partitions, _segments
+    start, end, table = bounds
+    segment = None
+    try:
+        if stats is not None:
+            segment = (
+                start, end, path,
+                stats["min_timestamp"], stats["max_timestamp"],
+                stats["min_risk"], stats["max_risk"],
+            )
+            await db.execute(
+                "INSERT INTO log_segments (path, start, end, row_count, min_timestamp, "
+                "max_timestamp, min_risk, max_risk) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, start, end, stats["row_count"], *segment[3:]),
+            )
+        await _drop_partition(db, table)
         await db.commit()
-        print("✅ Log committed to database")
+    except BaseException:
+        if stats is not None:
+            os.remove(path)
+        raise
+    _partitions = [other for other in _partitions if other != bounds]
+    if segment is not None:
+        _segments = sorted(_segments + [segment])
 
 
-async def get_logs(min_risk=0):
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, sender, receiver, context, payload, timestamp, received_at, org, risk FROM logs WHERE risk >= ? ORDER BY timestamp DESC", (min_risk,)
+async def _compact_partition(bounds: Tuple[str, str, str], hold_writer: bool) -> bool:
+    """Move one partition into a segment.
+
+    Normally the partition is copied from a read snapshot on a separate
+    connection, so ingestion continues meanwhile, and the writer is taken
+    only to swap the catalog. If a log landed in the partition during the
+    copy, the segment is discarded and False is returned. With
+    ``hold_writer`` the writer is held for the whole move instead.
+    """
+    table = bounds[2]
+    path = _segment_path(table)
+    if hold_writer:
+        async with write_connection() as db:
+            stats = await _copy_partition(db, table, path)
+            await _swap_in_segment(db, bounds, path, stats)
+        return True
+
+    db = await _open_connection(read_only=True)
+    try:
+        # One read transaction, so the version matches the rows copied
+        await db.execute("BEGIN")
+        version = await _partition_version(db, table)
+        stats = await _copy_partition(db, table, path)
+    finally:
+        await db.close()
+    async with write_connection() as db:
+        if await _partition_version(db, table) != version:
+            if stats is not None:
+                os.remove(path)
+            return False
+        await _swap_in_segment(db, bounds, path, stats)
+    return True
+
+
+async def compact_partitions_before(cutoff: str) -> List[str]:
+    """Move partitions whose logs are all older than ``cutoff`` (ISO date)
+    into compressed Parquet segments.
+
+    Rows are streamed into the segment without holding the writer; it is
+    taken only for the catalog update and DROP TABLE. A partition that
+    keeps receiving late logs is retried, the last time holding the writer
+    for the whole move so no insert can be lost. Returns the compacted
+    table names.
+    """
+    if not cold_storage.available():
+        raise RuntimeError("Cold storage requires pyarrow (pip install pyarrow)")
+    compacted = []
+    for bounds in [bounds for bounds in _partitions if bounds[1] <= cutoff]:
+        for attempt in range(COMPACT_ATTEMPTS):
+            if await _compact_partition(bounds, hold_writer=attempt == COMPACT_ATTEMPTS - 1):
+                break
+            logger.info(f"Partition {bounds[2]} changed during compaction, retrying")
+        compacted.append(bounds[2])
+
+    if compacted:
+        async with write_connection() as db:
+            await _incremental_vacuum(db)
+        logger.info(f"Compacted {len(compacted)} log partitions older than {cutoff}")
+    return compacted
+
+
+def _log_filters(min_risk=0, org=None, since=None, until=None, sender=None, receiver=None, context=None):
+    """WHERE clauses and parameters shared by the log queries."""
+    clauses = ["risk >= ?"]
+    params: List[Any] = [min_risk]
+    for field, value in (("org", org), ("sender", sender), ("receiver", receiver), ("context", context)):
+        if value is not None:
+            clauses.append(f"{field} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    return clauses, params
+
+
+async def _execute_on_partition(db, table, query, params):
+    """Run a query against one partition, or return None if it was dropped
+    or compacted after the partition list was read."""
+    try:
+        return await db.execute(query, params)
+    except aiosqlite.OperationalError:
+        if any(name == table for _, _, name in _partitions):
+            raise
+        return None
+
+
+def _row_key(row):
+    """Sort key of a row tuple in LOG_COLUMNS order: (timestamp, id)."""
+    return (row[5] or "", row[0])
+
+
+async def _read_source(db, source, where, params, filters, descending=True, limit=None):
+    """Read matching rows from one partition or segment, in sort order."""
+    kind, _, _, ref = source
+    if kind == "segment":
+        loop = asyncio.get_running_loop()
+        read = functools.partial(
+            cold_storage.read_segment, ref, descending=descending, limit=limit, **filters
         )
-        rows = await cursor.fetchall()
-        print(f"📥 Queried {len(rows)} logs from DB")
-        
-        # Map rows to dictionary, adding missing fields for LogEntry model
-        logs_data = []
-        for row in rows:
-            log_dict = dict(zip([column[0] for column in cursor.description], row))
-            log_dict["rule_matches"] = [] # Add rule_matches as an empty list
-            logs_data.append(log_dict)
-            
-        return logs_data
-
-
-async def get_agent_stats():
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
+        try:
+            return await loop.run_in_executor(None, read)
+        except FileNotFoundError:  # Removed by retention after it was listed
+            return []
+    order = "DESC" if descending else "ASC"
+    query = f'SELECT {LOG_COLUMNS} FROM "{ref}" WHERE {where} ORDER BY timestamp {order}, id {order}'
+    query_params = list(params)
+    if limit is not None:
+        query += " LIMIT ?"
+        query_params.append(limit)
+    cursor = await _execute_on_partition(db, ref, query, query_params)
+    if cursor is None:
+        return []
+    return await cursor.fetchall()
+
+
+async def _read_group(db, group, where, params, filters, descending=True, limit=None):
+    """Read a group of overlapping sources and merge them into sort order."""
+    results = [
+        await _read_source(db, source, where, params, filters, descending, limit)
+        for source in group
+    ]
+    if len(results) == 1:
+        return results[0]
+    merged = list(heapq.merge(*results, key=_row_key, reverse=descending))
+    return merged if limit is None else merged[:limit]
+
+
+async def get_logs(
+    min_risk=0,
+    org=None,
+    limit=None,
+    after=None,
+    since=None,
+    until=None,
+    sender=None,
+    receiver=None,
+    context=None,
+):
+    """Return logs newest first, optionally filtered and keyset-paginated.
+
+    ``sender``, ``receiver`` and ``context`` match exactly and are served
+    by the per-partition (org, field, timestamp) indexes.
+
+    ``after`` is a cursor from a previous page; only rows that sort strictly
+    after it (older, or same timestamp with a smaller id) are returned.
+    Partitions and cold segments are read newest first and only until
+    ``limit`` rows are found.
+    """
+    filters = {
+        "min_risk": min_risk,
+        "org": org,
+        "since": since,
+        "until": until,
+        "sender": sender,
+        "receiver": receiver,
+        "context": context,
+    }
+    clauses, params = _log_filters(**filters)
+    before = None
+    if after:
+        clauses.append("(timestamp, id) < (?, ?)")
+        cursor_key = decode_cursor(after)
+        params.extend(cursor_key)
+        filters["after"] = cursor_key
+        before = cursor_key[0]
+    where = " AND ".join(clauses)
+
+    rows = []
+    async with read_connection() as db:
+        for group in reversed(_log_sources(min_risk, since, until, before)):
+            remaining = None if limit is None else limit - len(rows)
+            rows.extend(await _read_group(db, group, where, params, filters, limit=remaining))
+            if limit is not None and len(rows) >= limit:
+                break
+    logger.debug("Queried %d logs from DB", len(rows))
+
+    # Map rows to dictionary, adding missing fields for LogEntry model
+    logs_data = []
+    for row in rows:
+        log_dict = dict(zip(LOG_FIELDS, row))
+        log_dict["rule_matches"] = [] # Add rule_matches as an empty list
+        logs_data.append(log_dict)
+    return logs_data
+
+
+async def get_logs_page(min_risk=0, org=None, limit=100, after=None, **filters):
+    """Return one page of logs and the cursor for the next page (or None).
+
+    ``filters`` are passed through to get_logs (since, until, sender,
+    receiver, context).
+    """
+    logs = await get_logs(min_risk=min_risk, org=org, limit=limit + 1, after=after, **filters)
+    if len(logs) <= limit:
+        return logs, None
+    logs = logs[:limit]
+    last = logs[-1]
+    return logs, encode_cursor(last["timestamp"], last["id"])
+
+
+# Rows fetched from SQLite per round trip while streaming an export
+EXPORT_CHUNK_SIZE = int(os.getenv("SENTINELMESH_EXPORT_CHUNK_SIZE", "1000"))
+
+
+async def iter_logs(
+    min_risk=0,
+    org=None,
+    since=None,
+    until=None,
+    chunk_size=EXPORT_CHUNK_SIZE,
+    sender=None,
+    receiver=None,
+    context=None,
+):
+    """Yield logs oldest first as chunks of row tuples in LOG_COLUMNS order.
+
+    Rows are read incrementally, one partition or segment at a time, so
+    memory use does not depend on the size of the result. ``since`` is
+    inclusive and ``until`` exclusive; both are compared against the stored
+    ISO timestamps. A dedicated connection is used so a long export does
+    not hold a pooled reader.
+    """
+    filters = {
+        "min_risk": min_risk,
+        "org": org,
+        "since": since,
+        "until": until,
+        "sender": sender,
+        "receiver": receiver,
+        "context": context,
+    }
+    clauses, params = _log_filters(**filters)
+    where = " AND ".join(clauses)
+    loop = asyncio.get_running_loop()
+
+    db = await _open_connection(read_only=True)
+    try:
+        for group in _log_sources(min_risk, since, until):
+            if len(group) > 1:
+                # Overlapping sources are rare (late logs for a compacted
+                # day) and are merged in memory
+                rows = await _read_group(db, group, where, params, filters, descending=False)
+                for i in range(0, len(rows), chunk_size):
+                    yield rows[i:i + chunk_size]
+                continue
+
+            kind, _, _, ref = group[0]
+            if kind == "segment":
+                try:
+                    chunks = cold_storage.iter_segment(ref, chunk_size, **filters)
+                    while True:
+                        rows = await loop.run_in_executor(None, next, chunks, None)
+                        if rows is None:
+                            break
+                        yield rows
+                except FileNotFoundError:
+                    pass
+                continue
+
+            query = f'SELECT {LOG_COLUMNS} FROM "{ref}" WHERE {where} ORDER BY timestamp, id'
+            cursor = await _execute_on_partition(db, ref, query, params)
+            if cursor is None:
+                continue
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+            await cursor.close()
+    finally:
+        await db.close()
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching logs that contain every term.
+
+    Each term is quoted, so FTS5 operators and punctuation in user input are
+    matched literally instead of being parsed as query syntax.
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+async def search_logs(
+    query: str,
+    org=None,
+    since=None,
+    until=None,
+    limit=100,
+    after=None,
+    sender=None,
+    receiver=None,
+    context=None,
+):
+    """Full-text search over log payload and context, most relevant first.
+
+    Returns one page of hits and the cursor for the next page (or None).
+    Hits are ranked with BM25 and carry ``score`` (higher is more relevant).
+    Every partition overlapping the time range is searched through its FTS5
+    index; logs already compacted into cold storage are not searched.
+    Raises ValueError for an invalid cursor.
+    """
+    match = fts_query(query)
+    if not match:
+        return [], None
+    clauses, params = _log_filters(0, org, since, until, sender, receiver, context)
+    outer, outer_params = "1", []
+    if after:
+        rank, log_id = decode_cursor(after)
+        outer = "(rank > ? OR (rank = ? AND id > ?))"
+        outer_params = [float(rank), float(rank), log_id]
+
+    rows = []
+    async with read_connection() as db:
+        for table in partitions_for(since, until):
+            fts = f"{table}_fts"
+            # Qualified, since context is also a column of the FTS table
+            where = " AND ".join(f'"{table}".{clause}' for clause in clauses)
+            columns = ", ".join(f'"{table}".{field}' for field in LOG_FIELDS)
+            sql = f"""
+                SELECT * FROM (
+                    SELECT {columns}, bm25("{fts}") AS rank
+                    FROM "{fts}" JOIN "{table}" ON "{table}".rowid = "{fts}".rowid
+                    WHERE "{fts}" MATCH ? AND {where}
+                )
+                WHERE {outer}
+                ORDER BY rank, id
+                LIMIT ?
             """
-            SELECT 
-                sender,
-                COUNT(*) as message_count,
-                AVG(risk) as avg_risk
-            FROM logs
-            GROUP BY sender
-            ORDER BY avg_risk DESC
-        """
-        )
+            cursor = await _execute_on_partition(
+                db, table, sql, [match, *params, *outer_params, limit + 1]
+            )
+            if cursor is not None:
+                rows.extend(await cursor.fetchall())
+
+    rows.sort(key=lambda row: (row[-1], row[0]))
+    hits = []
+    for row in rows[:limit]:
+        hit = dict(zip(LOG_FIELDS, row))
+        hit["score"] = round(-row[-1], 6)
+        hits.append(hit)
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[-1], last[0])
+    return hits, next_cursor
+
+
+async def get_agent_stats(org=None, top_n=10):
+    """Summarize agent activity from the agent_stats aggregates.
+
+    Cost is proportional to the number of agents in ``org`` (all orgs when
+    ``org`` is None), not to the number of stored logs.
+    """
+    query = "SELECT sender, message_count, alert_count, risk_sum, low_count, medium_count, high_count FROM agent_stats"
+    params: List[Any] = []
+    if org is not None:
+        query += " WHERE org = ?"
+        params.append(org)
+
+    async with read_connection() as db:
+        cursor = await db.execute(query, params)
         rows = await cursor.fetchall()
-        return [dict(zip([col[0] for col in cursor.description], row)) for row in rows]
+
+    senders: Dict[str, List[int]] = {}
+    for sender, count, alerts, risk_sum, low, medium, high in rows:
+        totals = senders.setdefault(sender, [0, 0, 0, 0, 0, 0])
+        for i, value in enumerate((count, alerts, risk_sum, low, medium, high)):
+            totals[i] += value
+
+    total_logs = sum(t[0] for t in senders.values())
+    risk_sum = sum(t[2] for t in senders.values())
+    top = sorted(senders.items(), key=lambda item: item[1][0], reverse=True)[:top_n]
+    return {
+        "total_logs": total_logs,
+        "total_alerts": sum(t[1] for t in senders.values()),
+        "active_agents": len(senders),
+        "avg_risk_score": round(risk_sum / total_logs, 2) if total_logs else 0.0,
+        "top_senders": [
+            {
+                "sender": sender,
+                "count": t[0],
+                "avg_risk": round(t[2] / t[0], 2) if t[0] else 0.0,
+            }
+            for sender, t in top
+        ],
+        "risk_distribution": {
+            "low": sum(t[3] for t in senders.values()),
+            "medium": sum(t[4] for t in senders.values()),
+            "high": sum(t[5] for t in senders.values()),
+        },
+    }
 
 
 # Basic user management functions (existing)
 async def create_user(username: str, hashed_password: str, org: str):
     """Create a user with default 'user' role."""
     logger.debug(f"Creating user: {username} with hashed_password: {hashed_password}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         await db.execute(
             "INSERT INTO users (username, hashed_password, org, role) VALUES (?, ?, ?, ?)",
             (username, hashed_password, org, 'user')
@@ -130,7 +1170,7 @@ async def create_user(username: str, hashed_password: str, org: str):
 async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
     """Get a user by username."""
     logger.debug(f"Retrieving user: {username}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT username, hashed_password, org, role FROM users WHERE username = ?",
             (username,)
@@ -149,7 +1189,7 @@ async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
 async def create_user_with_role(username: str, hashed_password: str, org: str, role: str = 'user'):
     """Create a user with a specific role."""
     logger.debug(f"Creating user: {username} with role: {role}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         await db.execute(
             "INSERT INTO users (username, hashed_password, org, role) VALUES (?, ?, ?, ?)",
             (username, hashed_password, org, role)
@@ -161,7 +1201,7 @@ async def create_user_with_role(username: str, hashed_password: str, org: str, r
 async def get_all_users() -> List[Dict[str, Any]]:
     """Get all users."""
     logger.debug("Retrieving all users")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT username, hashed_password, org, role FROM users ORDER BY username"
         )
@@ -174,7 +1214,7 @@ async def get_all_users() -> List[Dict[str, Any]]:
 async def get_users_by_org(org: str) -> List[Dict[str, Any]]:
     """Get all users in a specific organization."""
     logger.debug(f"Retrieving users for org: {org}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT username, hashed_password, org, role FROM users WHERE org = ? ORDER BY username",
             (org,)
@@ -219,28 +1259,30 @@ async def update_user(username: str, update_data: Dict[str, Any]):
     
     query = f"UPDATE users SET {', '.join(set_clauses)} WHERE username = ?"
     
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         await db.execute(query, values)
         await db.commit()
         logger.debug(f"User {username} updated successfully")
+    auth_cache.invalidate_user(username, update_data.get("username"))
 
 
 async def delete_user(username: str):
     """Delete a user."""
     logger.debug(f"Deleting user: {username}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with write_connection() as db:
         cursor = await db.execute("DELETE FROM users WHERE username = ?", (username,))
         await db.commit()
         if cursor.rowcount > 0:
             logger.debug(f"User {username} deleted successfully")
         else:
             logger.debug(f"User {username} not found for deletion")
+    auth_cache.invalidate_user(username)
 
 
 async def get_users_by_role(role: str) -> List[Dict[str, Any]]:
     """Get all users with a specific role."""
     logger.debug(f"Retrieving users with role: {role}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute(
             "SELECT username, hashed_password, org, role FROM users WHERE role = ? ORDER BY username",
             (role,)
@@ -253,7 +1295,7 @@ async def get_users_by_role(role: str) -> List[Dict[str, Any]]:
 
 async def count_users_by_org(org: str) -> int:
     """Count users in a specific organization."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM users WHERE org = ?", (org,))
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -261,7 +1303,7 @@ async def count_users_by_org(org: str) -> int:
 
 async def count_users_by_role(role: str) -> int:
     """Count users with a specific role."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM users WHERE role = ?", (role,))
         row = await cursor.fetchone()
         return row[0] if row else 0
@@ -269,7 +1311,7 @@ async def count_users_by_role(role: str) -> int:
 
 async def get_user_stats() -> Dict[str, Any]:
     """Get user statistics."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with read_connection() as db:
         # Total users
         cursor = await db.execute("SELECT COUNT(*) FROM users")
         total_users = (await cursor.fetchone())[0]
@@ -0,0 +1,43 @@
+"""
+Shared fixtures and helpers for the backend tests.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import sqlite
+from main import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Create a test client backed by a temporary database."""
+    monkeypatch.setattr(sqlite, "DB_PATH", str(tmp_path / "test.db"))
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch):
+    """Open the connection pool against a temporary database."""
+    monkeypatch.setattr(sqlite, "DB_PATH", str(tmp_path / "test.db"))
+    await sqlite.init_db()
+    yield
+    await sqlite.close_db()
+
+
+def make_log(log_id, timestamp="2025-08-02T10:30:00+00:00", **overrides):
+    """A stored log row as sqlite.insert_log expects it."""
+    log = {
+        "id": log_id,
+        "sender": "agent-a",
+        "receiver": "agent-b",
+        "context": "general",
+        "payload": "hello",
+        "timestamp": timestamp,
+        "received_at": timestamp,
+        "org": "example-org",
+        "risk": 0,
+    }
+    log.update(overrides)
+    return log
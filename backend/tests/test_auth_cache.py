@@ -0,0 +1,98 @@
+"""
+Tests for the token and user caches used by get_current_user.
+"""
+
+import pytest
+
+import auth_cache
+import metrics
+import sqlite
+from auth_cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+class TestTTLCache:
+    """Tests for expiry, eviction and hit/miss accounting."""
+
+    def test_counts_hits_and_misses(self):
+        cache = TTLCache("test", ttl=60, maxsize=10)
+        hits = metrics.REGISTRY.get("sentinelmesh_auth_cache_requests_total").labels("test", "hit")
+        before = hits.value
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+        assert hits.value == before + 1
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now[0])
+        cache = TTLCache("test", ttl=60, maxsize=10)
+        cache.put("long", 1)
+        cache.put("short", 2, ttl=5)
+        cache.put("extended", 3, ttl=600)
+        now[0] += 10
+        assert cache.get("short") is None
+        assert cache.get("long") == 1
+        now[0] += 60
+        assert cache.get("extended") is None
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache("test", ttl=60, maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_zero_ttl_disables_caching(self):
+        cache = TTLCache("test", ttl=0, maxsize=10)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+
+class TestInvalidation:
+    """Tests for invalidation by the user management functions."""
+
+    @pytest.fixture
+    async def db(self, db):
+        await sqlite.create_user("alice", "hash", "example-org")
+
+    async def test_update_user_invalidates(self, db):
+        auth_cache.user_cache.put("alice", "cached")
+        auth_cache.user_cache.put("bob", "cached")
+        await sqlite.update_user("alice", {"role": "admin"})
+        assert auth_cache.user_cache.get("alice") is None
+        assert auth_cache.user_cache.get("bob") == "cached"
+
+    async def test_rename_invalidates_both_names(self, db):
+        auth_cache.user_cache.put("alice", "cached")
+        auth_cache.user_cache.put("alicia", "stale")
+        await sqlite.update_user("alice", {"username": "alicia"})
+        assert auth_cache.user_cache.get("alice") is None
+        assert auth_cache.user_cache.get("alicia") is None
+
+    async def test_delete_user_invalidates(self, db):
+        auth_cache.user_cache.put("alice", "cached")
+        await sqlite.delete_user("alice")
+        assert auth_cache.user_cache.get("alice") is None
+
+    async def test_record_read_before_update_is_not_cached(self, db):
+        """A user loaded before a concurrent update is not cached after it."""
+        generation = auth_cache.user_generation("alice")
+        stale = await sqlite.get_user_by_username("alice")
+        await sqlite.update_user("alice", {"role": "admin"})
+        auth_cache.cache_user("alice", stale, generation)
+        assert auth_cache.user_cache.get("alice") is None
+
+        generation = auth_cache.user_generation("alice")
+        auth_cache.cache_user("alice", "fresh", generation)
+        assert auth_cache.user_cache.get("alice") == "fresh"
@@ -0,0 +1,105 @@
+"""
+Tests for the WebSocket broadcaster.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from broadcast import Broadcaster
+
+
+class FakeWebSocket:
+    """Records sent frames; ``gate`` blocks sends to simulate a slow client."""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed = None
+        self.fail = fail
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+async def drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBroadcaster:
+    """Tests for Broadcaster."""
+
+    async def test_delivers_to_every_subscriber_in_order(self):
+        """Each client receives every event, in publish order."""
+        broadcaster = Broadcaster(queue_size=10)
+        clients = [FakeWebSocket() for _ in range(3)]
+        for client in clients:
+            broadcaster.subscribe(client)
+
+        for i in range(5):
+            broadcaster.publish({"id": i})
+        await drain()
+
+        for client in clients:
+            assert [m["id"] for m in client.sent] == list(range(5))
+        assert broadcaster.stats()["sent"] == 15
+        await broadcaster.close()
+
+    async def test_slow_client_does_not_block_others(self):
+        """A stalled client only affects its own queue."""
+        broadcaster = Broadcaster(queue_size=2, policy="drop_oldest")
+        slow, fast = FakeWebSocket(), FakeWebSocket()
+        slow.gate.clear()
+        broadcaster.subscribe(slow)
+        broadcaster.subscribe(fast)
+
+        for i in range(6):
+            broadcaster.publish({"id": i})
+            await drain()
+
+        assert [m["id"] for m in fast.sent] == list(range(6))
+        assert broadcaster.dropped > 0
+
+        slow.gate.set()
+        await drain()
+        # The newest events survive, the oldest queued ones were dropped
+        assert slow.sent[-1]["id"] == 5
+        assert len(slow.sent) < 6
+        await broadcaster.close()
+
+    async def test_disconnect_policy_closes_slow_client(self):
+        """With the disconnect policy a full queue closes the socket."""
+        broadcaster = Broadcaster(queue_size=1, policy="disconnect")
+        slow = FakeWebSocket()
+        slow.gate.clear()
+        broadcaster.subscribe(slow)
+
+        for i in range(4):
+            broadcaster.publish({"id": i})
+            await drain()
+
+        assert slow.closed == 1013
+        assert len(broadcaster) == 0
+        assert broadcaster.stats()["disconnected"] == 1
+
+    async def test_failed_send_unsubscribes(self):
+        """A client whose send raises is removed."""
+        broadcaster = Broadcaster(queue_size=10)
+        broadcaster.subscribe(FakeWebSocket(fail=True))
+        broadcaster.publish({"id": 1})
+        await drain()
+        assert len(broadcaster) == 0
+
+    def test_unknown_policy_rejected(self):
+        """Only the documented policies are accepted."""
+        with pytest.raises(ValueError):
+            Broadcaster(policy="block")
@@ -0,0 +1,186 @@
+"""
+Tests for compaction of aged partitions into Parquet segments.
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pyarrow.parquet as pq
+
+import cold_storage
+import sqlite
+from tests.conftest import make_log
+
+
+async def insert_days(days, per_day=3, **overrides):
+    await sqlite.insert_logs(
+        [
+            make_log(f"log-{day}-{i}", f"2025-08-{day:02d}T{10 + i:02d}:00:00+00:00", **overrides)
+            for day in days
+            for i in range(per_day)
+        ]
+    )
+
+
+async def collect(**kwargs):
+    rows = []
+    async for chunk in sqlite.iter_logs(**kwargs):
+        rows.extend(chunk)
+    return rows
+
+
+class TestCompaction:
+    """Tests for compact_partitions_before and reads across tiers."""
+
+    async def test_partitions_move_to_segments(self, db):
+        """Old partitions become Parquet files and leave SQLite."""
+        await insert_days([1, 2, 3])
+
+        compacted = await sqlite.compact_partitions_before("2025-08-03")
+
+        assert compacted == ["logs_20250801", "logs_20250802"]
+        assert sqlite.partitions_for() == ["logs_20250803"]
+        assert len(sqlite._segments) == 2
+        assert all(os.path.exists(segment[2]) for segment in sqlite._segments)
+        start, end, _, min_ts, max_ts, min_risk, max_risk = sqlite._segments[0]
+        assert (start, end) == ("2025-08-01", "2025-08-02")
+        assert (min_ts, max_ts) == ("2025-08-01T10:00:00+00:00", "2025-08-01T12:00:00+00:00")
+        assert (min_risk, max_risk) == (0, 0)
+
+    async def test_queries_span_both_tiers(self, db):
+        """Newest-first pages and exports read segments transparently."""
+        await insert_days([1, 2, 3])
+        expected = [log["id"] for log in await sqlite.get_logs()]
+
+        await sqlite.compact_partitions_before("2025-08-03")
+
+        assert [log["id"] for log in await sqlite.get_logs()] == expected
+        seen, cursor = [], None
+        while True:
+            page, cursor = await sqlite.get_logs_page(limit=4, after=cursor)
+            seen.extend(log["id"] for log in page)
+            if cursor is None:
+                break
+        assert seen == expected
+        assert [row[0] for row in await collect(chunk_size=2)] == expected[::-1]
+
+    async def test_filters_pushed_down_to_segments(self, db):
+        """Risk and time filters apply to segment rows."""
+        await insert_days([1, 2])
+        await sqlite.insert_log("risky", make_log("risky", "2025-08-01T15:00:00+00:00", risk=90))
+        await sqlite.compact_partitions_before("2025-08-03")
+
+        risky = await sqlite.get_logs(min_risk=80)
+        assert [log["id"] for log in risky] == ["risky"]
+
+        window = await sqlite.get_logs(
+            since="2025-08-01T11:00:00+00:00", until="2025-08-02T11:00:00+00:00"
+        )
+        assert [log["id"] for log in window] == ["log-2-0", "risky", "log-1-2", "log-1-1"]
+
+        await sqlite.insert_log("other", make_log("other", "2025-08-02T15:00:00+00:00", sender="agent-z"))
+        await sqlite.compact_partitions_before("2025-08-03")
+        by_sender = await sqlite.get_logs(sender="agent-z")
+        assert [log["id"] for log in by_sender] == ["other"]
+        assert [row[0] for row in await collect(sender="agent-z")] == ["other"]
+
+    async def test_late_logs_merge_with_segment(self, db):
+        """A log arriving for a compacted day is read in order with the segment."""
+        await insert_days([1, 2])
+        await sqlite.compact_partitions_before("2025-08-03")
+
+        await sqlite.insert_log("late", make_log("late", "2025-08-01T11:30:00+00:00"))
+
+        ids = [log["id"] for log in await sqlite.get_logs()]
+        assert ids.index("late") == ids.index("log-1-1") - 1
+        exported = [row[0] for row in await collect()]
+        assert exported == ids[::-1]
+
+        await sqlite.compact_partitions_before("2025-08-03")
+        assert len(sqlite._segments) == 3
+        assert [log["id"] for log in await sqlite.get_logs()] == ids
+
+    async def test_retention_removes_segments(self, db):
+        """Expired segments are deleted and subtracted from agent stats."""
+        await insert_days([1, 2], risk=90)
+        await sqlite.compact_partitions_before("2025-08-03")
+        paths = [segment[2] for segment in sqlite._segments]
+
+        await sqlite.drop_partitions_before("2025-08-02")
+
+        assert not os.path.exists(paths[0])
+        assert os.path.exists(paths[1])
+        stats = await sqlite.get_agent_stats()
+        assert stats["total_logs"] == 3
+        assert stats["total_alerts"] == 3
+
+    async def test_catalog_survives_restart(self, db):
+        """Segments are reloaded from the catalog on startup."""
+        await insert_days([1, 2])
+        await sqlite.compact_partitions_before("2025-08-02")
+
+        await sqlite.init_db()
+
+        assert len(sqlite._segments) == 1
+        assert len(await sqlite.get_logs()) == 6
+
+    async def test_partition_is_streamed_in_row_groups(self, db, monkeypatch):
+        """Rows are copied one row group at a time and stay sorted."""
+        monkeypatch.setattr(cold_storage, "SEGMENT_ROW_GROUP_SIZE", 2)
+        await insert_days([1], per_day=5)
+
+        await sqlite.compact_partitions_before("2025-08-02")
+
+        path = sqlite._segments[0][2]
+        assert pq.ParquetFile(path).num_row_groups == 3
+        assert [row[0] for row in cold_storage.read_segment(path, descending=False)] == [
+            f"log-1-{i}" for i in range(5)
+        ]
+
+    async def test_logs_written_during_copy_are_kept(self, db, monkeypatch):
+        """A log landing in the partition while it is copied triggers a retry."""
+        await insert_days([1])
+        copy = sqlite._copy_partition
+        attempts = []
+
+        async def copy_then_insert(conn, table, path):
+            stats = await copy(conn, table, path)
+            attempts.append(table)
+            if len(attempts) == 1:
+                await sqlite.insert_log("late", make_log("late", "2025-08-01T11:30:00+00:00"))
+            return stats
+
+        monkeypatch.setattr(sqlite, "_copy_partition", copy_then_insert)
+        await sqlite.compact_partitions_before("2025-08-02")
+
+        assert len(attempts) == 2
+        assert sqlite.partitions_for() == []
+        assert len(sqlite._segments) == 1
+        assert [log["id"] for log in await sqlite.get_logs()] == ["log-1-2", "late", "log-1-1", "log-1-0"]
+
+
+class TestReadSegment:
+    """Tests for limited reads of a segment."""
+
+    def test_limit_reads_from_requested_end(self, tmp_path, monkeypatch):
+        """Limited reads return the right rows across row groups, both ways."""
+        monkeypatch.setattr(cold_storage, "SEGMENT_ROW_GROUP_SIZE", 2)
+        path = str(tmp_path / "segment.parquet")
+        rows = [
+            tuple(make_log(f"log-{i}", f"2025-08-01T{10 + i:02d}:00:00+00:00", risk=i * 10)[field]
+                  for field in cold_storage.SEGMENT_COLUMNS)
+            for i in range(7)
+        ]
+        cold_storage.write_segment(path, rows)
+
+        def ids(**kwargs):
+            return [row[0] for row in cold_storage.read_segment(path, **kwargs)]
+
+        assert ids(limit=3) == ["log-6", "log-5", "log-4"]
+        assert ids(limit=3, descending=False) == ["log-0", "log-1", "log-2"]
+        assert ids(limit=2, min_risk=30, descending=False) == ["log-3", "log-4"]
+        assert ids(limit=2, after=("2025-08-01T15:00:00+00:00", "log-5")) == ["log-4", "log-3"]
+        assert ids(limit=100) == [f"log-{i}" for i in range(6, -1, -1)]
@@ -0,0 +1,84 @@
+"""
+Tests for the compiled rule evaluation plan.
+"""
+
+import pytest
+
+import rules.rule_engine as rule_engine
+from rules.aho_corasick import AhoCorasick
+from rules.rule_engine import CompiledRules
+
+RULES = [
+    {"id": "ctx", "type": "context_block", "match": ["hr_data", "prod_credentials"], "risk": 40},
+    {"id": "ctx_substring", "type": "context_block", "match": "prod_credentials_v2", "risk": 5},
+    {"id": "phrases", "type": "payload_contains", "match": ["Delete All", "send confidential", "delete all"], "risk": 80},
+    {"id": "link", "type": "payload_regex", "pattern": "https?://[^ ]+", "risk": 50},
+    {"id": "ip", "type": "payload_regex", "pattern": r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b", "risk": 25},
+    {"id": "repeat", "type": "payload_regex", "pattern": r"(\w)\1\1", "risk": 10},
+    {"id": "more_phrases", "type": "payload_contains", "match": ["send"], "risk": 15},
+]
+
+
+@pytest.fixture(params=[10**6, 0], ids=["substring", "aho-corasick"])
+def plan(request, monkeypatch):
+    """Build the plan with and without the multi-pattern automaton."""
+    monkeypatch.setattr(rule_engine, "AHO_CORASICK_MIN_LITERALS", request.param)
+    return CompiledRules(RULES)
+
+
+class TestCompiledRules:
+    """Tests for CompiledRules.evaluate."""
+
+    def test_alerts_follow_rule_and_phrase_order(self, plan):
+        """Alerts come out in rule order, then phrase order within a rule."""
+        payload = "Please DELETE ALL and send confidential files to http://x.io from 10.0.0.1"
+        alerts, risk = plan.evaluate({}, "hr_data", payload)
+
+        assert [a["rule_id"] for a in alerts] == [
+            "ctx", "phrases", "phrases", "phrases", "link", "ip", "more_phrases",
+        ]
+        assert alerts[1]["message"] == "Payload matched forbidden phrase: 'Delete All'"
+        assert alerts[3]["message"] == "Payload matched forbidden phrase: 'delete all'"
+        assert risk == 40 + 80 * 3 + 50 + 25 + 15
+
+    def test_context_substring_semantics_preserved(self, plan):
+        """A bare-string match keeps Python's substring ``in`` semantics."""
+        alerts, _ = plan.evaluate({}, "credentials", "")
+        assert [a["rule_id"] for a in alerts] == ["ctx_substring"]
+
+    def test_backreference_regex_evaluated(self, plan):
+        """Patterns that cannot be merged are still evaluated individually."""
+        alerts, risk = plan.evaluate({}, "general", "zzz")
+        assert [a["rule_id"] for a in alerts] == ["repeat"]
+        assert risk == 10
+
+    def test_clean_message(self, plan):
+        """Nothing fires on a benign message."""
+        assert plan.evaluate({}, "general", "summarize the meeting") == ([], 0)
+
+
+class TestRequiredLiteral:
+    """Tests for regex literal extraction."""
+
+    @pytest.mark.parametrize(
+        "pattern, literal",
+        [
+            ("https?://[^ ]+", "http"),
+            (r"\bAbcde[0-9]{2}", "abcde"),
+            ("foo(bar|baz)", "foo"),
+            ("(?i)abcdef", ""),
+            (r"(?:abcdef)?x", ""),
+            (r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b", ""),
+        ],
+    )
+    def test_required_literal(self, pattern, literal):
+        assert rule_engine._required_literal(pattern) == literal
+
+
+class TestAhoCorasick:
+    """Tests for the multi-pattern matcher."""
+
+    def test_finds_overlapping_and_nested_patterns(self):
+        matcher = AhoCorasick(["he", "she", "his", "hers", ""])
+        found = {matcher.patterns[i] for i in matcher.search("ushers")}
+        assert found == {"he", "she", "hers", ""}
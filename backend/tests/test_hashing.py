@@ -0,0 +1,66 @@
+"""
+Tests for the bounded password hashing pool.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hashing import HashingBusy, HashingPool
+
+
+@pytest.fixture
+async def pool():
+    pool = HashingPool(workers=1, queue_size=1, timeout=5)
+    yield pool
+    await pool.stop()
+
+
+class TestHashingPool:
+    """Tests for HashingPool.run."""
+
+    async def test_runs_off_the_event_loop(self, pool):
+        loop_thread = threading.get_ident()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        worker_thread = await pool.run(lambda: time.sleep(0.1) or threading.get_ident())
+        task.cancel()
+        assert worker_thread != loop_thread
+        assert ticks >= 5
+        assert pool.stats()["completed"] == 1
+
+    async def test_rejects_when_queue_is_full(self, pool):
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        queued = asyncio.ensure_future(pool.run(lambda: "queued"))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(HashingBusy):
+            await pool.run(lambda: "rejected")
+        assert pool.stats()["waiting"] == 1
+
+        release.set()
+        assert await running is True
+        assert await queued == "queued"
+        assert pool.stats() == {"workers": 1, "waiting": 0, "completed": 2, "rejected": 1, "timed_out": 0}
+
+    async def test_queued_job_times_out(self, pool):
+        pool.timeout = 0.05
+        release = threading.Event()
+        running = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HashingBusy):
+            await pool.run(lambda: "late")
+        release.set()
+        await running
+        assert pool.timed_out == 1
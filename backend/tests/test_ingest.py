@@ -0,0 +1,70 @@
+"""
+Tests for the write-behind ingest queue.
+"""
+
+import asyncio
+
+import pytest
+
+import sqlite
+from ingest import IngestQueue, IngestQueueFull
+from tests.conftest import make_log
+
+
+class TestIngestQueue:
+    """Tests for IngestQueue."""
+
+    async def test_groups_commits_by_size(self, db):
+        """A full batch is committed without waiting for the interval."""
+        queue = IngestQueue(batch_size=10, flush_interval=60)
+        await queue.start()
+        for i in range(30):
+            queue.submit(make_log(f"log-{i}"))
+        while queue.committed < 30:
+            await asyncio.sleep(0.01)
+        assert queue.batches == 3
+        await queue.stop()
+
+    async def test_flushes_by_time(self, db):
+        """A partial batch is committed once the interval elapses."""
+        queue = IngestQueue(batch_size=100, flush_interval=0.05)
+        await queue.start()
+        queue.submit(make_log(f"log-{1}"))
+        await asyncio.sleep(0.2)
+        assert queue.committed == 1
+        assert len(await sqlite.get_logs()) == 1
+        await queue.stop()
+
+    async def test_stop_flushes_pending_events(self, db):
+        """Shutdown commits everything that was accepted."""
+        queue = IngestQueue(batch_size=1000, flush_interval=60)
+        await queue.start()
+        for i in range(50):
+            queue.submit(make_log(f"log-{i}"))
+        await queue.stop()
+        assert len(await sqlite.get_logs()) == 50
+
+    async def test_committed_durability_waits_for_commit(self, db):
+        """With committed durability the waiter resolves after the write."""
+        committed = []
+
+        async def on_commit(entries):
+            committed.extend(entries)
+
+        queue = IngestQueue(durability="committed", on_commit=on_commit)
+        await queue.start()
+        await queue.submit(make_log(f"log-{1}"))
+        assert [log["id"] for log in await sqlite.get_logs()] == ["log-1"]
+        assert [log["id"] for log in committed] == ["log-1"]
+        await queue.stop()
+
+    async def test_rejects_when_full(self, db):
+        """Submissions beyond capacity raise IngestQueueFull."""
+        queue = IngestQueue(maxsize=2, flush_interval=60)
+        await queue.start()
+        queue.submit(make_log(f"log-{1}"))
+        queue.submit(make_log(f"log-{2}"))
+        with pytest.raises(IngestQueueFull):
+            queue.submit(make_log(f"log-{3}"))
+        assert queue.stats()["rejected"] == 1
+        await queue.stop()
@@ -0,0 +1,129 @@
+"""
+Tests for queued structured logging, sampled access logs and payload dumps.
+"""
+
+import io
+import json
+import logging
+import queue
+import threading
+
+import pytest
+
+import logging_config
+import metrics
+import sqlite
+from tests.conftest import make_log
+
+
+@pytest.fixture
+def stream():
+    """Log into a buffer for the test, then restore the stdout configuration."""
+    buffer = io.StringIO()
+    logging_config.configure_logging(buffer)
+    yield buffer
+    logging_config.configure_logging()
+
+
+def lines(buffer):
+    logging_config.shutdown_logging()
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+class TestStructuredLogging:
+    """Tests for the JSON formatter and the queue handler."""
+
+    def test_records_are_written_as_json(self, stream):
+        logging.getLogger("sentinelmesh.test").warning("disk %s", "full", extra={"free_mb": 3})
+        entry = lines(stream)[-1]
+        assert entry["level"] == "WARNING"
+        assert entry["logger"] == "sentinelmesh.test"
+        assert entry["message"] == "disk full"
+        assert entry["free_mb"] == 3
+        assert "ts" in entry
+
+    def test_exceptions_are_formatted_on_the_writer(self, stream):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logging.getLogger("sentinelmesh.test").exception("failed for %s", "agent-a")
+        entry = lines(stream)[-1]
+        assert entry["message"] == "failed for agent-a"
+        assert "RuntimeError: boom" in entry["exc_info"]
+
+    def test_record_is_captured_at_the_log_call(self, stream):
+        event = {"payload": "before"}
+        tags = ["a"]
+        logging.getLogger("sentinelmesh.test").warning("event %s", tags, extra={"event": event})
+        event["payload"] = "after"
+        tags.append("b")
+        entry = lines(stream)[-1]
+        assert entry["message"] == "event ['a']"
+        assert entry["event"] == {"payload": "before"}
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = logging_config.DroppingQueueHandler(queue.Queue(1))
+        counted = logging_config.LOG_RECORDS_DROPPED._default.value
+        logger = logging.getLogger("sentinelmesh.test.dropping")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for _ in range(3):
+                logger.error("overflow")
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 2
+        assert logging_config.LOG_RECORDS_DROPPED._default.value - counted == 2
+        assert "sentinelmesh_log_records_dropped_total" in metrics.REGISTRY.render()
+
+
+    def test_drops_from_many_threads_are_all_counted(self):
+        handler = logging_config.DroppingQueueHandler(queue.Queue(1))
+        handler.queue.put_nowait(None)
+        counted = logging_config.LOG_RECORDS_DROPPED._default.value
+        record = logging.LogRecord("sentinelmesh.test", logging.ERROR, "", 0, "overflow", None, None)
+
+        def drop():
+            for _ in range(1000):
+                handler.enqueue(record)
+
+        threads = [threading.Thread(target=drop) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert handler.dropped == 8000
+        assert logging_config.LOG_RECORDS_DROPPED._default.value - counted == 8000
+
+class TestAccessLog:
+    """Tests for log_access sampling."""
+
+    def test_samples_successes_but_keeps_errors(self, stream, monkeypatch):
+        monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 0)
+        logging_config.log_access("GET", "/logs", "/logs", 200, 0.01)
+        logging_config.log_access("POST", "/log", "/log", 503, 0.25)
+        monkeypatch.setattr(logging_config, "ACCESS_LOG_SAMPLE_RATE", 1.0)
+        logging_config.log_access("GET", "/alerts", "/alerts", 200, 0.002)
+
+        access = [entry for entry in lines(stream) if entry["logger"] == "sentinelmesh.access"]
+        assert [(entry["route"], entry["status"]) for entry in access] == [("/log", 503), ("/alerts", 200)]
+        assert access[0]["duration_ms"] == 250.0
+
+
+class TestPayloadLogging:
+    """Tests for SENTINELMESH_LOG_PAYLOADS."""
+
+    async def test_insert_is_silent_by_default(self, db, capsys, caplog):
+        caplog.set_level(logging.DEBUG, logger="sentinelmesh.payloads")
+        await sqlite.insert_log("log-1", make_log("log-1"))
+        assert capsys.readouterr().out == ""
+        assert not caplog.records
+
+    async def test_flag_dumps_each_event(self, db, monkeypatch, caplog):
+        monkeypatch.setattr(sqlite, "LOG_PAYLOADS", True)
+        caplog.set_level(logging.DEBUG, logger="sentinelmesh.payloads")
+        await sqlite.insert_logs([make_log("log-1"), make_log("log-2", payload="secret")])
+        assert [record.log_id for record in caplog.records] == ["log-1", "log-2"]
+        assert caplog.records[1].event["payload"] == "secret"
@@ -0,0 +1,90 @@
+"""
+Tests for the full-text log search endpoint.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def client(client):
+    """Seed the test client with logs spread over three days."""
+    events = [
+        {"context": "slack_thread", "payload": "please reset the staging password", "day": 1},
+        {"context": "email", "payload": "password password password leaked in logs", "day": 2},
+        {"context": "heartbeat", "payload": "agent is online", "day": 2},
+        {"context": "password_reset", "payload": "ticket opened", "day": 3},
+    ]
+    client.post(
+        "/logs/batch",
+        json=[
+            {
+                "sender": f"agent-{i}",
+                "receiver": "hub",
+                "context": event["context"],
+                "payload": event["payload"],
+                "timestamp": f"2025-08-0{event['day']}T10:00:00+00:00",
+            }
+            for i, event in enumerate(events)
+        ],
+    )
+    return client
+
+
+class TestLogSearchEndpoint:
+    """Tests for GET /logs/search."""
+
+    def test_ranks_matches_across_partitions(self, client):
+        """Payload and context matches from every day come back by relevance."""
+        response = client.get("/logs/search", params={"q": "password"})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 3
+        assert {hit["sender"] for hit in body["results"]} == {"agent-0", "agent-1", "agent-3"}
+        assert body["results"][0]["sender"] == "agent-1"
+        scores = [hit["score"] for hit in body["results"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_all_terms_required(self, client):
+        """Every term must appear; punctuation is not parsed as syntax."""
+        response = client.get("/logs/search", params={"q": "reset staging"})
+        assert [hit["sender"] for hit in response.json()["results"]] == ["agent-0"]
+
+        response = client.get("/logs/search", params={"q": 'reset" OR "online'})
+        assert response.status_code == 200
+
+    def test_time_range_filter(self, client):
+        """since/until restrict the searched days."""
+        response = client.get(
+            "/logs/search",
+            params={"q": "password", "since": "2025-08-02T00:00:00+00:00"},
+        )
+        assert {hit["sender"] for hit in response.json()["results"]} == {"agent-1", "agent-3"}
+
+    def test_pagination(self, client):
+        """Following next_cursor visits every match once."""
+        client.post(
+            "/logs/batch",
+            json=[
+                {"sender": f"extra-{i}", "receiver": "hub", "context": "c", "payload": f"password {i}"}
+                for i in range(5)
+            ],
+        )
+        seen, cursor = [], None
+        while True:
+            params = {"q": "password", "limit": 2}
+            if cursor:
+                params["after"] = cursor
+            body = client.get("/logs/search", params=params).json()
+            seen.extend(hit["id"] for hit in body["results"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == 8
+        assert len(set(seen)) == 8
+
+    def test_invalid_cursor_rejected(self, client):
+        """Malformed cursors return 400."""
+        response = client.get("/logs/search", params={"q": "password", "after": "bogus"})
+        assert response.status_code == 400
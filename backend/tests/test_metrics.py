@@ -0,0 +1,84 @@
+"""
+Tests for the Prometheus metrics registry and GET /metrics.
+"""
+
+import re
+
+import pytest
+
+import metrics
+
+
+def sample(text, series):
+    """Value of one series in an exposition, or 0 if absent."""
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+class TestRegistry:
+    """Tests for the text exposition format."""
+
+    def test_counter_with_labels(self):
+        registry = metrics.Registry()
+        requests = registry.register(metrics.Counter("test_total", "Test counter", ("org",)))
+        requests.labels("a").inc()
+        requests.labels("a").inc(2)
+        requests.labels('we"ird\\').inc()
+
+        text = registry.render()
+        assert "# TYPE test_total counter" in text
+        assert 'test_total{org="a"} 3' in text
+        assert 'test_total{org="we\\"ird\\\\"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.Registry()
+        latency = registry.register(metrics.Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 2' in text
+        assert 'test_seconds_bucket{le="1"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_seconds_count 4" in text
+        assert sample(text, "test_seconds_sum") == pytest.approx(3.65)
+
+    def test_gauge_reads_callback_at_scrape(self):
+        registry = metrics.Registry()
+        depth = [1]
+        registry.register(metrics.Gauge("test_depth", "Test gauge", lambda: depth[0]))
+        depth[0] = 7
+        assert "test_depth 7" in registry.render()
+
+    def test_wrong_label_count_rejected(self):
+        with pytest.raises(ValueError):
+            metrics.Counter("test_total", "Test counter", ("org",)).labels("a", "b")
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics."""
+
+    def test_ingest_pipeline_is_measured(self, client):
+        before = client.get("/metrics").text
+        client.post("/log", json={"sender": "a", "receiver": "b", "context": "c", "payload": "hello"})
+        client.post(
+            "/logs/batch",
+            json=[{"sender": "a", "receiver": "b", "context": "c", "payload": "hi"}] * 3,
+        )
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        after = response.text
+
+        def delta(series):
+            return sample(after, series) - sample(before, series)
+
+        assert delta('sentinelmesh_http_request_duration_seconds_count{method="POST",route="/log",status="200"}') == 1
+        assert delta('sentinelmesh_http_request_duration_seconds_count{method="POST",route="/logs/batch",status="200"}') == 1
+        assert delta('sentinelmesh_rule_evaluation_seconds_count{mode="inline"}') == 4
+        assert delta("sentinelmesh_sqlite_commit_seconds_count") == 2
+        assert delta("sentinelmesh_sqlite_insert_seconds_count") == 2
+        assert delta('sentinelmesh_logs_ingested_total{org="example-org"}') == 4
+        assert "sentinelmesh_websocket_subscribers 0" in after
+        assert "sentinelmesh_broadcast_queue_depth 0" in after
@@ -0,0 +1,151 @@
+"""
+Tests for scoring log events off the event loop.
+"""
+
+import asyncio
+
+import pytest
+
+from rules import rule_engine
+from rules import executor as executor_module
+from rules.executor import RuleExecutor
+from rules.rule_engine import SEQUENCE_WINDOWS, CompiledRules
+
+RULES = [
+    {"id": "hr", "type": "context_block", "match": ["hr_data"], "risk": 40},
+    {"id": "secrets", "type": "payload_contains", "match": ["api key", "password"], "risk": 30},
+    {"id": "card", "type": "payload_regex", "pattern": r"(?i)\bcard\s+\d{4}\b", "risk": 50},
+    {
+        "id": "brute_force",
+        "type": "sequential_events",
+        "sequence": [
+            {"event_type": "login_attempt", "status": "failed", "count": 3, "time_window_seconds": 60}
+        ],
+        "risk": 70,
+    },
+]
+
+TIMESTAMP = "2025-08-02T10:00:00+00:00"
+
+MESSAGES = [
+    {"sender": "eve", "context": "hr_data", "payload": "my password is hunter2"},
+    {"sender": "eve", "context": "auth", "payload": "login failed"},
+    {"sender": "bob", "context": "chat", "payload": "CARD 1234 and the API key"},
+    {"sender": "eve", "context": "auth", "payload": "login failed"},
+    {"sender": "bob", "context": "chat", "payload": "nothing to see", "risk": 90},
+    {"sender": "eve", "context": "auth", "payload": "login failed"},
+]
+MESSAGES = [dict(message, timestamp=TIMESTAMP) for message in MESSAGES]
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    """Activate a small rule set with every rule type and fresh sequence state."""
+    monkeypatch.setattr(rule_engine, "compiled_rules", CompiledRules(RULES))
+    SEQUENCE_WINDOWS.clear()
+    yield
+    SEQUENCE_WINDOWS.clear()
+
+
+def expected_scores():
+    scores = [rule_engine.check_all_rules(dict(message)) for message in MESSAGES]
+    SEQUENCE_WINDOWS.clear()
+    return scores
+
+
+class TestRuleExecutor:
+    """Tests for RuleExecutor."""
+
+    @pytest.mark.parametrize("mode", ["thread", "process"])
+    async def test_matches_inline_scoring(self, rules, mode):
+        """Pooled scoring returns exactly what check_all_rules returns."""
+        expected = expected_scores()
+        executor = RuleExecutor(mode=mode, workers=2, batch_size=2, batch_wait=0.01)
+        await executor.start()
+        try:
+            scores = await executor.evaluate_many([dict(message) for message in MESSAGES])
+        finally:
+            await executor.stop()
+
+        assert [tuple(score) for score in scores] == expected
+        # The third failed login fires the sequence rule, like inline
+        assert any(alert["rule_id"] == "brute_force" for alert in scores[5][0])
+        assert executor.evaluated == len(MESSAGES)
+        assert executor.batches == 3
+
+    async def test_rules_sent_to_process_workers_once(self, rules):
+        """Batches carry only the rule set version once a worker has the rules."""
+        executor = RuleExecutor(mode="process", workers=1, batch_size=1)
+        await executor.start()
+        try:
+            for message in MESSAGES:
+                await executor.evaluate(dict(message))
+        finally:
+            await executor.stop()
+
+        assert executor.batches == len(MESSAGES)
+        assert executor.rule_transfers == 1
+
+    def test_worker_reports_unknown_version(self, monkeypatch):
+        """A worker without the requested rule set asks for it."""
+        monkeypatch.setattr(executor_module, "_worker_plan", None)
+        items = [("hr_data", "hello")]
+
+        assert executor_module._match_batch_in_process(7, None, items, 0) is None
+        first = executor_module._match_batch_in_process(7, RULES, items, 0)
+        assert executor_module._match_batch_in_process(7, None, items, 0) == first
+        assert executor_module._match_batch_in_process(8, None, items, 0) is None
+
+    async def test_sequence_state_follows_arrival_order(self, rules):
+        """Concurrent submissions observe sequence windows in submission order."""
+        executor = RuleExecutor(mode="thread", workers=4, batch_size=1)
+        await executor.start()
+        try:
+            scores = await asyncio.gather(*(executor.evaluate(dict(MESSAGES[1])) for _ in range(4)))
+        finally:
+            await executor.stop()
+
+        fired = [any(a["rule_id"] == "brute_force" for a in alerts) for alerts, _ in scores]
+        assert fired == [False, False, True, False]
+
+    async def test_batch_sent_after_wait(self, rules):
+        """A partial batch is scored once batch_wait elapses."""
+        executor = RuleExecutor(mode="thread", batch_size=100, batch_wait=0.005)
+        await executor.start()
+        try:
+            alerts, risk = await asyncio.wait_for(executor.evaluate(dict(MESSAGES[0])), 1)
+        finally:
+            await executor.stop()
+
+        assert [alert["rule_id"] for alert in alerts] == ["hr", "secrets"]
+        assert risk == 70
+        assert executor.last_batch_size == 1
+
+    async def test_reload_splits_batches(self, rules, monkeypatch):
+        """Events are scored with the rule set that was active when submitted."""
+        executor = RuleExecutor(mode="process", workers=1, batch_size=10, batch_wait=0.05)
+        await executor.start()
+        try:
+            first = asyncio.ensure_future(executor.evaluate({"context": "chat", "payload": "password"}))
+            await asyncio.sleep(0)
+            monkeypatch.setattr(rule_engine, "compiled_rules", CompiledRules(RULES[2:]))
+            second = asyncio.ensure_future(executor.evaluate({"context": "chat", "payload": "password"}))
+            (_, first_risk), (_, second_risk) = await asyncio.gather(first, second)
+        finally:
+            await executor.stop()
+
+        assert (first_risk, second_risk) == (30, 0)
+        assert executor.batches == 2
+
+    async def test_inline_until_started(self, rules):
+        """Without a pool, events are scored synchronously."""
+        executor = RuleExecutor(mode="thread")
+        alerts, risk = await executor.evaluate(dict(MESSAGES[0]))
+
+        assert risk == 70
+        assert executor.batches == 0
+        assert not executor.running
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            RuleExecutor(mode="gpu")
@@ -0,0 +1,128 @@
+"""
+Tests for per-rule match counts and sampled evaluation costs.
+"""
+
+import pytest
+
+import rules.rule_engine as rule_engine
+from rules.executor import RuleExecutor
+from rules.rule_engine import SEQUENCE_WINDOWS, CompiledRules
+
+RULES = [
+    {"id": "hr", "type": "context_block", "match": ["hr_data"], "risk": 40},
+    {"id": "secrets", "type": "payload_contains", "match": ["api key", "password"], "risk": 30},
+    {"id": "backtrack", "type": "payload_regex", "pattern": r"(a+)+b", "risk": 10},
+    {"id": "never", "type": "payload_regex", "pattern": r"zzz\d+", "risk": 10},
+    {
+        "id": "brute_force",
+        "type": "sequential_events",
+        "sequence": [
+            {"event_type": "login_attempt", "status": "failed", "count": 2, "time_window_seconds": 60}
+        ],
+        "risk": 70,
+    },
+]
+
+MESSAGES = [
+    {"sender": "eve", "context": "hr_data", "payload": "password " + "a" * 16},
+    {"sender": "eve", "context": "auth", "payload": "login failed " + "a" * 16},
+    {"sender": "eve", "context": "auth", "payload": "login failed, api key and password"},
+]
+
+
+def make_plan(sample_rate):
+    plan = CompiledRules(RULES)
+    plan.profile.sample_rate = sample_rate
+    return plan
+
+
+def by_id(stats):
+    return {entry["rule_id"]: entry for entry in stats["rules"]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_windows():
+    SEQUENCE_WINDOWS.clear()
+    yield
+    SEQUENCE_WINDOWS.clear()
+
+
+class TestRuleProfile:
+    """Tests for RuleProfile through CompiledRules.evaluate."""
+
+    def test_match_counts_are_exact_without_sampling(self):
+        plan = make_plan(0)
+        for message in MESSAGES:
+            plan.evaluate(message, message["context"], message["payload"])
+
+        stats = plan.profile.stats("position")
+        rules = by_id(stats)
+        assert stats["messages"] == 3
+        assert stats["sampled_messages"] == 0
+        assert {rule_id: entry["matches"] for rule_id, entry in rules.items()} == {
+            "hr": 1, "secrets": 2, "backtrack": 0, "never": 0, "brute_force": 1,
+        }
+        assert rules["secrets"]["hit_rate"] == round(2 / 3, 6)
+        assert all(entry["sampled"] == 0 for entry in stats["rules"])
+        assert [entry["rule_id"] for entry in stats["rules"]] == [rule["id"] for rule in RULES]
+
+    def test_sampled_costs_find_the_slow_rule(self):
+        plan = make_plan(1.0)
+        for message in MESSAGES:
+            plan.evaluate(message, message["context"], message["payload"])
+
+        stats = plan.profile.stats("cost")
+        rules = by_id(stats)
+        assert stats["sampled_messages"] == 3
+        assert stats["plan"]["sampled"] == 3
+        assert all(entry["sampled"] == 3 for entry in stats["rules"])
+        assert stats["rules"][0]["rule_id"] == "backtrack"
+        assert rules["never"]["bytes_scanned"] == sum(len(m["payload"]) for m in MESSAGES)
+        assert rules["secrets"]["bytes_scanned"] == 2 * sum(len(m["payload"]) for m in MESSAGES)
+        backtrack = rules["backtrack"]
+        assert sum(backtrack["histogram"].values()) == 3
+        assert 0 < backtrack["p50_us"] <= backtrack["p99_us"]
+        assert backtrack["p99_us"] <= backtrack["max_us"]
+
+    def test_sampling_does_not_change_results(self):
+        unsampled = [make_plan(0).evaluate(m, m["context"], m["payload"]) for m in MESSAGES]
+        SEQUENCE_WINDOWS.clear()
+        plan = make_plan(1.0)
+        sampled = [plan.evaluate(m, m["context"], m["payload"]) for m in MESSAGES]
+        assert sampled == unsampled
+
+    async def test_executor_records_worker_samples(self, monkeypatch):
+        plan = make_plan(1.0)
+        monkeypatch.setattr(rule_engine, "compiled_rules", plan)
+        executor = RuleExecutor(mode="thread", batch_size=3)
+        await executor.start()
+        try:
+            await executor.evaluate_many([dict(message) for message in MESSAGES])
+        finally:
+            await executor.stop()
+
+        stats = plan.profile.stats()
+        assert stats["messages"] == 3
+        assert stats["sampled_messages"] == 3
+        assert by_id(stats)["brute_force"]["matches"] == 1
+        assert by_id(stats)["brute_force"]["sampled"] == 3
+
+
+class TestRuleStatsEndpoint:
+    """Tests for GET /rules/stats."""
+
+    def test_reports_active_rules(self, client):
+        original = rule_engine.compiled_rules
+        rule_engine.activate_rules(make_plan(1.0))
+        try:
+            client.post("/log", json={"sender": "eve", "receiver": "hub", "context": "hr_data", "payload": "hi"})
+            response = client.get("/rules/stats", params={"sort": "matches"})
+            assert client.get("/rules/stats", params={"sort": "bogus"}).status_code == 422
+        finally:
+            rule_engine.activate_rules(original)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["messages"] == 1
+        assert body["rules"][0]["rule_id"] == "hr"
+        assert body["rules"][0]["matches"] == 1
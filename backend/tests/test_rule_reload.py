@@ -0,0 +1,99 @@
+"""
+Tests for hot reloading of the rule file.
+"""
+
+import asyncio
+
+import pytest
+import yaml
+
+import rules.rule_engine as rule_engine
+from rules.watcher import RuleFileWatcher
+
+
+def write_rules(path, rule_list):
+    path.write_text(yaml.safe_dump({"rules": rule_list}))
+
+
+@pytest.fixture
+def rule_file(tmp_path, monkeypatch):
+    """Point the rule engine at a temporary rule file and restore it afterwards."""
+    path = tmp_path / "rules.yaml"
+    write_rules(path, [{"id": "a", "type": "payload_contains", "match": ["alpha"], "risk": 10}])
+    monkeypatch.setattr(rule_engine, "RULE_FILE", path)
+    original = rule_engine.compiled_rules
+    yield path
+    rule_engine.activate_rules(original)
+
+
+class TestReloadRules:
+    """Tests for reload_rules and the admin endpoint."""
+
+    def test_reload_swaps_rule_set(self, rule_file):
+        result = rule_engine.reload_rules()
+        assert result["rule_count"] == 1
+        alerts, risk = rule_engine.check_all_rules({"context": "x", "payload": "alpha"})
+        assert [a["rule_id"] for a in alerts] == ["a"]
+        assert risk == 10
+
+    def test_invalid_file_keeps_previous_rules(self, rule_file):
+        rule_engine.reload_rules()
+        write_rules(rule_file, [{"id": "bad", "type": "payload_regex", "pattern": "(", "risk": 1}])
+
+        with pytest.raises(rule_engine.RuleValidationError):
+            rule_engine.reload_rules()
+        assert [r["id"] for r in rule_engine.rules] == ["a"]
+
+    def test_yaml_syntax_error_keeps_previous_rules(self, rule_file):
+        rule_engine.reload_rules()
+        rule_file.write_text("rules: [unclosed\n")
+
+        with pytest.raises(rule_engine.RuleValidationError):
+            rule_engine.reload_rules()
+        assert [r["id"] for r in rule_engine.rules] == ["a"]
+
+    def test_non_mapping_file_keeps_previous_rules(self, rule_file):
+        rule_engine.reload_rules()
+        rule_file.write_text("- id: a\n- id: b\n")
+
+        with pytest.raises(rule_engine.RuleValidationError):
+            rule_engine.reload_rules()
+        assert [r["id"] for r in rule_engine.rules] == ["a"]
+
+    def test_reload_endpoint(self, rule_file, client):
+        response = client.post("/rules/reload")
+        assert response.status_code == 200
+        assert response.json()["rule_count"] == 1
+        assert response.json()["duration_ms"] >= 0
+
+        write_rules(rule_file, [{"id": "a"}, {"id": "a"}])
+        assert client.post("/rules/reload").status_code == 400
+        rule_file.write_text("rules: [unclosed\n")
+        assert client.post("/rules/reload").status_code == 400
+        rule_file.write_text("just a string\n")
+        assert client.post("/rules/reload").status_code == 400
+        assert [r["id"] for r in rule_engine.rules] == ["a"]
+
+
+class TestRuleFileWatcher:
+    """Tests for the mtime-polling watcher."""
+
+    async def test_watcher_reloads_on_change(self, rule_file):
+        watcher = RuleFileWatcher(path=rule_file, interval=0.01)
+        await watcher.start()
+        await asyncio.sleep(0.05)
+        write_rules(
+            rule_file,
+            [
+                {"id": "a", "type": "payload_contains", "match": ["alpha"], "risk": 10},
+                {"id": "b", "type": "context_block", "match": ["beta"], "risk": 20},
+            ],
+        )
+        for _ in range(100):
+            if watcher.reloads:
+                break
+            await asyncio.sleep(0.01)
+        await watcher.stop()
+
+        assert watcher.reloads == 1
+        assert sorted(r["id"] for r in rule_engine.rules) == ["a", "b"]
@@ -0,0 +1,109 @@
+"""
+Tests for sliding-window state of sequential_events rules.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from rules.rule_engine import SEQUENCE_WINDOWS, CompiledRules
+from rules.sequence import SequenceWindows
+
+BRUTE_FORCE = {
+    "id": "brute_force",
+    "type": "sequential_events",
+    "sequence": [
+        {"event_type": "login_attempt", "status": "failed", "count": 3, "time_window_seconds": 60}
+    ],
+    "risk": 70,
+}
+
+START = datetime(2025, 8, 2, 10, 0, tzinfo=timezone.utc)
+
+
+def event(sender, payload, seconds=0, context="auth"):
+    return {
+        "sender": sender,
+        "context": context,
+        "payload": payload,
+        "timestamp": (START + timedelta(seconds=seconds)).isoformat(),
+    }
+
+
+@pytest.fixture
+def windows():
+    return SequenceWindows()
+
+
+class TestSequenceWindows:
+    """Tests for SequenceWindows.observe."""
+
+    def test_fires_once_count_reached_per_sender(self, windows):
+        fired = [windows.observe(event("mallory", "Login failed"), [BRUTE_FORCE]) for _ in range(3)]
+        assert fired == [[], [], [0]]
+        # Another sender has its own window
+        assert windows.observe(event("alice", "login failed"), [BRUTE_FORCE]) == []
+
+    def test_burst_from_other_senders_does_not_evict(self, windows):
+        for second in range(2):
+            windows.observe(event("mallory", "login failed", second), [BRUTE_FORCE])
+        for i in range(5000):
+            windows.observe(event(f"agent-{i}", "heartbeat", 5), [BRUTE_FORCE])
+        assert windows.observe(event("mallory", "login failed", 10), [BRUTE_FORCE]) == [0]
+
+    def test_old_events_expire(self, windows):
+        for second in (0, 1):
+            windows.observe(event("mallory", "login failed", second), [BRUTE_FORCE])
+        assert windows.observe(event("mallory", "login failed", 120), [BRUTE_FORCE]) == []
+
+    def test_every_step_must_be_satisfied(self, windows):
+        takeover = {
+            "id": "takeover",
+            "type": "sequential_events",
+            "sequence": [
+                {"event_type": "login_attempt", "status": "failed", "count": 2, "time_window_seconds": 60},
+                {"event_type": "login_attempt", "status": "success", "count": 1, "time_window_seconds": 10},
+            ],
+        }
+        assert windows.observe(event("mallory", "login success", 0), [takeover]) == []
+        windows.observe(event("mallory", "login failed", 20), [takeover])
+        windows.observe(event("mallory", "login failed", 21), [takeover])
+        # The earlier success is outside its 10s window
+        assert windows.observe(event("mallory", "heartbeat", 22), [takeover]) == []
+        assert windows.observe(event("mallory", "login success", 23), [takeover]) == [0]
+
+    def test_steps_must_happen_in_order(self, windows):
+        takeover = {
+            "id": "takeover",
+            "type": "sequential_events",
+            "sequence": [
+                {"event_type": "login_attempt", "status": "failed", "count": 1, "time_window_seconds": 60},
+                {"event_type": "login_attempt", "status": "success", "count": 1, "time_window_seconds": 60},
+            ],
+        }
+        assert windows.observe(event("mallory", "login success", 0), [takeover]) == []
+        assert windows.observe(event("mallory", "login failed", 1), [takeover]) == []
+        assert windows.observe(event("mallory", "login success", 2), [takeover]) == [0]
+
+    def test_fires_only_on_completing_event(self, windows):
+        fired = [windows.observe(event("mallory", "login failed", second), [BRUTE_FORCE]) for second in range(6)]
+        assert fired == [[], [], [0], [], [], [0]]
+
+    def test_memory_bounded_by_key_limit(self):
+        windows = SequenceWindows(max_keys=10)
+        for i in range(100):
+            windows.observe(event(f"agent-{i}", "login failed"), [BRUTE_FORCE])
+        assert len(windows) == 10
+
+
+class TestSequenceRuleAlerts:
+    """sequential_events rules through the compiled plan."""
+
+    def test_alert_emitted(self):
+        SEQUENCE_WINDOWS.clear()
+        plan = CompiledRules([BRUTE_FORCE])
+        results = [plan.evaluate(m, m["context"], m["payload"]) for m in [event("eve", "login failed")] * 3]
+        alerts, risk = results[-1]
+        assert [a["rule_id"] for a in alerts] == ["brute_force"]
+        assert risk == 70
+        SEQUENCE_WINDOWS.clear()
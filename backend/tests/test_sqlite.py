@@ -0,0 +1,292 @@
+"""
+Tests for the SQLite storage layer.
+"""
+
+import asyncio
+
+import pytest
+
+import sqlite
+from tests.conftest import make_log
+
+
+class TestConnectionPool:
+    """Tests for the long-lived connection pool."""
+
+    async def test_wal_mode_enabled(self, db):
+        """The database is switched to WAL journaling on startup."""
+        async with sqlite.read_connection() as conn:
+            cursor = await conn.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == "wal"
+
+    async def test_readers_are_read_only(self, db):
+        """Pooled read connections refuse writes."""
+        async with sqlite.read_connection() as conn:
+            with pytest.raises(Exception):
+                await conn.execute("DELETE FROM agent_stats")
+
+    async def test_reads_see_committed_writes(self, db):
+        """Rows written through the writer are visible to pooled readers."""
+        await sqlite.insert_log("log-1", make_log("log-1", risk=90))
+        logs = await sqlite.get_logs(min_risk=80)
+        assert [log["id"] for log in logs] == ["log-1"]
+
+    async def test_concurrent_inserts_are_serialized(self, db):
+        """Concurrent writers share one connection without losing rows."""
+        await asyncio.gather(
+            *(sqlite.insert_log(f"log-{i}", make_log(f"log-{i}")) for i in range(50)),
+            *(sqlite.get_logs() for _ in range(10)),
+        )
+        assert len(await sqlite.get_logs()) == 50
+
+    async def test_close_falls_back_to_short_lived_connections(self, db):
+        """Helpers keep working after the pool is closed."""
+        await sqlite.close_db()
+        await sqlite.insert_log("log-1", make_log("log-1"))
+        assert len(await sqlite.get_logs()) == 1
+
+
+class TestKeysetPagination:
+    """Tests for cursor-based pagination of logs."""
+
+    async def test_pages_cover_every_row_once(self, db):
+        """Walking next_cursor visits every row once, newest first."""
+        # Several rows share a timestamp so the id tie-breaker is exercised
+        for i in range(25):
+            ts = f"2025-08-02T10:30:{i // 3:02d}+00:00"
+            await sqlite.insert_log(f"log-{i:02d}", make_log(f"log-{i:02d}", timestamp=ts))
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await sqlite.get_logs_page(limit=4, after=cursor)
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        assert len(seen) == 25
+        assert len({log["id"] for log in seen}) == 25
+        keys = [(log["timestamp"], log["id"]) for log in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    async def test_filters_by_org_and_risk(self, db):
+        """Org and min_risk are applied in SQL."""
+        await sqlite.insert_log("a", make_log("a", org="org-1", risk=90))
+        await sqlite.insert_log("b", make_log("b", org="org-1", risk=10))
+        await sqlite.insert_log("c", make_log("c", org="org-2", risk=90))
+
+        page, cursor = await sqlite.get_logs_page(min_risk=80, org="org-1", limit=10)
+        assert [log["id"] for log in page] == ["a"]
+        assert cursor is None
+
+    async def test_org_query_uses_index(self, db):
+        """The newest-first org query is served by an index, not a full scan."""
+        await sqlite.insert_log("a", make_log("a"))
+        table = sqlite.partitions_for()[0]
+        async with sqlite.read_connection() as conn:
+            cursor = await conn.execute(
+                f'EXPLAIN QUERY PLAN SELECT id FROM "{table}" WHERE risk >= 0 AND org = ? '
+                "ORDER BY timestamp DESC, id DESC LIMIT 10",
+                ("org-1",),
+            )
+            plan = " ".join(row[-1] for row in await cursor.fetchall())
+        assert f"idx_{table}_org_timestamp" in plan
+        assert "TEMP B-TREE" not in plan
+
+    async def test_filters_by_sender_receiver_and_context(self, db):
+        """Exact-match filters are applied in SQL and combine with each other."""
+        await sqlite.insert_log("a", make_log("a", sender="agent-x", context="email"))
+        await sqlite.insert_log("b", make_log("b", sender="agent-x", receiver="agent-y"))
+        await sqlite.insert_log("c", make_log("c", context="email"))
+
+        async def ids(**filters):
+            page, _ = await sqlite.get_logs_page(limit=10, **filters)
+            return sorted(log["id"] for log in page)
+
+        assert await ids(sender="agent-x") == ["a", "b"]
+        assert await ids(receiver="agent-y") == ["b"]
+        assert await ids(context="email") == ["a", "c"]
+        assert await ids(sender="agent-x", context="email") == ["a"]
+        assert await ids(sender="nobody") == []
+
+    async def test_filter_queries_use_index(self, db):
+        """Each filtered newest-first query reads its own index without sorting."""
+        await sqlite.insert_log("a", make_log("a"))
+        table = sqlite.partitions_for()[0]
+        async with sqlite.read_connection() as conn:
+            for field in sqlite.FILTER_FIELDS:
+                cursor = await conn.execute(
+                    f'EXPLAIN QUERY PLAN SELECT id FROM "{table}" WHERE risk >= 0 AND org = ? '
+                    f"AND {field} = ? AND timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT 10",
+                    ("org-1", "value", "2025-08-02"),
+                )
+                plan = " ".join(row[-1] for row in await cursor.fetchall())
+                assert f"idx_{table}_org_{field}_timestamp" in plan
+                assert "TEMP B-TREE" not in plan
+
+    def test_invalid_cursor_rejected(self):
+        """Malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            sqlite.decode_cursor("not-a-cursor")
+
+
+class TestPartitions:
+    """Tests for time-partitioned log storage."""
+
+    async def test_logs_are_split_by_day(self, db):
+        """Each day of timestamps gets its own table; queries span them in order."""
+        for day in (3, 1, 2):
+            for hour in (9, 10):
+                log_id = f"log-{day}-{hour}"
+                ts = f"2025-08-0{day}T{hour:02d}:00:00+00:00"
+                await sqlite.insert_log(log_id, make_log(log_id, timestamp=ts))
+
+        assert sqlite.partitions_for() == ["logs_20250801", "logs_20250802", "logs_20250803"]
+        logs = await sqlite.get_logs()
+        assert [log["id"] for log in logs] == [
+            "log-3-10", "log-3-9", "log-2-10", "log-2-9", "log-1-10", "log-1-9",
+        ]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await sqlite.get_logs_page(limit=4, after=cursor)
+            seen.extend(log["id"] for log in page)
+            if cursor is None:
+                break
+        assert seen == [log["id"] for log in logs]
+
+    async def test_time_range_prunes_partitions(self, db):
+        """Only partitions overlapping the requested range are read."""
+        for day in (1, 2, 3):
+            await sqlite.insert_log(f"log-{day}", make_log(f"log-{day}", timestamp=f"2025-08-0{day}T10:00:00+00:00"))
+
+        assert sqlite.partitions_for(since="2025-08-02T12:00:00+00:00") == ["logs_20250802", "logs_20250803"]
+        assert sqlite.partitions_for(until="2025-08-02") == ["logs_20250801"]
+        logs = await sqlite.get_logs(since="2025-08-02T00:00:00+00:00", until="2025-08-03T00:00:00+00:00")
+        assert [log["id"] for log in logs] == ["log-2"]
+
+    async def test_weekly_partitions(self, db, monkeypatch):
+        """Weekly partitions start on Monday and never overlap existing ones."""
+        await sqlite.insert_log("tue", make_log("tue", timestamp="2025-08-05T10:00:00+00:00"))
+        monkeypatch.setattr(sqlite, "PARTITION_INTERVAL", "week")
+        await sqlite.insert_log("wed", make_log("wed", timestamp="2025-08-06T10:00:00+00:00"))
+        await sqlite.insert_log("mon", make_log("mon", timestamp="2025-08-04T10:00:00+00:00"))
+
+        assert sqlite._partitions == [
+            ("2025-08-04", "2025-08-05", "logs_20250804"),
+            ("2025-08-05", "2025-08-06", "logs_20250805"),
+            ("2025-08-06", "2025-08-11", "logs_20250806"),
+        ]
+        assert [log["id"] for log in await sqlite.get_logs()] == ["wed", "tue", "mon"]
+
+    async def test_retention_drops_whole_partitions(self, db):
+        """Expired partitions are dropped as tables; newer ones are kept."""
+        for day in (1, 2, 3):
+            await sqlite.insert_log(f"log-{day}", make_log(f"log-{day}", timestamp=f"2025-08-0{day}T10:00:00+00:00"))
+
+        dropped = await sqlite.drop_partitions_before("2025-08-03")
+
+        assert dropped == ["logs_20250801", "logs_20250802"]
+        assert [log["id"] for log in await sqlite.get_logs()] == ["log-3"]
+        async with sqlite.read_connection() as conn:
+            cursor = await conn.execute("SELECT name FROM sqlite_master WHERE name = 'logs_20250801'")
+            assert await cursor.fetchone() is None
+            # Freed pages are returned to the filesystem
+            cursor = await conn.execute("PRAGMA freelist_count")
+            assert (await cursor.fetchone())[0] == 0
+
+    async def test_unpartitioned_table_migrated(self, db):
+        """Rows in a pre-partitioning logs table are moved on startup."""
+        async with sqlite.write_connection() as conn:
+            await conn.execute(
+                "CREATE TABLE logs (id TEXT PRIMARY KEY, sender TEXT, receiver TEXT, context TEXT, "
+                "payload TEXT, timestamp TEXT, received_at TEXT, org TEXT, risk INTEGER)"
+            )
+            await conn.executemany(
+                sqlite._insert_log_sql("logs"),
+                [sqlite._log_row(f"log-{day}", make_log(f"log-{day}", timestamp=f"2025-07-0{day}T10:00:00+00:00")) for day in (1, 2)],
+            )
+            await conn.commit()
+
+        await sqlite.init_db()
+
+        assert sqlite.partitions_for() == ["logs_20250701", "logs_20250702"]
+        assert [log["id"] for log in await sqlite.get_logs()] == ["log-2", "log-1"]
+
+
+class TestSearchIndex:
+    """Tests for the per-partition full-text index."""
+
+    async def test_replaced_rows_are_reindexed(self, db):
+        """INSERT OR REPLACE removes the old text from the index."""
+        await sqlite.insert_log("a", make_log("a", payload="secret token"))
+        await sqlite.insert_log("a", make_log("a", payload="nothing here"))
+
+        assert (await sqlite.search_logs("secret"))[0] == []
+        hits, _ = await sqlite.search_logs("nothing")
+        assert [hit["id"] for hit in hits] == ["a"]
+
+    async def test_index_built_for_existing_partitions(self, db):
+        """Partitions without an index get one rebuilt on startup."""
+        await sqlite.insert_log("a", make_log("a", payload="secret token"))
+        async with sqlite.write_connection() as conn:
+            await conn.execute('DROP TABLE "logs_20250802_fts"')
+            await conn.commit()
+
+        await sqlite.init_db()
+
+        hits, _ = await sqlite.search_logs("token")
+        assert [hit["id"] for hit in hits] == ["a"]
+
+
+class TestAgentStats:
+    """Tests for the incrementally maintained agent statistics."""
+
+    async def test_stats_track_inserts(self, db):
+        """Single and batch inserts both update the aggregates."""
+        await sqlite.insert_log("a", make_log("a", sender="alpha", risk=90))
+        await sqlite.insert_logs(
+            [
+                make_log("b", sender="alpha", risk=10),
+                make_log("c", sender="beta", risk=60),
+                make_log("d", sender="alpha", risk=20, org="other-org"),
+            ]
+        )
+
+        stats = await sqlite.get_agent_stats(org="example-org")
+
+        assert stats["total_logs"] == 3
+        assert stats["total_alerts"] == 1
+        assert stats["active_agents"] == 2
+        assert stats["avg_risk_score"] == round(160 / 3, 2)
+        assert stats["top_senders"][0] == {"sender": "alpha", "count": 2, "avg_risk": 50.0}
+        assert stats["risk_distribution"] == {"low": 1, "medium": 1, "high": 1}
+
+    async def test_dropped_partitions_leave_stats(self, db):
+        """Retention subtracts a dropped partition's logs from the aggregates."""
+        await sqlite.insert_logs(
+            [
+                make_log("old", sender="alpha", risk=90, timestamp="2025-08-01T10:00:00+00:00"),
+                make_log("new", sender="alpha", risk=10, timestamp="2025-08-02T10:00:00+00:00"),
+                make_log("gone", sender="beta", risk=10, timestamp="2025-08-01T11:00:00+00:00"),
+            ]
+        )
+
+        await sqlite.drop_partitions_before("2025-08-02")
+        stats = await sqlite.get_agent_stats()
+
+        assert stats["total_logs"] == 1
+        assert stats["total_alerts"] == 0
+        assert stats["active_agents"] == 1
+
+    async def test_stats_backfilled_from_existing_logs(self, db):
+        """Logs stored before the aggregate table existed are counted."""
+        await sqlite.insert_logs([make_log(f"log-{i}", risk=85) for i in range(5)])
+        async with sqlite.write_connection() as conn:
+            await conn.execute("DROP TABLE agent_stats")
+            await conn.commit()
+
+        await sqlite.init_db()
+        stats = await sqlite.get_agent_stats()
+
+        assert stats["total_logs"] == 5
+        assert stats["total_alerts"] == 5
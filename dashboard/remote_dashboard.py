@@ -3,7 +3,7 @@ import requests
 import os
 import pandas as pd
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 
 st.set_page_config(page_title="SentinelMesh Remote Dashboard", layout="wide")
 
@@ -18,12 +18,30 @@ ALERTS_URL = f"{API_BASE}/alerts"
 API_TOKEN = os.getenv("SENTINELMESH_TOKEN", "rishit-org-token")
 HEADERS = {"Authorization": f"Bearer {API_TOKEN}"}
 
+# Filters are sent to the API and applied in the database, so each view
+# only downloads the rows it displays
+st.sidebar.header("🔎 Filters")
+sender = st.sidebar.text_input("Sender")
+receiver = st.sidebar.text_input("Receiver")
+context = st.sidebar.text_input("Context")
+since = st.sidebar.date_input("From", value=None)
+until = st.sidebar.date_input("To (inclusive)", value=None)
+
+FILTERS = {
+    "sender": sender.strip() or None,
+    "receiver": receiver.strip() or None,
+    "context": context.strip() or None,
+    "since": since.isoformat() if since else None,
+    "until": (until + timedelta(days=1)).isoformat() if until else None,
+}
+
 # Tabs
 tab1, tab2, tab3 = st.tabs(["📄 All Logs", "🚨 Alerts Only", "🧠 Agent Overview"])
 
-def fetch_data(url):
+def fetch_data(url, params=None):
+    params = {key: value for key, value in (params or {}).items() if value is not None}
     try:
-        res = requests.get(url, headers=HEADERS)
+        res = requests.get(url, headers=HEADERS, params=params)
         res.raise_for_status()
         return res.json().get("logs" if "logs" in url else "alerts", [])
     except Exception as e:
@@ -32,7 +50,7 @@ def fetch_data(url):
 
 # 📄 All Logs
 with tab1:
-    logs = fetch_data(LOGS_URL)
+    logs = fetch_data(LOGS_URL, FILTERS)
     if logs:
         df = pd.DataFrame(logs)
         df["Timestamp"] = pd.to_datetime(df.get("timestamp"), errors="coerce")
@@ -51,18 +69,18 @@ with tab1:
 with tab2:
     st.subheader("📉 Filter by Minimum Risk Score")
     min_risk = st.slider("Minimum Risk", min_value=0, max_value=100, value=80, step=5)
-    alerts = fetch_data(f"{ALERTS_URL}?min_risk={min_risk}")
+    alerts = fetch_data(ALERTS_URL, {**FILTERS, "min_risk": min_risk})
     if alerts:
         df = pd.DataFrame(alerts)
         df["Timestamp"] = pd.to_datetime(df.get("timestamp"), errors="coerce")
         df = df.dropna(subset=["Timestamp"]).sort_values("Timestamp", ascending=False)
         st.dataframe(df[["Timestamp", "sender", "receiver", "context", "payload", "risk"]], use_container_width=True)
     else:
-        st.info("No alerts found for selected risk level.")
+        st.info("No alerts found for selected risk level and filters.")
 
 # 🧠 Agent Overview
 with tab3:
-    logs = fetch_data(LOGS_URL)
+    # Same rows as the All Logs tab; no second request
     if logs:
         df = pd.DataFrame(logs)
         df["Timestamp"] = pd.to_datetime(df.get("timestamp"), errors="coerce")
@@ -1,15 +1,325 @@
 import requests
 import json
 import os
+import gzip
+import time
+import random
+import struct
+import zlib
+import asyncio
+import logging
+import threading
+from collections import deque
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # only needed by AsyncSentinelMeshLogSender
+    httpx = None
+
+logger = logging.getLogger("sentinelmesh.log_sender")
+
+# Buffered mode: events per POST /logs/batch request, and the longest an
+# event waits in the buffer before a partial batch is sent
+BATCH_SIZE = int(os.getenv("SENTINELMESH_SENDER_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.getenv("SENTINELMESH_SENDER_FLUSH_INTERVAL", "1.0"))
+# Events held in memory; further events are dropped (and counted)
+MAX_BUFFER = int(os.getenv("SENTINELMESH_SENDER_MAX_BUFFER", "10000"))
+# Compress batch bodies larger than GZIP_MIN_BYTES
+GZIP_BATCHES = os.getenv("SENTINELMESH_SENDER_GZIP", "true").lower() in ("1", "true", "yes")
+GZIP_MIN_BYTES = 1024
+# Seconds to wait for the API on each request
+REQUEST_TIMEOUT = float(os.getenv("SENTINELMESH_SENDER_TIMEOUT", "10"))
+# Directory of the on-disk spool for batches the API could not take (unset
+# disables spooling: such batches are dropped), and its size limit
+SPOOL_DIR = os.getenv("SENTINELMESH_SENDER_SPOOL_DIR")
+SPOOL_MAX_BYTES = int(float(os.getenv("SENTINELMESH_SENDER_SPOOL_MAX_MB", "256")) * 1024 * 1024)
+SPOOL_SEGMENT_BYTES = 4 * 1024 * 1024
+# Replay backoff after a failed attempt: doubles from the base up to the max
+REPLAY_BACKOFF_BASE = 0.5
+REPLAY_BACKOFF_MAX = 60.0
+
+# Spool record header: payload length and CRC-32 of the payload
+_RECORD_HEADER = struct.Struct(">II")
+
+
+def _is_retryable(error):
+    """Whether a failed batch may succeed later (outage, timeout, overload).
+
+    A 401 is final: the send paths already refreshed the token once, so the
+    credentials themselves were rejected. Bad URLs and other request errors
+    are final too, even though requests derives them from OSError.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return status in (408, 425, 429) or status >= 500
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class LogSpool:
+    """Append-only, segmented on-disk queue of event batches.
+
+    Each record is a batch serialized as JSON, prefixed by its length and
+    CRC-32, so records torn by a crash or corrupted on disk are detected
+    and skipped. Records are read in order from a cursor that is persisted
+    only after the batch was delivered: a crash replays, never loses, the
+    batch in flight. Once the spool holds more than ``max_bytes`` the
+    oldest segments are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=SPOOL_MAX_BYTES, segment_bytes=SPOOL_SEGMENT_BYTES, fsync=False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.appended = 0
+        self.acked = 0
+        self.corrupt = 0
+        self.dropped_bytes = 0
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._has_data = threading.Event()
+
+        self._cursor_path = self.directory / "cursor.json"
+        self._segments = sorted(self.directory.glob("spool-*.log"))
+        self._cursor = (self._segments[0].name, 0) if self._segments else None
+        if self._cursor_path.exists():
+            try:
+                saved = json.loads(self._cursor_path.read_text())
+                if (self.directory / saved["segment"]) in self._segments:
+                    self._cursor = (saved["segment"], saved["offset"])
+            except (ValueError, KeyError):
+                logger.warning("Ignoring unreadable spool cursor")
+        if self._cursor is not None:
+            start = self._segments.index(self.directory / self._cursor[0])
+            for segment in self._segments[:start]:
+                segment.unlink()
+            self._segments = self._segments[start:]
+            self.pending = self._count_records(self._segments)
+        self._size = sum(segment.stat().st_size for segment in self._segments)
+        # Always write to a fresh segment, so a torn tail left by a crash
+        # is never appended to
+        self._active = None
+        self._open_segment()
+        if self.pending:
+            self._has_data.set()
+
+    def _count_records(self, segments):
+        """Unacknowledged records in ``segments``.
+
+        Only records with a complete payload count: ``peek`` skips a torn
+        tail without acknowledging it, so counting it would leave
+        ``pending`` above zero forever.
+        """
+        count = 0
+        for segment in segments:
+            offset = self._cursor[1] if segment.name == self._cursor[0] else 0
+            with open(segment, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                f.seek(offset)
+                while True:
+                    header = f.read(_RECORD_HEADER.size)
+                    if len(header) < _RECORD_HEADER.size:
+                        break
+                    length, _ = _RECORD_HEADER.unpack(header)
+                    offset += _RECORD_HEADER.size + length
+                    if offset > size:
+                        break
+                    f.seek(offset)
+                    count += 1
+        return count
+
+    def _open_segment(self):
+        if self._active is not None:
+            self._active.close()
+        number = int(self._segments[-1].stem.split("-")[1]) + 1 if self._segments else 1
+        path = self.directory / f"spool-{number:012d}.log"
+        self._active = open(path, "ab")
+        self._segments.append(path)
+        if self._cursor is None:
+            self._cursor = (path.name, 0)
+
+    def append(self, batch):
+        """Write one batch to the end of the spool."""
+        payload = json.dumps(batch).encode("utf-8")
+        record = _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._active.tell() >= self.segment_bytes:
+                self._open_segment()
+            self._active.write(record)
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+            self._size += len(record)
+            self.appended += 1
+            self.pending += 1
+            self._enforce_limit()
+        self._has_data.set()
+
+    def _enforce_limit(self):
+        while self._size > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(0)
+            size = oldest.stat().st_size
+            dropped = self._count_records([oldest])
+            oldest.unlink()
+            self._size -= size
+            self.dropped_bytes += size
+            self.pending -= dropped
+            if self._cursor[0] == oldest.name:
+                self._save_cursor((self._segments[0].name, 0))
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped {dropped} batches from {oldest.name}")
+
+    def peek(self):
+        """Return ``(position, batch)`` for the oldest unacknowledged batch,
+        or None when the spool is empty."""
+        with self._lock:
+            while True:
+                name, offset = self._cursor
+                path = self.directory / name
+                active = path == self._segments[-1]
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    header = f.read(_RECORD_HEADER.size)
+                    if len(header) == _RECORD_HEADER.size:
+                        length, checksum = _RECORD_HEADER.unpack(header)
+                        payload = f.read(length)
+                        end = offset + _RECORD_HEADER.size + length
+                        if len(payload) == length:
+                            if zlib.crc32(payload) == checksum:
+                                try:
+                                    return (name, end), json.loads(payload)
+                                except ValueError:
+                                    pass
+                            self._skip_corrupt(name, end)
+                            continue
+                if active:
+                    self._has_data.clear()
+                    return None
+                # End of a finished segment (or a torn tail): move on
+                self._drop_segment(path)
+
+    def _skip_corrupt(self, name, end):
+        logger.warning(f"Skipping corrupt spool record in {name}")
+        self.corrupt += 1
+        self.pending -= 1
+        self._save_cursor((name, end))
+
+    def _drop_segment(self, path):
+        self._segments.remove(path)
+        self._size -= path.stat().st_size
+        path.unlink()
+        self._save_cursor((self._segments[0].name, 0))
+
+    def ack(self, position):
+        """Mark the batch read at ``position`` as delivered."""
+        with self._lock:
+            if (self.directory / position[0]) not in self._segments:
+                return  # already dropped by the size limit
+            self.acked += 1
+            self.pending -= 1
+            self._save_cursor(position)
+
+    def _save_cursor(self, position):
+        self._cursor = position
+        tmp = self._cursor_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segment": position[0], "offset": position[1]}))
+        os.replace(tmp, self._cursor_path)
+
+    def wait(self, timeout=None):
+        """Block until a batch may be available or ``timeout`` passes."""
+        return self._has_data.wait(timeout)
+
+    def wake(self):
+        self._has_data.set()
+
+    def close(self):
+        with self._lock:
+            self._active.close()
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "bytes": self._size,
+            "segments": len(self._segments),
+            "appended": self.appended,
+            "acked": self.acked,
+            "corrupt": self.corrupt,
+            "dropped_bytes": self.dropped_bytes,
+        }
+
+
 class SentinelMeshLogSender:
-    def __init__(self, api_base=None, username=None, password=None, access_token=None):
+    """Send agent events to the SentinelMesh API.
+
+    ``send_log`` posts one event and waits for the result. For agents that
+    log on their hot path, call ``start()`` and then ``log()``: events are
+    buffered in memory and a background thread sends them to
+    ``/logs/batch`` whenever ``batch_size`` are waiting or ``flush_interval``
+    seconds have passed, over one pooled connection. Tokens are refreshed
+    before they expire and once more on a 401.
+
+    With ``spool_dir`` set, batches the API cannot take right now (network
+    errors, timeouts, 5xx, 429) and overflow of a full buffer go to a
+    LogSpool on disk instead of being dropped. A replayer thread delivers
+    them oldest first, backing off exponentially while the API keeps
+    failing; while the spool is not empty, new batches queue behind it.
+    """
+
+    def __init__(self, api_base=None, username=None, password=None, access_token=None,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_buffer=MAX_BUFFER,
+                 gzip_batches=GZIP_BATCHES, timeout=REQUEST_TIMEOUT,
+                 spool_dir=SPOOL_DIR, spool_max_bytes=SPOOL_MAX_BYTES):
         self.api_base = api_base or os.getenv("SENTINELMESH_API_BASE", "https://sentinelmesh-api.onrender.com")
         self._username = username
         self._password = password
         self._access_token = access_token
         self._token_expiry = None
+        # The sender and replayer threads share the token; only one of them
+        # logs in at a time
+        self._token_lock = threading.RLock()
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.gzip_batches = gzip_batches
+        self.timeout = timeout
+
+        # Counters for buffered mode
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.spooled = 0
+        self.replayed = 0
+
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=4))
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=4))
+
+        self._buffer = deque()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._flush_requested = False
+        self._thread = None
+
+        self._spool = LogSpool(spool_dir, spool_max_bytes) if spool_dir else None
+        self._replayer = None
+        self._replay_stop = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def _is_token_valid(self):
         if not self._access_token or not self._token_expiry:
@@ -30,36 +340,39 @@ class SentinelMeshLogSender:
             print(f"Error decoding JWT: {e}")
             return None
 
+    def _store_token(self, token_data):
+        self._access_token = token_data["access_token"]
+        decoded_token = self._decode_jwt(self._access_token)
+        if decoded_token: self._token_expiry = decoded_token["exp"]
+        return self._access_token
+
     def get_access_token(self, username=None, password=None):
         """Obtains an access token from the API, refreshing if necessary."""
-        if username: self._username = username
-        if password: self._password = password
+        with self._token_lock:
+            if username: self._username = username
+            if password: self._password = password
 
-        if self._access_token and self._is_token_valid():
-            return self._access_token
+            if self._access_token and self._is_token_valid():
+                return self._access_token
 
-        if not self._username or not self._password:
-            raise ValueError("Username and password must be provided for token acquisition.")
+            if not self._username or not self._password:
+                raise ValueError("Username and password must be provided for token acquisition.")
 
-        token_url = f"{self.api_base}/token"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-        data = {
-            "username": self._username,
-            "password": self._password
-        }
-        try:
-            response = requests.post(token_url, headers=headers, data=data)
-            response.raise_for_status() # Raise an exception for HTTP errors
-            token_data = response.json()
-            self._access_token = token_data["access_token"]
-            decoded_token = self._decode_jwt(self._access_token)
-            if decoded_token: self._token_expiry = decoded_token["exp"]
-            return self._access_token
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting access token: {e}")
-            raise
+            token_url = f"{self.api_base}/token"
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded"
+            }
+            data = {
+                "username": self._username,
+                "password": self._password
+            }
+            try:
+                response = self._session.post(token_url, headers=headers, data=data, timeout=self.timeout)
+                response.raise_for_status() # Raise an exception for HTTP errors
+                return self._store_token(response.json())
+            except requests.exceptions.RequestException as e:
+                print(f"Error getting access token: {e}")
+                raise
 
     def send_log(self, log_data):
         """Sends log data to the API."""
@@ -70,22 +383,23 @@ class SentinelMeshLogSender:
         if not self._access_token:
             raise Exception("Failed to obtain access token for sending log.")
 
+        token = self._access_token
         logs_url = f"{self.api_base}/log" # Use /log for POST
         headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {self._access_token}"
+            "Authorization": f"Bearer {token}"
         }
         try:
-            response = requests.post(logs_url, headers=headers, data=json.dumps(log_data))
+            response = self._session.post(logs_url, headers=headers, data=json.dumps(log_data), timeout=self.timeout)
             response.raise_for_status() # Raise an exception for HTTP errors
             return response.json()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401: # Token might have just expired
                 print("401 Unauthorized. Attempting token refresh and retry...")
-                self._access_token = None # Invalidate current token
+                self._invalidate_token(token) # Unless another thread already refreshed it
                 self.get_access_token() # Get a new token
                 headers["Authorization"] = f"Bearer {self._access_token}"
-                response = requests.post(logs_url, headers=headers, data=json.dumps(log_data))
+                response = self._session.post(logs_url, headers=headers, data=json.dumps(log_data), timeout=self.timeout)
                 response.raise_for_status()
                 return response.json()
             else:
@@ -95,6 +409,343 @@ class SentinelMeshLogSender:
             print(f"Request Error sending log: {e}")
             raise
 
+    # Buffered mode
+
+    def start(self):
+        """Start the background thread that sends buffered events."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="sentinelmesh-log-sender", daemon=True)
+        self._thread.start()
+        self._start_replayer()
+
+    def log(self, log_data):
+        """Buffer one event for the next batch and return immediately.
+
+        Returns False if the buffer is full (and there is no spool to spill
+        it to) and the event was dropped. Events without a ``timestamp`` are
+        stamped now, so buffering or spooling does not delay their time.
+        """
+        if not log_data.get("timestamp"):
+            log_data = {**log_data, "timestamp": datetime.now(timezone.utc).isoformat()}
+        if len(self._buffer) >= self.max_buffer and not self._spill():
+            self.dropped += 1
+            return False
+        self._buffer.append(log_data)
+        self._buffered()
+        return True
+
+    def _buffered(self):
+        if len(self._buffer) >= self.batch_size:
+            with self._cond:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Send (or spool) everything buffered so far; returns False on timeout."""
+        if self._thread is None:
+            while self._buffer:
+                self._send_next_batch()
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._buffer or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Flush buffered events, then stop the background thread."""
+        self.flush(timeout)
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            self._thread.join(timeout)
+            self._thread = None
+        self._stop_replayer(timeout)
+        self._session.close()
+
+    def stats(self):
+        stats = {
+            "buffered": len(self._buffer),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+        }
+        if self._spool is not None:
+            stats["spool"] = self._spool.stats()
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Wait for a full batch, a flush, or the end of the interval
+                self._cond.wait_for(
+                    lambda: self._stopping or self._flush_requested or len(self._buffer) >= self.batch_size,
+                    self.flush_interval,
+                )
+                if self._stopping and not self._buffer:
+                    return
+                self._flush_requested = False
+            while self._buffer:
+                self._send_next_batch()
+                with self._cond:
+                    self._cond.notify_all()
+
+    def _take_batch(self):
+        # Under the lock so flush() never sees the batch in neither place
+        with self._cond:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            self._in_flight = len(batch)
+        return batch
+
+    def _invalidate_token(self, token):
+        """Forget ``token`` after a 401, unless another thread already
+        replaced it, so concurrent 401s lead to a single login."""
+        with self._token_lock:
+            if self._access_token == token:
+                self._access_token = None
+
+    def _batch_token(self):
+        """Token for the next batch: refreshed when credentials are known,
+        otherwise whatever token (if any) the sender was given."""
+        if self._username and self._password and not self._is_token_valid():
+            return self.get_access_token()
+        return self._access_token
+
+    def _encode_batch(self, batch):
+        """Serialize a batch, gzipped when large enough to be worth it."""
+        body = json.dumps(batch).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_batches and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def _send_next_batch(self):
+        batch = self._take_batch()
+        try:
+            if self._spool_backlogged():
+                self._spool_batch(batch)
+            else:
+                self._post_batch(batch)
+                self.sent += len(batch)
+                self.batches += 1
+        except Exception as e:
+            self._batch_failed(batch, e)
+        finally:
+            self._in_flight = 0
+
+    def _post_batch(self, batch):
+        body, headers = self._encode_batch(batch)
+        url = f"{self.api_base}/logs/batch"
+        for attempt in range(2):
+            token = self._batch_token()
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            response = self._session.post(url, headers=headers, data=body, timeout=self.timeout)
+            if response.status_code == 401 and attempt == 0 and self._password:
+                self._invalidate_token(token) # Refresh once, then give up
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def _batch_failed(self, batch, error):
+        if self._spool is not None and _is_retryable(error):
+            logger.warning(f"Spooling batch of {len(batch)} events: {error}")
+            self._spool_batch(batch)
+            return
+        self.failed += len(batch)
+        logger.warning(f"Dropped batch of {len(batch)} events: {error}")
+
+    # Spool
+
+    def _spool_backlogged(self):
+        """Whether earlier batches are still waiting in the spool. New ones
+        then queue behind them instead of waiting out another timeout."""
+        return self._spool is not None and self._spool.pending > 0
+
+    def _spool_batch(self, batch):
+        self._spool.append(batch)
+        self.spooled += len(batch)
+
+    def _spill(self):
+        """Make room in a full buffer by spooling its oldest batch."""
+        if self._spool is None:
+            return False
+        with self._cond:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        self._spool_batch(batch)
+        return True
+
+    def _start_replayer(self):
+        if self._spool is None or self._replayer is not None:
+            return
+        self._replay_stop.clear()
+        self._replayer = threading.Thread(target=self._replay, name="sentinelmesh-log-replayer", daemon=True)
+        self._replayer.start()
+
+    def _stop_replayer(self, timeout=None):
+        if self._replayer is not None:
+            self._replay_stop.set()
+            self._spool.wake()
+            self._replayer.join(timeout)
+            self._replayer = None
+        if self._spool is not None:
+            self._spool.close()
+
+    def _replay(self):
+        """Deliver spooled batches oldest first, backing off while the API fails."""
+        delay = 0.0
+        while not self._replay_stop.is_set():
+            item = self._spool.peek()
+            if item is None:
+                self._spool.wait(self.flush_interval)
+                continue
+            position, batch = item
+            try:
+                self._post_batch(batch)
+            except Exception as e:
+                if _is_retryable(e):
+                    delay = min(REPLAY_BACKOFF_MAX, delay * 2 or REPLAY_BACKOFF_BASE)
+                    logger.warning(f"Spool replay failed, retrying in {delay:.1f}s: {e}")
+                    self._replay_stop.wait(delay * random.uniform(0.5, 1.0))
+                    continue
+                self.failed += len(batch)
+                logger.warning(f"Discarding spooled batch of {len(batch)} events: {e}")
+            else:
+                self.replayed += len(batch)
+                delay = 0.0
+            self._spool.ack(position)
+
+
+class AsyncSentinelMeshLogSender(SentinelMeshLogSender):
+    """Buffered sender for agents running on asyncio.
+
+    ``log()`` is synchronous and only appends to the buffer; a task on the
+    running loop sends batches through a pooled ``httpx.AsyncClient``.
+    Spooled batches are replayed by the same background thread as in the
+    synchronous sender. Requires the ``httpx`` package.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if httpx is None:
+            raise ImportError("AsyncSentinelMeshLogSender requires httpx (pip install httpx)")
+        super().__init__(*args, **kwargs)
+        self._client = None
+        self._task = None
+        self._wakeup = None
+        self._idle = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._client = httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_connections=4))
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        self._start_replayer()
+
+    def _buffered(self):
+        if self._idle is None:
+            return  # not started; flushed once start() runs
+        self._idle.clear()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self, timeout=None):
+        """Wait until everything buffered was sent (or spooled); returns
+        False on timeout. Before ``start()`` nothing is sent, and this only
+        reports whether the buffer is empty."""
+        if self._task is None or (not self._buffer and not self._in_flight):
+            return not self._buffer
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout=None):
+        if self._task is not None:
+            await self.flush(timeout)
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # The replayer is a thread; joining it must not block the loop
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_replayer, timeout)
+        self._session.close()
+
+    async def _run(self):
+        while not (self._stopping and not self._buffer):
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._buffer:
+                batch = self._take_batch()
+                try:
+                    if self._spool_backlogged():
+                        self._spool_batch(batch)
+                    else:
+                        await self._post_batch_async(batch)
+                        self.sent += len(batch)
+                        self.batches += 1
+                except Exception as e:
+                    self._batch_failed(batch, e)
+                finally:
+                    self._in_flight = 0
+            self._idle.set()
+
+    async def _batch_token_async(self):
+        if not (self._username and self._password) or self._is_token_valid():
+            return self._access_token
+        response = await self._client.post(
+            f"{self.api_base}/token",
+            data={"username": self._username, "password": self._password},
+        )
+        response.raise_for_status()
+        return self._store_token(response.json())
+
+    async def _post_batch_async(self, batch):
+        body, headers = self._encode_batch(batch)
+        url = f"{self.api_base}/logs/batch"
+        for attempt in range(2):
+            token = await self._batch_token_async()
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+            response = await self._client.post(url, headers=headers, content=body)
+            if response.status_code == 401 and attempt == 0 and self._password:
+                self._invalidate_token(token)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+
 # Example Usage (for testing the module directly)
 if __name__ == "__main__":
     from datetime import timedelta
@@ -0,0 +1,221 @@
+# sentinelmesh/cli/alert_dispatcher.py
+
+import time
+import random
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Alerts for the same sender and rule within this many seconds are sent as
+# one summary message
+COALESCE_WINDOW = 10.0
+# Minimum seconds between two webhook posts (Discord allows about 30/min)
+MIN_INTERVAL = 2.0
+# Distinct (sender, rule) groups waiting to be sent; alerts for new groups
+# beyond this are dropped and counted
+MAX_GROUPS = 1000
+# Attempts per message for network errors and 5xx responses; 429s wait for
+# Retry-After and do not count
+MAX_ATTEMPTS = 5
+# Longest payload excerpt quoted in a message
+PAYLOAD_EXCERPT = 500
+
+
+def _rule_name(alert):
+    if isinstance(alert, dict):
+        return str(alert.get("rule_id") or alert.get("type") or "unknown")
+    return str(alert)
+
+
+def _retry_after(response):
+    """Seconds to wait before retrying, from Retry-After or a Discord body."""
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    try:
+        return max(0.0, float(response.json().get("retry_after")))
+    except (ValueError, TypeError, AttributeError):
+        return 1.0
+
+
+class _Group:
+    __slots__ = ("sender", "rule", "count", "max_risk", "receivers", "payload", "due")
+
+    def __init__(self, sender, rule, due):
+        self.sender = sender
+        self.rule = rule
+        self.count = 0
+        self.max_risk = 0
+        self.receivers = OrderedDict()
+        self.payload = ""
+        self.due = due
+
+
+class AlertDispatcher:
+    """Send webhook alerts from a background thread, coalesced and rate limited.
+
+    ``submit`` only updates an in-memory group keyed by sender and rule and
+    returns at once. A group is sent as one summary message ``window``
+    seconds after its first alert, so a burst of identical alerts becomes a
+    single post. Posts are spaced at least ``min_interval`` seconds apart;
+    429 responses pause sending for as long as ``Retry-After`` (or Discord's
+    ``retry_after``) asks, and an exhausted ``X-RateLimit-Remaining`` bucket
+    waits for ``X-RateLimit-Reset-After``.
+    """
+
+    def __init__(self, webhook_url, window=COALESCE_WINDOW, min_interval=MIN_INTERVAL,
+                 max_groups=MAX_GROUPS, timeout=10, session=None):
+        self.webhook_url = webhook_url
+        self.window = window
+        self.min_interval = min_interval
+        self.max_groups = max_groups
+        self.timeout = timeout
+        self._session = session or requests.Session()
+
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+        self._groups = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._next_post = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="sentinelmesh-alerts", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Send every pending group now, then stop the thread."""
+        if self._thread is not None:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, msg, alerts, risk):
+        """Queue one alerting message; returns False if it had to be dropped."""
+        sender = msg.get("sender", "unknown")
+        accepted = True
+        with self._cond:
+            self.submitted += 1
+            for rule in dict.fromkeys(_rule_name(alert) for alert in alerts or ["unknown"]):
+                group = self._groups.get((sender, rule))
+                if group is None:
+                    if len(self._groups) >= self.max_groups:
+                        self.dropped += 1
+                        accepted = False
+                        continue
+                    group = self._groups[(sender, rule)] = _Group(sender, rule, time.monotonic() + self.window)
+                    self._cond.notify_all()
+                group.count += 1
+                group.max_risk = max(group.max_risk, risk)
+                group.receivers[msg.get("receiver", "unknown")] = None
+                group.payload = str(msg.get("payload", ""))
+        return accepted
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._groups)
+        return {
+            "submitted": self.submitted,
+            "pending_groups": pending,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+        }
+
+    def _take_due(self):
+        """Wait for the oldest group to come due and remove it; None once
+        stopped with nothing left to send."""
+        with self._cond:
+            while True:
+                if self._groups:
+                    key, group = next(iter(self._groups.items()))
+                    delay = group.due - time.monotonic()
+                    if delay <= 0 or self._stopping:
+                        del self._groups[key]
+                        return group
+                    self._cond.wait(delay)
+                elif self._stopping:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while (group := self._take_due()) is not None:
+            self._deliver(self._format(group))
+
+    def _format(self, group):
+        receivers = list(group.receivers)
+        shown = ", ".join(receivers[:5]) + (f" (+{len(receivers) - 5} more)" if len(receivers) > 5 else "")
+        payload = group.payload
+        if len(payload) > PAYLOAD_EXCERPT:
+            payload = payload[:PAYLOAD_EXCERPT] + "…"
+        if group.count == 1:
+            header = "🚨 **SentinelMesh Alert**"
+            risk = f"**Risk:** {group.max_risk}/100"
+        else:
+            header = f"🚨 **SentinelMesh Alert** ×{group.count} in {self.window:g}s"
+            risk = f"**Max risk:** {group.max_risk}/100"
+        return {
+            "content": f"""{header}
+**Sender:** {group.sender}
+**Receiver:** {shown}
+**Rule:** {group.rule}
+{risk}
+**Payload:** {payload}"""
+        }
+
+    def _deliver(self, payload):
+        attempt = 0
+        while attempt < MAX_ATTEMPTS:
+            # Rate limits are honoured even while stopping; stop(timeout)
+            # bounds how long the caller waits for them
+            wait = self._next_post - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_post = time.monotonic() + self.min_interval
+            try:
+                response = self._session.post(self.webhook_url, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = e
+            else:
+                if response.status_code == 429:
+                    self.rate_limited += 1
+                    self._next_post = time.monotonic() + _retry_after(response)
+                    error = "rate limited"
+                    continue
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    try:
+                        reset = float(response.headers.get("X-RateLimit-Reset-After", 0))
+                        self._next_post = max(self._next_post, time.monotonic() + reset)
+                    except ValueError:
+                        pass
+                if response.status_code < 500:
+                    if response.ok:
+                        self.sent += 1
+                    else:
+                        self.failed += 1
+                        print(f"⚠️ Webhook rejected alert: {response.status_code} {response.text[:200]}")
+                    return
+                error = f"HTTP {response.status_code}"
+            self._next_post = max(self._next_post, time.monotonic() + min(30.0, 0.5 * 2 ** attempt * random.uniform(1, 1.5)))
+            attempt += 1
+        self.failed += 1
+        print(f"⚠️ Failed to send webhook alert: {error}")
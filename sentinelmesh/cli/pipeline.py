@@ -0,0 +1,208 @@
+# sentinelmesh/cli/pipeline.py
+
+import os
+import json
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import httpx
+
+API_BASE = os.getenv("SENTINELMESH_API_BASE", "http://localhost:8000")
+
+# Messages per POST /logs/batch (the API accepts up to 1000 by default), the
+# longest a partial batch waits, and how many batches may be in flight
+BATCH_SIZE = int(os.getenv("SENTINELMESH_CLI_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("SENTINELMESH_CLI_FLUSH_INTERVAL", "0.2"))
+MAX_IN_FLIGHT = int(os.getenv("SENTINELMESH_CLI_MAX_IN_FLIGHT", "4"))
+
+# Bytes read from the log per chunk, and chunks buffered between stages
+READ_CHUNK_BYTES = 256 * 1024
+QUEUE_SIZE = 16
+# Alerts waiting for on_alert; more are dropped so alerting never stalls tailing
+ALERT_QUEUE_SIZE = 1000
+# Attempts per batch before it is given up
+FORWARD_ATTEMPTS = 3
+
+_DONE = object()
+
+
+class ForwardingPipeline:
+    """Stream log lines to the API through parse, score, forward and alert stages.
+
+    A reader thread pulls chunks of lines from a LogTailer. On the event
+    loop, each chunk is parsed and scored with ``score(msg) -> (alerts,
+    risk)``; scored messages are grouped into batches for ``/logs/batch``
+    and sent over one pooled HTTP client with at most ``max_in_flight``
+    requests outstanding. Alerting messages are handed to
+    ``on_alert(msg, alerts, risk)`` on a worker thread so slow webhooks
+    never hold up forwarding. The stages are joined by bounded queues, so
+    a slow API slows down reading instead of growing memory.
+    """
+
+    def __init__(self, tailer, score, on_alert=None, api_base=API_BASE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_in_flight=MAX_IN_FLIGHT, headers=None):
+        self.tailer = tailer
+        self.score = score
+        self.on_alert = on_alert
+        self.api_base = api_base
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.headers = headers or {}
+
+        self.lines = 0
+        self.invalid = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.batches = 0
+        self.alerts = 0
+        self.alerts_dropped = 0
+
+    def stats(self):
+        return {
+            "lines": self.lines,
+            "invalid": self.invalid,
+            "forwarded": self.forwarded,
+            "failed": self.failed,
+            "batches": self.batches,
+            "alerts": self.alerts,
+            "alerts_dropped": self.alerts_dropped,
+        }
+
+    async def run(self, stop=None, follow=True):
+        """Run until ``stop`` (a threading.Event) is set, or, with
+        ``follow=False``, until the end of the file is reached."""
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(QUEUE_SIZE)
+        scored = asyncio.Queue(QUEUE_SIZE)
+        alerts = asyncio.Queue(ALERT_QUEUE_SIZE)
+        stop = stop or threading.Event()
+
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(base_url=self.api_base, headers=self.headers, limits=limits, timeout=30) as client:
+            reader = loop.run_in_executor(None, self._read, loop, chunks, stop, follow)
+            try:
+                await asyncio.gather(
+                    self._parse_and_score(chunks, scored, alerts),
+                    self._forward(client, scored),
+                    self._alert(loop, alerts),
+                )
+            finally:
+                stop.set()
+                # If a stage failed, nobody consumes chunks any more: keep the
+                # queue drained so the reader can push its end marker and exit
+                while not reader.done():
+                    while not chunks.empty():
+                        chunks.get_nowait()
+                    await asyncio.wait({reader}, timeout=0.05)
+
+    # Stages
+
+    def _read(self, loop, chunks, stop, follow):
+        """Reader thread: push chunks of new lines, blocking while the queue is full."""
+        try:
+            while not stop.is_set():
+                offset = self.tailer.offset
+                lines = self.tailer.read_lines(READ_CHUNK_BYTES)
+                if lines:
+                    asyncio.run_coroutine_threadsafe(chunks.put(lines), loop).result()
+                elif self.tailer.offset == offset:
+                    if not follow:
+                        break
+                    self.tailer.wait()
+        finally:
+            asyncio.run_coroutine_threadsafe(chunks.put(_DONE), loop).result()
+
+    async def _parse_and_score(self, chunks, scored, alerts):
+        while (chunk := await chunks.get()) is not _DONE:
+            messages = []
+            # Lines read together share one receive timestamp
+            timestamp = datetime.now(timezone.utc).isoformat()
+            for line in chunk:
+                self.lines += 1
+                try:
+                    msg = json.loads(line)
+                except json.JSONDecodeError:
+                    self.invalid += 1
+                    continue
+                if not isinstance(msg, dict):
+                    self.invalid += 1
+                    continue
+                msg["timestamp"] = timestamp
+                found, risk = self.score(msg)
+                msg["risk"] = risk  # Attach risk score before sending to API
+                messages.append(msg)
+                if found and self.on_alert is not None:
+                    try:
+                        alerts.put_nowait((msg, found, risk))
+                    except asyncio.QueueFull:
+                        self.alerts_dropped += 1
+            if messages:
+                await scored.put(messages)
+            # Let the forwarder and alerter run between chunks
+            await asyncio.sleep(0)
+        await scored.put(_DONE)
+        await alerts.put(_DONE)
+
+    async def _forward(self, client, scored):
+        slots = asyncio.Semaphore(self.max_in_flight)
+        sending = set()
+        batch = []
+
+        async def send(messages):
+            try:
+                await self._post(client, messages)
+            finally:
+                slots.release()
+
+        async def dispatch(messages):
+            # Waits while max_in_flight batches are outstanding
+            await slots.acquire()
+            task = asyncio.create_task(send(messages))
+            sending.add(task)
+            task.add_done_callback(sending.discard)
+
+        while True:
+            try:
+                messages = await asyncio.wait_for(scored.get(), self.flush_interval if batch else None)
+            except asyncio.TimeoutError:
+                await dispatch(batch)
+                batch = []
+                continue
+            if messages is _DONE:
+                break
+            batch.extend(messages)
+            while len(batch) >= self.batch_size:
+                await dispatch(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+        if batch:
+            await dispatch(batch)
+        if sending:
+            await asyncio.gather(*sending)
+
+    async def _post(self, client, messages):
+        for attempt in range(FORWARD_ATTEMPTS):
+            try:
+                response = await client.post("/logs/batch", json=messages)
+                response.raise_for_status()
+                self.forwarded += len(messages)
+                self.batches += 1
+                return
+            except httpx.HTTPError as e:
+                error = e
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                if status is not None and status < 500 and status != 429:
+                    break  # the API rejected the batch; retrying will not help
+                if attempt + 1 < FORWARD_ATTEMPTS:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        self.failed += len(messages)
+        print(f"⚠️ Failed to stream {len(messages)} messages to API: {error}")
+
+    async def _alert(self, loop, alerts):
+        while (item := await alerts.get()) is not _DONE:
+            self.alerts += 1
+            try:
+                await loop.run_in_executor(None, self.on_alert, *item)
+            except Exception as e:
+                print(f"⚠️ Alert handler failed: {e}")
@@ -1,18 +1,18 @@
 # sentinelmesh/cli/sentinel_cli.py
 
 import sys
-import json
-from time import sleep
+import asyncio
 from pathlib import Path
-import requests
 import yaml
-from datetime import datetime
 
 # Add project root to path for clean imports
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from sentinelmesh.rules.rule_engine import check_all_rules
 from sentinelmesh.monitor.agent_tracker import AgentTracker
+from sentinelmesh.monitor.log_tailer import LogTailer
+from sentinelmesh.cli.pipeline import ForwardingPipeline
+from sentinelmesh.cli.alert_dispatcher import AlertDispatcher, COALESCE_WINDOW, MIN_INTERVAL
 
 LOG_FILE = Path(__file__).resolve().parents[1] / "logs/mcp_traffic.log"
 
@@ -24,86 +24,75 @@ def load_webhook_settings():
     with open(WEBHOOK_CONFIG, "r") as f:
         return yaml.safe_load(f)
 
-def post_alert(message, risk, webhook):
-    payload = {
-        "content": f"""🚨 **SentinelMesh Alert**
-**Sender:** {message['sender']}
-**Receiver:** {message['receiver']}
-**Risk:** {risk}/100
-**Payload:** {message['payload']}"""
-    }
-    try:
-        requests.post(webhook, json=payload)
-    except Exception as e:
-        print(f"⚠️ Failed to send webhook alert: {e}")
+def report_alert(msg, alerts, risk, dispatcher=None, risk_threshold=100):
+    """Print an alert and queue it for the webhook dispatcher."""
+    sender = msg.get("sender", "unknown")
+    receiver = msg.get("receiver", "unknown")
+    if dispatcher is not None and risk >= risk_threshold:
+        dispatcher.submit(msg, alerts, risk)
+    print(f"\n⚠️ ALERT for message: {sender} ➡️ {receiver}")
+    for alert in alerts:
+        print(f"   → {alert}")
+    print(f"   🔥 Risk Score: {risk}/100")
+    if risk >= 80:
+        print("   🚨 SEVERE: Immediate review recommended.")
+    elif risk >= 50:
+        print("   ⚠️ Moderate risk.")
+    else:
+        print("   ✅ Low risk.")
 
 
 def tail_log():
-    seen = set()
     tracker = AgentTracker()
+    flagged = set()
     webhook_config = load_webhook_settings()
     webhook_url = webhook_config.get("webhook_url") if webhook_config else None
     risk_threshold = webhook_config.get("min_risk_threshold", 100) if webhook_config else 100
-
-
-    while True:
-        if not LOG_FILE.exists():
-            sleep(1)
-            continue
-
-        with open(LOG_FILE, "r") as f:
-            for line in f:
-                if line in seen:
-                    continue
-                seen.add(line)
-
-                try:
-                    msg = json.loads(line)
-                    msg["timestamp"] = datetime.utcnow().isoformat()
-                    import requests
-
-                    try:
-                        requests.post("http://localhost:8000/log", json=msg)
-                    except Exception as e:
-                        print("⚠️ Failed to stream to API:", e)
-
-                    sender = msg.get("sender", "unknown")
-                    receiver = msg.get("receiver", "unknown")
-
-                    # Record agent communication
-                    tracker.record_message(sender, receiver)
-
-                    # Security rules
-                    alerts, risk = check_all_rules(msg)
-                    msg["risk"] = risk  # Attach risk score before sending to API
-                    requests.post("http://localhost:8000/log", json=msg)
-                    if alerts:
-                        if webhook_url and risk >= risk_threshold:
-                            post_alert(msg, risk, webhook_url)
-                        print(f"\n⚠️ ALERT for message: {sender} ➡️ {receiver}")
-                        for alert in alerts:
-                            print(f"   → {alert}")
-                        print(f"   🔥 Risk Score: {risk}/100")
-                        if risk >= 80:
-                            print("   🚨 SEVERE: Immediate review recommended.")
-                        elif risk >= 50:
-                            print("   ⚠️ Moderate risk.")
-                        else:
-                            print("   ✅ Low risk.")
-
-
-                    # Agent-based heuristics
-                    if tracker.is_new_sender(sender):
-                        print(f"⚠️ New sender detected: {sender}")
-
-                    if tracker.is_suspicious_volume(sender):
-                        count = len(tracker.agent_history[sender])
-                        print(f"🚨 High volume from {sender} — {count} messages observed.")
-
-                except json.JSONDecodeError:
-                    continue
-
-        sleep(2)
+    dispatcher = None
+    if webhook_url:
+        # Alerts are grouped per sender and rule and posted from a background
+        # thread, so a burst becomes one summary message per window
+        dispatcher = AlertDispatcher(
+            webhook_url,
+            window=webhook_config.get("coalesce_window_seconds", COALESCE_WINDOW),
+            min_interval=webhook_config.get("min_interval_seconds", MIN_INTERVAL),
+        )
+        dispatcher.start()
+
+    def score(msg):
+        sender = msg.get("sender", "unknown")
+        receiver = msg.get("receiver", "unknown")
+
+        # Record agent communication
+        tracker.record_message(sender, receiver)
+
+        # Agent-based heuristics
+        if tracker.is_new_sender(sender):
+            print(f"⚠️ New sender detected: {sender}")
+        if sender not in flagged and tracker.is_suspicious_volume(sender):
+            flagged.add(sender)
+            count = len(tracker.agent_history[sender])
+            print(f"🚨 High volume from {sender} — {count} messages observed.")
+
+        # Security rules
+        return check_all_rules(msg)
+
+    def on_alert(msg, alerts, risk):
+        report_alert(msg, alerts, risk, dispatcher, risk_threshold)
+
+    # Only lines appended since the last read are processed, so repeated
+    # identical messages are all seen and the cost follows the new bytes
+    pipeline = ForwardingPipeline(LogTailer(LOG_FILE), score, on_alert=on_alert)
+    try:
+        asyncio.run(pipeline.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if dispatcher is not None:
+            dispatcher.stop(timeout=30)
+    print(f"Stopped: {pipeline.stats()}")
+    if dispatcher is not None:
+        print(f"Alerts: {dispatcher.stats()}")
 
 def main():
     print("🔍 SentinelMesh MCP Monitor Running...\n")
@@ -0,0 +1,164 @@
+# sentinelmesh/monitor/log_tailer.py
+
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+from pathlib import Path
+
+# inotify(7) event bits for changes to files in the watched directory
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class _Inotify:
+    """Minimal inotify binding through libc; raises OSError where unavailable."""
+
+    def __init__(self, directory):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Block until something in the directory changes or ``timeout`` passes."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogTailer:
+    """Follow a growing log file by byte offset, like ``tail -F``.
+
+    Each call to ``read_lines`` returns only the complete lines appended
+    since the previous call, so the cost is proportional to the new bytes.
+    A file that shrinks is read again from the start (truncation); when the
+    path points to a new inode, the rest of the old file is read before
+    switching to the new one (rotation). ``follow`` waits for changes with
+    inotify where available and falls back to polling every
+    ``poll_interval`` seconds.
+    """
+
+    def __init__(self, path, poll_interval=0.25, from_start=True, use_inotify=True):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.use_inotify = use_inotify
+        self.rotations = 0
+        self.truncations = 0
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._partial = b""
+        self._inotify = None
+
+    @property
+    def offset(self):
+        return self._offset
+
+    def _open(self, at_end):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(f.fileno())
+        self._file = f
+        self._inode = (stat.st_dev, stat.st_ino)
+        self._offset = stat.st_size if at_end else 0
+        self._partial = b""
+        f.seek(self._offset)
+        return True
+
+    def _read_available(self, max_bytes=None):
+        data = self._file.read(-1 if max_bytes is None else max_bytes)
+        if not data:
+            return []
+        self._offset += len(data)
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        return [line.decode("utf-8", errors="replace") for line in lines]
+
+    def read_lines(self, max_bytes=None):
+        """Return the complete lines written since the last call, reading at
+        most ``max_bytes`` (everything available by default)."""
+        if self._file is None:
+            if not self._open(at_end=not self.from_start):
+                return []
+            # Only the very first open may skip existing content
+            self.from_start = True
+
+        lines = []
+        try:
+            current = os.stat(self.path)
+            rotated = (current.st_dev, current.st_ino) != self._inode
+        except FileNotFoundError:
+            rotated = False  # moved away and not recreated yet: keep reading the old file
+
+        if rotated:
+            lines.extend(self._read_available())
+            if self._partial:
+                lines.append(self._partial.decode("utf-8", errors="replace"))
+            self._file.close()
+            self._file = None
+            self.rotations += 1
+            self._open(at_end=False)
+            if self._file is None:
+                return lines
+        elif os.fstat(self._file.fileno()).st_size < self._offset:
+            self.truncations += 1
+            self._file.seek(0)
+            self._offset = 0
+            self._partial = b""
+
+        lines.extend(self._read_available(max_bytes))
+        return lines
+
+    def wait(self):
+        """Block until the file may have changed."""
+        if self.use_inotify and self._inotify is None and self.path.parent.exists():
+            try:
+                self._inotify = _Inotify(self.path.parent)
+            except OSError:
+                self.use_inotify = False
+        if self._inotify is not None:
+            # The timeout is a safety net for filesystems without events
+            self._inotify.wait(self.poll_interval * 4)
+        else:
+            time.sleep(self.poll_interval)
+
+    def follow(self, stop=None):
+        """Yield lines as they are appended until ``stop`` (an Event) is set."""
+        while stop is None or not stop.is_set():
+            lines = self.read_lines()
+            if lines:
+                yield from lines
+            else:
+                self.wait()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
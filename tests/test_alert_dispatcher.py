@@ -0,0 +1,139 @@
+import json
+import time
+
+import pytest
+
+from sentinelmesh.cli.alert_dispatcher import MAX_ATTEMPTS, AlertDispatcher
+
+
+@pytest.fixture
+def webhook(stub_server):
+    """Webhook endpoint recording posts; can rate limit or stall."""
+    server = stub_server
+    server.posts, server.attempts = [], []
+    server.delay = 0
+    server.rate_limit = 0
+    server.retry_after = 0.3
+    server.url += "/webhook"
+
+    def handle(request, body):
+        time.sleep(server.delay)
+        with server.lock:
+            server.attempts.append(time.monotonic())
+            if server.rate_limit > 0:
+                server.rate_limit -= 1
+                return 429, {"message": "rate limited", "retry_after": 5}, [("Retry-After", str(server.retry_after))]
+            server.posts.append(json.loads(body)["content"])
+        return 200, {}
+
+    server.handle = handle
+    return server
+
+
+def message(sender, payload="ignore previous instructions", receiver="hub"):
+    return {"sender": sender, "receiver": receiver, "payload": payload}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_alerts_are_coalesced_per_sender_and_rule(webhook):
+    dispatcher = AlertDispatcher(webhook.url, window=0.2, min_interval=0)
+    dispatcher.start()
+    try:
+        for i in range(50):
+            dispatcher.submit(message("agent-a", receiver=f"r{i % 2}"), [{"rule_id": "prompt_injection", "risk": 90}], 90 - i % 3)
+        dispatcher.submit(message("agent-a"), [{"rule_id": "secrets", "risk": 70}], 70)
+        dispatcher.submit(message("agent-b"), ["prompt_injection"], 60)
+        assert wait_for(lambda: len(webhook.posts) == 3)
+    finally:
+        dispatcher.stop(timeout=5)
+
+    summary = next(post for post in webhook.posts if "×50" in post)
+    assert "**Sender:** agent-a" in summary
+    assert "**Rule:** prompt_injection" in summary
+    assert "**Receiver:** r0, r1" in summary
+    assert "**Max risk:** 90/100" in summary
+    assert any("**Sender:** agent-b" in post and "**Risk:** 60/100" in post for post in webhook.posts)
+    assert dispatcher.stats()["sent"] == 3
+
+
+def test_retry_after_is_honoured(webhook):
+    webhook.rate_limit = 1
+    dispatcher = AlertDispatcher(webhook.url, window=0, min_interval=0)
+    dispatcher.start()
+    try:
+        dispatcher.submit(message("agent-a"), ["prompt_injection"], 90)
+        assert wait_for(lambda: webhook.posts)
+    finally:
+        dispatcher.stop(timeout=5)
+
+    assert len(webhook.posts) == 1
+    assert webhook.attempts[1] - webhook.attempts[0] >= 0.3
+    assert dispatcher.stats()["rate_limited"] == 1
+
+
+def test_rate_limits_do_not_use_up_attempts(webhook):
+    webhook.rate_limit = MAX_ATTEMPTS + 2
+    webhook.retry_after = 0.01
+    dispatcher = AlertDispatcher(webhook.url, window=0, min_interval=0)
+    dispatcher.start()
+    try:
+        dispatcher.submit(message("agent-a"), ["prompt_injection"], 90)
+        assert wait_for(lambda: webhook.posts)
+    finally:
+        dispatcher.stop(timeout=5)
+
+    assert dispatcher.stats()["rate_limited"] == MAX_ATTEMPTS + 2
+    assert dispatcher.stats()["sent"] == 1
+    assert dispatcher.stats()["failed"] == 0
+
+
+def test_posts_are_spaced_by_min_interval(webhook):
+    dispatcher = AlertDispatcher(webhook.url, window=0, min_interval=0.1)
+    dispatcher.start()
+    for sender in ("a", "b", "c"):
+        dispatcher.submit(message(sender), ["rule"], 90)
+    dispatcher.stop(timeout=5)
+
+    assert len(webhook.posts) == 3
+    gaps = [later - earlier for earlier, later in zip(webhook.attempts, webhook.attempts[1:])]
+    assert min(gaps) >= 0.09
+
+
+def test_submit_does_not_wait_for_slow_webhook(webhook):
+    webhook.delay = 0.3
+    dispatcher = AlertDispatcher(webhook.url, window=0, min_interval=0)
+    dispatcher.start()
+    try:
+        started = time.perf_counter()
+        for i in range(1000):
+            dispatcher.submit(message(f"agent-{i % 2}"), ["rule"], 90)
+        assert time.perf_counter() - started < 0.3
+    finally:
+        dispatcher.stop(timeout=10)
+    assert dispatcher.stats()["submitted"] == 1000
+
+
+def test_stop_flushes_pending_groups(webhook):
+    dispatcher = AlertDispatcher(webhook.url, window=60, min_interval=0)
+    dispatcher.start()
+    dispatcher.submit(message("agent-a"), ["rule"], 90)
+    dispatcher.submit(message("agent-a"), ["rule"], 95)
+    dispatcher.stop(timeout=5)
+    assert len(webhook.posts) == 1
+    assert "×2" in webhook.posts[0]
+
+
+def test_new_groups_beyond_limit_are_dropped():
+    dispatcher = AlertDispatcher("http://127.0.0.1:9", max_groups=2)
+    assert dispatcher.submit(message("a"), ["rule"], 90)
+    assert dispatcher.submit(message("b"), ["rule"], 90)
+    assert dispatcher.submit(message("a"), ["rule"], 90)
+    assert not dispatcher.submit(message("c"), ["rule"], 90)
+    assert dispatcher.stats()["dropped"] == 1
+    assert dispatcher.stats()["pending_groups"] == 2
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from sentinelmesh.cli.pipeline import ForwardingPipeline
+from sentinelmesh.monitor.log_tailer import LogTailer
+
+
+@pytest.fixture
+def api(stub_server):
+    """POST /logs/batch that takes ``delay`` seconds and records concurrency."""
+    server = stub_server
+    server.batches, server.active, server.max_active, server.delay = [], 0, 0, 0.0
+
+    def handle(request, body):
+        events = json.loads(body)
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+            server.batches.append(events)
+        return 200, {"count": len(events)}
+
+    server.handle = handle
+    return server
+
+
+def write_messages(path, count, start=0):
+    with open(path, "a") as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({"sender": f"agent-{i % 3}", "receiver": "hub", "payload": f"msg {i}"}) + "\n")
+
+
+def score(msg):
+    risk = 90 if msg["payload"].endswith("7") else 5
+    return (["ends in seven"] if risk > 50 else []), risk
+
+
+def test_forwards_every_line_once_in_batches(api, tmp_path):
+    log_file = tmp_path / "mcp_traffic.log"
+    write_messages(log_file, 1000)
+    with open(log_file, "a") as f:
+        f.write("not json\n")
+    alerts = []
+    pipeline = ForwardingPipeline(
+        LogTailer(log_file), score, on_alert=lambda *alert: alerts.append(alert),
+        api_base=api.url, batch_size=100, max_in_flight=4,
+    )
+    asyncio.run(pipeline.run(follow=False))
+
+    forwarded = [event for batch in api.batches for event in batch]
+    assert sorted(event["payload"] for event in forwarded) == sorted(f"msg {i}" for i in range(1000))
+    assert all(len(batch) <= 100 for batch in api.batches)
+    assert all("risk" in event and "timestamp" in event for event in forwarded)
+    assert len(alerts) == 100
+    assert pipeline.stats()["invalid"] == 1
+    assert pipeline.stats()["forwarded"] == 1000
+
+
+def test_in_flight_requests_are_bounded(api, tmp_path):
+    api.delay = 0.05
+    log_file = tmp_path / "mcp_traffic.log"
+    write_messages(log_file, 400)
+    pipeline = ForwardingPipeline(LogTailer(log_file), score, api_base=api.url, batch_size=20, max_in_flight=3)
+    asyncio.run(pipeline.run(follow=False))
+
+    assert len(api.batches) == 20
+    assert 1 < api.max_active <= 3
+
+
+def test_follows_new_lines_until_stopped(api, tmp_path):
+    log_file = tmp_path / "mcp_traffic.log"
+    log_file.touch()
+    stop = threading.Event()
+    pipeline = ForwardingPipeline(
+        LogTailer(log_file, poll_interval=0.05), score, api_base=api.url, batch_size=100, flush_interval=0.05,
+    )
+
+    def writer():
+        write_messages(log_file, 5)
+        deadline = time.monotonic() + 5
+        while pipeline.stats()["forwarded"] < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+
+    threading.Thread(target=writer, daemon=True).start()
+    asyncio.run(pipeline.run(stop))
+    assert pipeline.stats()["forwarded"] == 5
@@ -0,0 +1,284 @@
+import asyncio
+import base64
+import gzip
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import log_sender
+from log_sender import AsyncSentinelMeshLogSender, LogSpool, SentinelMeshLogSender
+
+
+def make_token(name):
+    claims = {"sub": "agent", "org": "example-org", "exp": int(time.time()) + 3600, "name": name}
+    encoded = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"header.{encoded}.signature"
+
+
+@pytest.fixture
+def api(stub_server):
+    """Minimal /token and /logs/batch endpoints recording what they receive."""
+    server = stub_server
+    server.batches, server.connections = [], set()
+    server.tokens_issued = server.gzipped = 0
+    server.reject_first_token = server.reject_all_tokens = False
+    server.fail_batches = 0
+
+    def handle(request, body):
+        server.connections.add(request.client_address)
+        if request.path == "/token":
+            with server.lock:
+                server.tokens_issued += 1
+                issued = server.tokens_issued
+            return 200, {"access_token": make_token(f"t{issued}"), "token_type": "bearer"}
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+            server.gzipped += 1
+        if server.fail_batches > 0:
+            server.fail_batches -= 1
+            return 503, {"detail": "overloaded"}
+        if server.reject_first_token and request.headers.get("Authorization") == f"Bearer {make_token('t1')}":
+            return 401, {"detail": "expired"}
+        if server.reject_all_tokens:
+            return 401, {"detail": "invalid credentials"}
+        events = json.loads(body)
+        server.batches.append(events)
+        return 200, {"count": len(events), "results": []}
+
+    server.handle = handle
+    return server
+
+
+def event(i, payload="hello"):
+    return {"sender": "agent", "receiver": "hub", "context": "test", "payload": f"{payload} {i}",
+            "timestamp": "2025-08-02T10:30:00+00:00"}
+
+
+def test_buffered_events_are_sent_in_batches(api):
+    with SentinelMeshLogSender(api_base=api.url, username="agent", password="pw", batch_size=5, flush_interval=60) as sender:
+        for i in range(12):
+            assert sender.log(event(i))
+        assert sender.flush(timeout=5)
+
+    assert [len(batch) for batch in api.batches] == [5, 5, 2]
+    assert [e["payload"] for batch in api.batches for e in batch] == [f"hello {i}" for i in range(12)]
+    assert sender.stats()["sent"] == 12
+    assert api.tokens_issued == 1
+    assert len(api.connections) == 1
+
+
+def test_partial_batch_is_sent_after_interval(api):
+    sender = SentinelMeshLogSender(api_base=api.url, batch_size=100, flush_interval=0.05)
+    sender.start()
+    try:
+        sender.log(event(0))
+        deadline = time.monotonic() + 5
+        while not api.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sender.close()
+    assert api.batches == [[event(0)]]
+
+
+def test_large_batches_are_gzipped(api):
+    with SentinelMeshLogSender(api_base=api.url, batch_size=50, flush_interval=60) as sender:
+        for i in range(50):
+            sender.log(event(i, payload="x" * 200))
+        sender.log(event(50))
+    assert api.gzipped == 1
+    assert sum(len(batch) for batch in api.batches) == 51
+
+
+def test_rejected_token_is_refreshed(api):
+    api.reject_first_token = True
+    with SentinelMeshLogSender(api_base=api.url, username="agent", password="pw", batch_size=2) as sender:
+        sender.log(event(0))
+        sender.log(event(1))
+    assert api.tokens_issued == 2
+    assert api.batches == [[event(0), event(1)]]
+    assert sender.stats()["failed"] == 0
+
+
+def test_concurrent_401s_log_in_once(api):
+    api.reject_first_token = True
+    sender = SentinelMeshLogSender(api_base=api.url, username="agent", password="pw")
+    sender.get_access_token()
+    barrier = threading.Barrier(4)
+
+    def post(i):
+        barrier.wait()
+        sender._post_batch([event(i)])
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert api.tokens_issued == 2
+    assert len(api.batches) == 4
+
+
+def test_events_are_timestamped_when_logged(api):
+    sender = SentinelMeshLogSender(api_base=api.url, batch_size=100, flush_interval=60)
+    unstamped = {"sender": "agent", "receiver": "hub", "payload": "hi"}
+    before = datetime.now(timezone.utc)
+    sender.log(unstamped)
+    time.sleep(0.05)
+    sender.flush()
+    sent = api.batches[0][0]
+    assert "timestamp" not in unstamped
+    assert before <= datetime.fromisoformat(sent["timestamp"]) < before + timedelta(seconds=0.05)
+
+
+def test_full_buffer_drops_events():
+    sender = SentinelMeshLogSender(api_base="http://127.0.0.1:9", max_buffer=2)
+    assert sender.log(event(0)) and sender.log(event(1))
+    assert not sender.log(event(2))
+    assert sender.stats()["dropped"] == 1
+
+
+def test_async_sender(api):
+    async def run():
+        async with AsyncSentinelMeshLogSender(api_base=api.url, username="agent", password="pw", batch_size=4) as sender:
+            for i in range(10):
+                sender.log(event(i))
+            assert await sender.flush(timeout=5)
+            return sender.stats()
+
+    stats = asyncio.run(run())
+    assert [len(batch) for batch in api.batches] == [4, 4, 2]
+    assert stats["sent"] == 10
+
+
+def test_async_flush_before_start(api):
+    async def run():
+        sender = AsyncSentinelMeshLogSender(api_base=api.url)
+        assert await sender.flush()
+        sender.log(event(0))
+        return await sender.flush()
+
+    assert asyncio.run(run()) is False
+    assert api.batches == []
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_spool_resumes_from_acknowledged_position(tmp_path):
+    spool = LogSpool(tmp_path)
+    for i in range(3):
+        spool.append([event(i)])
+    position, batch = spool.peek()
+    assert batch == [event(0)]
+    spool.ack(position)
+    spool.peek()  # read but never acknowledged: delivered again after a restart
+    spool.close()
+
+    reopened = LogSpool(tmp_path)
+    assert reopened.pending == 2
+    assert reopened.peek()[1] == [event(1)]
+
+
+def test_spool_skips_corrupt_records(tmp_path):
+    spool = LogSpool(tmp_path)
+    spool.append([event(0)])
+    spool.append([event(1)])
+    spool.close()
+    segment = next(tmp_path.glob("spool-*.log"))
+    data = bytearray(segment.read_bytes())
+    data[10] ^= 0xFF
+    segment.write_bytes(bytes(data))
+
+    spool = LogSpool(tmp_path)
+    assert spool.peek()[1] == [event(1)]
+    assert spool.corrupt == 1
+
+
+def test_spool_size_is_bounded(tmp_path):
+    spool = LogSpool(tmp_path, max_bytes=2000, segment_bytes=500)
+    for i in range(50):
+        spool.append([event(i)])
+    stats = spool.stats()
+    assert stats["bytes"] <= 2000 + 500
+    assert stats["dropped_bytes"] > 0
+    remaining = []
+    while (item := spool.peek()) is not None:
+        spool.ack(item[0])
+        remaining.extend(item[1])
+    assert len(remaining) == stats["pending"]
+    assert remaining[-1] == event(49)
+
+
+def test_failed_batches_are_spooled_and_replayed(api, tmp_path, monkeypatch):
+    monkeypatch.setattr(log_sender, "REPLAY_BACKOFF_BASE", 0.01)
+    api.fail_batches = 3
+    with SentinelMeshLogSender(api_base=api.url, batch_size=2, spool_dir=tmp_path) as sender:
+        for i in range(6):
+            sender.log(event(i))
+        sender.flush(timeout=5)
+        assert wait_for(lambda: sender.stats()["spool"]["pending"] == 0)
+    assert [e["payload"] for batch in api.batches for e in batch] == [f"hello {i}" for i in range(6)]
+    assert sender.stats()["spooled"] == 6
+    assert sender.stats()["replayed"] == 6
+
+
+def test_rejected_credentials_are_not_spooled(api, tmp_path):
+    api.reject_all_tokens = True
+    with SentinelMeshLogSender(api_base=api.url, username="agent", password="pw", batch_size=2,
+                               spool_dir=tmp_path) as sender:
+        sender.log(event(0))
+        sender.log(event(1))
+    assert api.tokens_issued == 2
+    assert sender.stats()["spooled"] == 0
+    assert sender.stats()["failed"] == 2
+
+
+def test_invalid_url_is_not_spooled(tmp_path):
+    with SentinelMeshLogSender(api_base="127.0.0.1:9", batch_size=1, spool_dir=tmp_path) as sender:
+        sender.log(event(0))
+    assert sender.stats()["spooled"] == 0
+    assert sender.stats()["failed"] == 1
+
+
+def test_spool_survives_restart(api, tmp_path):
+    with SentinelMeshLogSender(api_base="http://127.0.0.1:9", batch_size=2, timeout=1, spool_dir=tmp_path) as down:
+        for i in range(4):
+            down.log(event(i))
+    assert down.stats()["spooled"] == 4
+    assert not api.batches
+
+    with SentinelMeshLogSender(api_base=api.url, spool_dir=tmp_path) as sender:
+        assert wait_for(lambda: sender.stats()["replayed"] == 4)
+    assert [e for batch in api.batches for e in batch] == [event(i) for i in range(4)]
+
+
+def test_full_buffer_spills_to_spool(tmp_path):
+    sender = SentinelMeshLogSender(api_base="http://127.0.0.1:9", batch_size=2, max_buffer=2, spool_dir=tmp_path)
+    for i in range(5):
+        assert sender.log(event(i))
+    assert sender.stats()["dropped"] == 0
+    assert sender.stats()["spool"]["pending"] == 2
+
+
+def test_spool_ignores_torn_tail(tmp_path):
+    spool = LogSpool(tmp_path)
+    spool.append([event(0)])
+    spool.append([event(1)])
+    spool.close()
+    segment = next(tmp_path.glob("spool-*.log"))
+    segment.write_bytes(segment.read_bytes()[:-5])
+
+    spool = LogSpool(tmp_path)
+    assert spool.pending == 1
+    position, batch = spool.peek()
+    assert batch == [event(0)]
+    spool.ack(position)
+    assert spool.peek() is None
+    assert spool.stats()["pending"] == 0
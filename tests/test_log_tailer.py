@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pytest
+
+from sentinelmesh.monitor.log_tailer import LogTailer
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    return tmp_path / "mcp_traffic.log"
+
+
+def append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_reads_only_new_complete_lines(log_file):
+    append(log_file, "one\ntwo\n")
+    tailer = LogTailer(log_file)
+    assert tailer.read_lines() == ["one", "two"]
+    assert tailer.read_lines() == []
+
+    append(log_file, "three\nfou")
+    assert tailer.read_lines() == ["three"]
+    append(log_file, "r\n")
+    assert tailer.read_lines() == ["four"]
+    assert tailer.offset == log_file.stat().st_size
+
+
+def test_identical_lines_are_not_deduplicated(log_file):
+    tailer = LogTailer(log_file)
+    append(log_file, "same\n")
+    assert tailer.read_lines() == ["same"]
+    append(log_file, "same\nsame\n")
+    assert tailer.read_lines() == ["same", "same"]
+
+
+def test_can_start_at_end_of_file(log_file):
+    append(log_file, "old\n")
+    tailer = LogTailer(log_file, from_start=False)
+    assert tailer.read_lines() == []
+    append(log_file, "new\n")
+    assert tailer.read_lines() == ["new"]
+
+
+def test_truncation_restarts_from_beginning(log_file):
+    append(log_file, "a long first line\n")
+    tailer = LogTailer(log_file)
+    tailer.read_lines()
+    log_file.write_text("short\n")
+    assert tailer.read_lines() == ["short"]
+    assert tailer.truncations == 1
+
+
+def test_rotation_drains_old_file_then_follows_new_one(log_file):
+    append(log_file, "before\n")
+    tailer = LogTailer(log_file)
+    assert tailer.read_lines() == ["before"]
+
+    append(log_file, "late write\n")
+    os.rename(log_file, log_file.with_suffix(".log.1"))
+    assert tailer.read_lines() == ["late write"]
+    append(log_file, "after\n")
+    assert tailer.read_lines() == ["after"]
+    assert tailer.rotations == 1
+
+
+def test_missing_file_is_picked_up_when_created(log_file):
+    tailer = LogTailer(log_file)
+    assert tailer.read_lines() == []
+    append(log_file, "hello\n")
+    assert tailer.read_lines() == ["hello"]
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_follow_delivers_lines_quickly(log_file, use_inotify):
+    log_file.touch()
+    tailer = LogTailer(log_file, poll_interval=0.05, use_inotify=use_inotify)
+    stop = threading.Event()
+    received = []
+
+    def consume():
+        for line in tailer.follow(stop):
+            received.append((line, time.monotonic()))
+            if len(received) == 2:
+                stop.set()
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    time.sleep(0.1)
+    written = time.monotonic()
+    append(log_file, "first\nsecond\n")
+    thread.join(5)
+    tailer.close()
+
+    assert [line for line, _ in received] == ["first", "second"]
+    assert received[-1][1] - written < 0.5